@@ -1,12 +1,14 @@
 # langchain_ai_agent/agents/base_agent.py
 import logging
-from typing import Dict, Any, TypedDict, List
+from typing import Dict, Any, TypedDict, List, Optional, AsyncIterator, Tuple
 from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableConfig
 from langchain_core.output_parsers import StrOutputParser
 from difflib import get_close_matches
-from langchain_google_vertexai import ChatVertexAI
+from langchain_ai_agent.agents.llm import get_llm
+from langchain_ai_agent.agents.pre_classifier import CentroidClassifier
+from langchain_ai_agent.retriever.embeddings import get_embeddings
 import asyncio
 
 # Tool imports (assume implemented as Runnables)
@@ -40,7 +42,7 @@ Document:
 )
 
 
-llm = ChatVertexAI(
+llm = get_llm(
     model_name = 'gemini-2.0-flash-lite',
     temperature = 0.3,
     max_output_tokens = 256,
@@ -48,6 +50,26 @@ llm = ChatVertexAI(
     project="doc-clssifier",
 )
 
+ALLOWED_LABELS = {"meeting_note", "contract", "support_ticket", "knowledge_base"}
+
+
+def match_label(classification: str) -> Optional[str]:
+    """
+    Map raw classifier output to an allowed label, tolerating near-misses.
+
+    Returns:
+        Optional[str]: The label, or None if nothing is close enough
+    """
+    classification = classification.strip().lower().replace(".", "")
+    if classification in ALLOWED_LABELS:
+        return classification
+    close = get_close_matches(classification, ALLOWED_LABELS, n=1, cutoff=0.8)
+    if close:
+        logger.warning(f"[Agent] Fuzzy matched '{classification}' → '{close[0]}'")
+        return close[0]
+    return None
+
+
 # 2. Routing map
 def route_to_tool(classification: str) -> Runnable:
     tool_map = {
@@ -61,14 +83,20 @@ def route_to_tool(classification: str) -> Runnable:
         RunnableLambda(lambda x: {"error": "Unknown classification result"})
     )
 
+classify_chain: Runnable = (
+    {"text": lambda x: x['text']}
+    | classification_prompt
+    |llm
+    | StrOutputParser()
+)
+
 # 3. LCEL agent pipeline
-def get_agent_pipeline() -> Runnable:
-    classify_chain: Runnable = (
-        {"text": lambda x: x['text']}
-        | classification_prompt
-        |llm
-        | StrOutputParser()
-    )
+def get_agent_pipeline(pre_classifier: Optional[CentroidClassifier] = None) -> Runnable:
+    """
+    Args:
+        pre_classifier (Optional[CentroidClassifier]): Local router tried before the
+            LLM classification call. Inputs may carry a precomputed "embedding".
+    """
 
     async def route_executor(input: AgentInput, config: RunnableConfig = {}) -> Dict[str, Any]:
         if "text" not in input or not input["text"].strip():
@@ -79,25 +107,35 @@ def get_agent_pipeline() -> Runnable:
                 "agent_trace": {}
             }
 
-        try:
-            classification = await classify_chain.ainvoke(input, config=config)
-            classification = classification.strip().lower().replace(".", "")
-            logger.debug(f"[Agent] Raw model output: {classification}")
-        except Exception as e:
-            logger.exception("[Agent] Classification chain failed.")
-            return {
-                "task": None,
-                "output": {"error": f"Classification failed: {str(e)}"},
-                "agent_trace": {"stage": "classification"}
-            }
+        vector = input.get("embedding")
+        routing = {"routed_by": "llm"}
+        classification = None
+        if pre_classifier is not None and pre_classifier.ready:
+            if vector is None:
+                vector = await get_embeddings().aembed_query(input["text"])
+            predicted = pre_classifier.classify(vector)
+            if predicted is not None:
+                classification, confidence = predicted
+                routing = {"routed_by": "pre_classifier", "confidence": round(confidence, 4)}
+                logger.info(f"[Agent] Pre-classified as '{classification}' ({confidence:.2f}).")
 
-        allowed_labels = {"meeting_note", "contract", "support_ticket", "knowledge_base"}
+        if classification is None:
+            try:
+                classification = await classify_chain.ainvoke(input, config=config)
+                classification = classification.strip().lower().replace(".", "")
+                logger.debug(f"[Agent] Raw model output: {classification}")
+            except Exception as e:
+                logger.exception("[Agent] Classification chain failed.")
+                return {
+                    "task": None,
+                    "output": {"error": f"Classification failed: {str(e)}"},
+                    "agent_trace": {"stage": "classification"}
+                }
 
-        if classification not in allowed_labels:
-            close = get_close_matches(classification, allowed_labels, n=1, cutoff=0.8)
-            if close:
-                logger.warning(f"[Agent] Fuzzy matched '{classification}' → '{close[0]}'")
-                classification = close[0]
+        if classification not in ALLOWED_LABELS:
+            label = match_label(classification)
+            if label is not None:
+                classification = label
             else:
                 logger.warning(f"[Agent] Invalid classification: {classification}")
                 return {
@@ -108,6 +146,11 @@ def get_agent_pipeline() -> Runnable:
                         "routed_tool": classification
                     }
                 }
+
+        # LLM labels keep the local classifier learning between restarts.
+        if pre_classifier is not None and routing["routed_by"] == "llm" and vector is not None:
+            pre_classifier.add([vector], [classification])
+
         try:
             tool = route_to_tool(classification)
             output = await tool.ainvoke(input, config=config)
@@ -121,8 +164,132 @@ def get_agent_pipeline() -> Runnable:
             "output": output,
             "agent_trace": {
                 "input_preview": input["text"][:100],
-                "routed_tool": classification
+                "routed_tool": classification,
+                **routing
             }
         }
 
-    return RunnableLambda(route_executor)
\ No newline at end of file
+    return RunnableLambda(route_executor)
+
+# 4. Batch execution
+async def stream_agent_batch(
+    inputs: List[AgentInput],
+    pre_classifier: Optional[CentroidClassifier] = None,
+    config: Optional[RunnableConfig] = None
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Run the agent over many inputs, yielding (index, result) as each completes.
+
+    Inputs the pre-classifier is not confident about are classified with one
+    `abatch` call, then grouped by label so every tool chain runs its items
+    with `abatch_as_completed`, all groups concurrently. Results have the same
+    shape as the agent pipeline's.
+
+    Args:
+        inputs (List[AgentInput]): Inputs, optionally carrying an "embedding"
+        pre_classifier (Optional[CentroidClassifier]): Local router tried first
+        config (Optional[RunnableConfig]): Passed to the classification and tool chains
+
+    Yields:
+        Tuple[int, Dict[str, Any]]: Input index and {"task", "output", "agent_trace"}
+    """
+    labels: Dict[int, str] = {}
+    routing: Dict[int, Dict[str, Any]] = {}
+    valid = []
+    for i, input in enumerate(inputs):
+        if "text" not in input or not input["text"].strip():
+            yield i, {
+                "task": None,
+                "output": {"error": "Input must contain non-empty 'text' field"},
+                "agent_trace": {}
+            }
+        else:
+            valid.append(i)
+
+    vectors = {i: inputs[i].get("embedding") for i in valid}
+    if pre_classifier is not None and pre_classifier.ready:
+        missing = [i for i in valid if vectors[i] is None]
+        if missing:
+            embedded = await get_embeddings().aembed_documents([inputs[i]["text"] for i in missing])
+            vectors.update(zip(missing, embedded))
+        for i in valid:
+            predicted = pre_classifier.classify(vectors[i])
+            if predicted is not None:
+                labels[i] = predicted[0]
+                routing[i] = {"routed_by": "pre_classifier", "confidence": round(predicted[1], 4)}
+
+    to_classify = [i for i in valid if i not in labels]
+    raw = await classify_chain.abatch(
+        [inputs[i] for i in to_classify], config=config, return_exceptions=True
+    ) if to_classify else []
+    for i, classification in zip(to_classify, raw):
+        if isinstance(classification, Exception):
+            logger.error(f"[Agent] Classification failed for batch item {i}: {classification}")
+            yield i, {
+                "task": None,
+                "output": {"error": f"Classification failed: {str(classification)}"},
+                "agent_trace": {"stage": "classification"}
+            }
+            continue
+        label = match_label(classification)
+        if label is None:
+            logger.warning(f"[Agent] Invalid classification: {classification}")
+            yield i, {
+                "task": classification,
+                "output": {"error": f"Unknown classification result: {classification}"},
+                "agent_trace": {"input_preview": inputs[i]["text"][:100], "routed_tool": classification}
+            }
+            continue
+        labels[i] = label
+        routing[i] = {"routed_by": "llm"}
+        if pre_classifier is not None and vectors[i] is not None:
+            pre_classifier.add([vectors[i]], [label])
+
+    groups: Dict[str, List[int]] = {}
+    for i, label in labels.items():
+        groups.setdefault(label, []).append(i)
+    logger.info(f"[Agent] Batch of {len(inputs)}: " + ", ".join(f"{len(v)} {k}" for k, v in groups.items()))
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def run_group(label: str, indices: List[int]) -> None:
+        done = set()
+        try:
+            tool = route_to_tool(label)
+            async for j, output in tool.abatch_as_completed(
+                [inputs[i] for i in indices], config=config, return_exceptions=True
+            ):
+                done.add(j)
+                await queue.put((indices[j], label, output))
+        except Exception as e:
+            for j, i in enumerate(indices):
+                if j not in done:
+                    await queue.put((i, label, e))
+        finally:
+            await queue.put(None)
+
+    tasks = [asyncio.create_task(run_group(label, indices)) for label, indices in groups.items()]
+    try:
+        running = len(tasks)
+        while running:
+            item = await queue.get()
+            if item is None:
+                running -= 1
+                continue
+            i, label, output = item
+            if isinstance(output, Exception):
+                logger.error(f"[Agent] Tool '{label}' failed for batch item {i}: {output}")
+                output = {"error": f"Tool execution failed: {str(output)}"}
+            yield i, {
+                "task": label,
+                "output": output,
+                "agent_trace": {
+                    "input_preview": inputs[i]["text"][:100],
+                    "routed_tool": label,
+                    **routing[i]
+                }
+            }
+    finally:
+        # The client went away: stop the remaining tool calls.
+        for task in tasks:
+            task.cancel()
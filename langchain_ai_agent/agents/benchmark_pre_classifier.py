@@ -0,0 +1,89 @@
+# langchain_ai_agent/agents/benchmark_pre_classifier.py
+'''
+Offline benchmark of the local pre-classifier against the LLM labels in a
+memory log:
+
+    python -m langchain_ai_agent.agents.benchmark_pre_classifier --log memory_index/memory_log.jsonl --llm-sample 20
+
+The history is split into train/test; for each confidence threshold it reports
+how many test documents would be routed locally, their accuracy against the
+LLM label, and the routing latency saved per request. LLM latency is measured
+on `--llm-sample` test documents, or taken from `--llm-latency-ms`.
+'''
+
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+import numpy as np
+from langchain_core.output_parsers import StrOutputParser
+
+from langchain_ai_agent.agents.pre_classifier import CentroidClassifier, read_labelled_history
+from langchain_ai_agent.retriever.embeddings import get_embeddings
+
+
+async def measure_llm_latency(texts) -> float:
+    # Imported here: building the agent creates the Vertex AI clients.
+    from langchain_ai_agent.agents.base_agent import classification_prompt, llm
+
+    # Without the LLM cache: these texts were classified before, so it would answer them.
+    chain = classification_prompt | llm.model_copy(update={"cache": False}) | StrOutputParser()
+    timings = []
+    for text in texts:
+        started = time.perf_counter()
+        await chain.ainvoke({"text": text})
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the local routing classifier against LLM labels.")
+    parser.add_argument("--log", default="memory_index/memory_log.jsonl", help="Memory log with labelled history")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--thresholds", default="0.5,0.7,0.8,0.9,0.95,0.99")
+    parser.add_argument("--llm-sample", type=int, default=0, help="Test documents sent to the LLM to time it")
+    parser.add_argument("--llm-latency-ms", type=float, help="Assumed LLM routing latency")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    texts, labels = read_labelled_history(args.log)
+    if len(texts) < 10:
+        raise SystemExit(f"[Benchmark] Only {len(texts)} labelled examples in {args.log}.")
+
+    order = list(range(len(texts)))
+    random.Random(args.seed).shuffle(order)
+    split = int(len(order) * (1 - args.test_fraction))
+    train, test = order[:split], order[split:]
+
+    vectors = np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32)
+    classifier = CentroidClassifier(min_examples=1)
+    classifier.fit(vectors[train], [labels[i] for i in train])
+
+    started = time.perf_counter()
+    probs = np.vstack([classifier.predict_proba(vectors[i]) for i in test])
+    local_ms = (time.perf_counter() - started) * 1000 / len(test)
+    predicted = np.array(classifier.labels)[probs.argmax(axis=1)]
+    confidence = probs.max(axis=1)
+    expected = np.array([labels[i] for i in test])
+
+    llm_ms = args.llm_latency_ms
+    if args.llm_sample:
+        llm_ms = asyncio.run(measure_llm_latency([texts[i] for i in test[:args.llm_sample]]))
+
+    print(f"[Benchmark] {len(train)} train / {len(test)} test examples, local routing {local_ms:.3f} ms/request")
+    if llm_ms is not None:
+        print(f"[Benchmark] LLM routing latency: {llm_ms:.1f} ms")
+    print(f"{'threshold':>9} {'local':>7} {'accuracy':>9} {'saved_ms':>9}")
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        local = confidence >= threshold
+        coverage = local.mean()
+        accuracy = (predicted[local] == expected[local]).mean() if local.any() else float("nan")
+        saved = f"{coverage * llm_ms - local_ms:9.1f}" if llm_ms is not None else f"{'-':>9}"
+        print(f"{threshold:9.2f} {coverage:7.1%} {accuracy:9.1%} {saved}")
+    print(f"[Benchmark] Accuracy with every document routed locally: {(predicted == expected).mean():.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,62 @@
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
-from langchain_google_vertexai import ChatVertexAI
-from langchain_ai_agent.retriever.vector_store import DocumentEmbedder
+from langchain_core.output_parsers import StrOutputParser
+from langchain_ai_agent.agents.llm import get_llm
+from langchain_ai_agent.agents.llm_scheduler import Priority, llm_priority
+from langchain_ai_agent.retriever.registry import registry, get_embedder
+from langchain_ai_agent.retriever.context_packer import estimate_tokens, get_context_packer
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, RemoveMessage
-from langgraph.graph import StateGraph, START, END, MessagesState
-from langgraph.checkpoint.memory import MemorySaver
-from typing import Annotated, Sequence, Literal
-import operator
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph, END, MessagesState
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.types import StreamWriter
+from langchain_ai_agent.agents.checkpointer import get_checkpointer
+from typing import Sequence, Dict, Optional
+from functools import lru_cache
+import asyncio
 import logging
+import os
+import re
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# Shared persistent memory store
-store = MemorySaver()
+# Shared persistent conversation store (SQLite by default, see CHAT_CHECKPOINTER)
+store = get_checkpointer()
+
+# Unsummarised history above this many (estimated) tokens is folded into the summary.
+SUMMARY_TRIGGER_TOKENS = int(os.getenv("SUMMARY_TRIGGER_TOKENS", "1500"))
+# The most recent messages stay verbatim; they are summarised on a later pass.
+SUMMARY_KEEP_MESSAGES = int(os.getenv("SUMMARY_KEEP_MESSAGES", "2"))
+
+# Words that point back into the conversation; a question without them is
+# answerable as is and skips the rephrasing LLM call.
+REFERENCE_PATTERN = re.compile(
+    r"\b(it|its|it's|this|that|these|those|they|them|their|he|him|his|she|her|"
+    r"one|ones|same|above|previous|previously|earlier|former|latter|else|"
+    r"also|too|again|more|further|another|other|then)\b",
+    re.IGNORECASE
+)
+
+
+def needs_rewrite(question: str, chat_history: Sequence) -> bool:
+    """
+    Whether the question has to be rephrased with the chat history before retrieval.
+
+    Args:
+        question (str): The user's latest question
+        chat_history (Sequence): Earlier messages (and summary) of the thread
+
+    Returns:
+        bool: False for first turns and self-contained questions
+    """
+    return bool(chat_history) and bool(REFERENCE_PATTERN.search(question))
+
+
+def _normalise(text: str) -> str:
+    return " ".join(text.lower().strip(" ?.!").split())
+
 
 # Use MessagesState for built-in message memory support
 class AgentState(MessagesState):
@@ -49,22 +90,42 @@ def create_doc_chains_prompt():
     )
 
 def get_chat_agent_with_memory(persist_dir: str):
-    embedder = DocumentEmbedder(persist_dir=persist_dir)
-    retriever = embedder.get_retriever(k=10)
+    embedder = get_embedder(persist_dir, read_only=True)
+    # Metadata filters arrive per request via config["configurable"]["filters"].
+    # Hybrid BM25 + vector ranking is precise enough to send fewer chunks.
+    # Neighbouring chunks are merged, duplicates dropped and the context capped
+    # at CONTEXT_TOKEN_BUDGET before it reaches the stuff-documents prompt.
+    retriever = embedder.get_filterable_retriever(k=5, hybrid=True) | get_context_packer()
 
-    llm = ChatVertexAI(
+    llm = get_llm(
         model_name="gemini-2.0-flash-lite",
         temperature=0.3,
         max_output_tokens=1024,
     )
 
-    contextualize_q_prompt = create_prompt()
-    try:
-        history_aware_retriever = create_history_aware_retriever(
-            llm, retriever, contextualize_q_prompt
-        )
-    except Exception as e:
-        logger.info(f"[Retriever] {e}")
+    # The rewritten question is internal: keep its tokens out of stream_mode="messages".
+    rephrase_chain = create_prompt() | llm.with_config(tags=[TAG_NOSTREAM]) | StrOutputParser()
+
+    async def retrieve(question: str, chat_history: list, config: RunnableConfig) -> list:
+        if not needs_rewrite(question, chat_history):
+            logger.info("[Retriever] Fast path: retrieving with the question as asked.")
+            return await retriever.ainvoke(question, config=config)
+
+        # Retrieve for the raw question while it is rephrased; rewrites often leave it unchanged.
+        speculative = asyncio.ensure_future(retriever.ainvoke(question, config=config))
+        try:
+            rewritten = (await rephrase_chain.ainvoke(
+                {"input": question, "chat_history": chat_history}, config=config
+            )).strip()
+        except BaseException:
+            speculative.cancel()
+            raise
+        if not rewritten or _normalise(rewritten) == _normalise(question):
+            logger.info("[Retriever] Rewrite left the question unchanged; using speculative retrieval.")
+            return await speculative
+        speculative.cancel()
+        logger.info(f"[Retriever] Rewrote question to: {rewritten}")
+        return await retriever.ainvoke(rewritten, config=config)
 
     stuff_prompt = create_doc_chains_prompt()
     try:
@@ -72,11 +133,9 @@ def get_chat_agent_with_memory(persist_dir: str):
     except Exception as e:
         logger.info(f"[Chain] {e}")
 
-    retrieval_chain = create_retrieval_chain(history_aware_retriever, combine_docs_chain)
-
     workflow = StateGraph(AgentState)
 
-    def call_model(state: AgentState) -> dict:
+    async def call_model(state: AgentState, config: RunnableConfig, writer: StreamWriter) -> dict:
         logger.info(f"[call_model] Full state: {state}")
         question = state.get("question", "")
         summary = state.get("summary", "")
@@ -98,8 +157,11 @@ def get_chat_agent_with_memory(persist_dir: str):
         }
 
         logger.info(f"[call_model] chain_input: {chain_input}")
-        chain_output = retrieval_chain.invoke(chain_input)
-        answer_text = chain_output['answer']
+        # Sources are sent to stream_mode="custom" before generation starts,
+        # answer tokens reach stream_mode="messages" as the LLM produces them.
+        docs = await retrieve(question, chat_history, config)
+        writer({"sources": [doc.metadata for doc in docs]})
+        answer_text = await combine_docs_chain.ainvoke({**chain_input, "context": docs}, config=config)
 
         updated_messages = state.get("messages", []) + [
             HumanMessage(content=question),
@@ -111,36 +173,109 @@ def get_chat_agent_with_memory(persist_dir: str):
             "graph_output": answer_text
         }
 
-    def should_continue(state: AgentState) -> Literal["summarize_conversation", END]:
-        if len(state.get("messages", [])) > 6:
-            return "summarize_conversation"
-        return END
-
-    def summarize_conversation(state: AgentState) -> dict:
-        summary = state.get("summary", "")
-        prompt = (
-            f"This is summary of the conversation to date: {summary}\n\n"
-            "Extend the summary by taking into account the new messages above:"
-            if summary
-            else "Create a summary of the conversation above:"
-        )
-        messages = state["messages"] + [HumanMessage(content=prompt)]
-        response = llm.invoke(messages)
-        delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
-
-        return {
-            "summary": response.content,
-            "messages": delete_messages
-        }
-
-    # Build the graph
+    # Build the graph. Summarisation runs off the response path, see schedule_summary.
     workflow.add_node("conversation", call_model)
-    workflow.add_node("summarize_conversation", summarize_conversation)
     workflow.set_entry_point("conversation")
-    workflow.add_conditional_edges("conversation", should_continue)
-    workflow.add_edge("summarize_conversation", END)
+    workflow.add_edge("conversation", END)
 
     workflow = workflow.compile(checkpointer=store)
-    logger.info("[LangGraph] Compiled with MemorySaver store")
+    logger.info(f"[LangGraph] Compiled with {type(store).__name__} store")
     return workflow
 
+
+def get_cached_chat_agent(persist_dir: str):
+    """
+    Return the compiled chat graph for a namespace, building it once per process.
+
+    The graph is dropped together with the namespace's embedder whenever the
+    registry is invalidated by ingestion.
+    """
+    return registry.get_or_create(
+        persist_dir, "chat_agent", lambda: get_chat_agent_with_memory(persist_dir)
+    )
+
+
+@lru_cache(maxsize=1)
+def _summary_llm():
+    return get_llm(model_name="gemini-2.0-flash-lite", temperature=0.3, max_output_tokens=1024)
+
+
+async def summarize_conversation(agent, config: RunnableConfig) -> bool:
+    """
+    Fold the messages added since the last summary into the thread's summary.
+
+    Only messages not yet summarised are sent to the LLM; they are removed from
+    the thread afterwards, except the last SUMMARY_KEEP_MESSAGES.
+
+    Args:
+        agent: Compiled chat graph
+        config (RunnableConfig): Config carrying the thread_id
+
+    Returns:
+        bool: True if the summary was updated
+    """
+    state = (await agent.aget_state(config)).values
+    messages = state.get("messages", [])
+    new_messages = messages[:-SUMMARY_KEEP_MESSAGES] if SUMMARY_KEEP_MESSAGES else messages
+    if not new_messages or estimate_tokens("".join(str(m.content) for m in messages)) < SUMMARY_TRIGGER_TOKENS:
+        return False
+
+    summary = state.get("summary")
+    prompt = (
+        f"This is summary of the conversation to date: {summary}\n\n"
+        "Extend the summary by taking into account the new messages above:"
+        if summary
+        else "Create a summary of the conversation above:"
+    )
+    # Summaries are not urgent: queue behind interactive LLM calls.
+    with llm_priority(Priority.BATCH):
+        response = await _summary_llm().ainvoke(list(new_messages) + [HumanMessage(content=prompt)])
+    await agent.aupdate_state(config, {
+        "summary": response.content,
+        "messages": [RemoveMessage(id=m.id) for m in new_messages]
+    }, as_node="conversation")
+    logger.info(f"[Summary] Folded {len(new_messages)} messages into the summary of {config['configurable']['thread_id']}.")
+    return True
+
+
+# In-flight summaries by thread_id; at most one per thread.
+_summaries: Dict[str, asyncio.Task] = {}
+
+
+def schedule_summary(agent, config: RunnableConfig) -> Optional[asyncio.Task]:
+    """
+    Summarise the thread in a background task once the reply has been returned.
+
+    Returns:
+        Optional[asyncio.Task]: The task, or None if one is already running for the thread
+    """
+    thread_id = config["configurable"]["thread_id"]
+    if thread_id in _summaries:
+        return None
+
+    async def run():
+        try:
+            await summarize_conversation(agent, config)
+        except Exception:
+            logger.exception(f"[Summary] Failed for thread {thread_id}.")
+        finally:
+            _summaries.pop(thread_id, None)
+
+    task = _summaries[thread_id] = asyncio.create_task(run())
+    return task
+
+
+async def wait_for_summary(thread_id: str) -> None:
+    """
+    Wait for the thread's in-flight summary, if any, before starting a new turn.
+
+    The summary rewrites the thread's messages from the state it read, so a turn
+    running alongside it could lose its messages or be summarised twice.
+
+    Args:
+        thread_id (str): Conversation thread
+    """
+    task = _summaries.get(thread_id)
+    if task is not None:
+        # asyncio.wait, unlike await, leaves the task running if this request is cancelled.
+        await asyncio.wait([task])
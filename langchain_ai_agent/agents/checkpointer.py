@@ -0,0 +1,569 @@
+# langchain_ai_agent/agents/checkpointer.py
+'''
+Durable LangGraph checkpointer for the chat agent.
+
+Checkpoints live in SQLite, so conversations survive restarts and are shared
+by every uvicorn worker on the host. Channel values are only written when
+their version changes, and message lists are stored as references into a
+per-thread, content-addressed message table: each message is written once,
+not once per checkpoint. The latest checkpoint of recently active threads is
+kept in an in-memory LRU with an idle TTL, so memory is bounded by active
+sessions and the hot path (one read per turn) skips the database join. Only
+the latest checkpoints of each thread are kept on disk; older ones are pruned
+together with their writes, blobs and messages no longer referenced.
+'''
+
+import os
+import json
+import asyncio
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+CHAT_CHECKPOINTER = os.getenv("CHAT_CHECKPOINTER", "sqlite")
+CHAT_CHECKPOINT_PATH = os.getenv("CHAT_CHECKPOINT_PATH", "chat_state/checkpoints.db")
+CHAT_CACHE_THREADS = int(os.getenv("CHAT_CACHE_THREADS", "1000"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "1800"))
+CHAT_KEEP_CHECKPOINTS = int(os.getenv("CHAT_KEEP_CHECKPOINTS", "20"))
+
+# Serialised type tag for a message list stored as references.
+_MESSAGE_REFS = "message_refs"
+
+Typed = Tuple[str, bytes]
+
+
+class _Latest:
+    """
+    Serialised latest checkpoint of a (thread, namespace), as cached in memory.
+    """
+    __slots__ = ("checkpoint_id", "parent_id", "checkpoint", "metadata", "values", "writes", "messages", "touched")
+
+    def __init__(self, checkpoint_id, parent_id, checkpoint, metadata, values, writes, messages):
+        self.checkpoint_id: str = checkpoint_id
+        self.parent_id: Optional[str] = parent_id
+        self.checkpoint: Typed = checkpoint
+        self.metadata: Typed = metadata
+        self.values: Dict[str, Typed] = values
+        self.writes: Dict[Tuple[str, int], Tuple[str, str, Typed, str]] = writes
+        # Serialised messages referenced by `values`, by digest.
+        self.messages: Dict[str, Typed] = messages
+        self.touched = time.monotonic()
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpoint saver on SQLite with an LRU/TTL cache of active threads.
+    """
+
+    def __init__(
+        self,
+        database_path: str = CHAT_CHECKPOINT_PATH,
+        max_cached_threads: int = CHAT_CACHE_THREADS,
+        cache_ttl: float = CHAT_CACHE_TTL,
+        keep_checkpoints: int = CHAT_KEEP_CHECKPOINTS
+    ):
+        """
+        Args:
+            database_path (str): SQLite file, created if missing
+            max_cached_threads (int): Threads whose latest checkpoint is kept in memory
+            cache_ttl (float): Seconds of inactivity after which a thread leaves the cache
+            keep_checkpoints (int): Checkpoints kept per thread and namespace; 0 keeps all
+        """
+        super().__init__()
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_cached_threads = max_cached_threads
+        self.cache_ttl = cache_ttl
+        self.keep_checkpoints = keep_checkpoints
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], _Latest]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "pruned": 0, "pruned_writes": 0}
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT,
+                blob BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT,
+                type TEXT,
+                value BLOB,
+                task_path TEXT,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                thread_id TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                type TEXT,
+                blob BLOB,
+                PRIMARY KEY (thread_id, digest)
+            );
+            """
+        )
+        self._conn.commit()
+
+    # ---------- serialisation ----------
+
+    def _dump_value(self, thread_id: str, value: Any, messages: Dict[str, Typed]) -> Typed:
+        # Caller holds the lock. Serialised messages are collected into `messages`.
+        if isinstance(value, list) and value and all(isinstance(m, BaseMessage) for m in value):
+            digests, rows = [], []
+            for message in value:
+                typed = self.serde.dumps_typed(message)
+                digest = hashlib.sha256(typed[0].encode("utf-8") + typed[1]).hexdigest()
+                digests.append(digest)
+                if digest not in messages:
+                    messages[digest] = typed
+                    rows.append((thread_id, digest, typed[0], typed[1]))
+            self._conn.executemany("INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?)", rows)
+            return _MESSAGE_REFS, json.dumps(digests).encode("utf-8")
+        return self.serde.dumps_typed(value)
+
+    def _load_messages(self, thread_id: str, values: Dict[str, Typed]) -> Dict[str, Typed]:
+        # Caller holds the lock.
+        digests = {d for typed in values.values() if typed[0] == _MESSAGE_REFS for d in json.loads(typed[1])}
+        if not digests:
+            return {}
+        rows = self._conn.execute(
+            f"SELECT digest, type, blob FROM messages WHERE thread_id = ? AND digest IN ({','.join('?' * len(digests))})",
+            (thread_id, *digests)
+        ).fetchall()
+        return {digest: (type_, blob) for digest, type_, blob in rows}
+
+    def _load_value(self, typed: Typed, messages: Dict[str, Typed]) -> Any:
+        if typed[0] != _MESSAGE_REFS:
+            return self.serde.loads_typed(typed)
+        return [self.serde.loads_typed(messages[digest]) for digest in json.loads(typed[1])]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, latest: _Latest) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed(latest.checkpoint)
+        values = {
+            channel: self._load_value(typed, latest.messages)
+            for channel, typed in latest.values.items() if typed[0] != "empty"
+        }
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": latest.checkpoint_id
+            }},
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed(latest.metadata),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": latest.parent_id
+                }}
+                if latest.parent_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(value))
+                for task_id, channel, value, _ in latest.writes.values()
+            ],
+        )
+
+    # ---------- storage ----------
+
+    def _read(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[_Latest]:
+        # Caller holds the lock.
+        query = (
+            "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        if checkpoint_id:
+            row = self._conn.execute(query + " AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+        else:
+            row = self._conn.execute(
+                query + " ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)
+            ).fetchone()
+        if row is None:
+            return None
+        checkpoint_id, parent_id, type_, blob, metadata_type, metadata = row
+        versions = self.serde.loads_typed((type_, blob))["channel_versions"]
+        values = {}
+        for channel, version in versions.items():
+            found = self._conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))
+            ).fetchone()
+            if found is not None:
+                values[channel] = (found[0], found[1])
+        writes = {
+            (task_id, idx): (task_id, channel, (w_type, value), task_path)
+            for task_id, idx, channel, w_type, value, task_path in self._conn.execute(
+                "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id)
+            )
+        }
+        return _Latest(
+            checkpoint_id, parent_id, (type_, blob), (metadata_type, metadata), values, writes,
+            self._load_messages(thread_id, values)
+        )
+
+    def _is_current(self, thread_id: str, checkpoint_ns: str, cached: _Latest) -> bool:
+        # Another worker may have advanced the thread; one indexed lookup keeps the cache honest.
+        row = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)
+        ).fetchone()
+        if row is None or row[0] != cached.checkpoint_id:
+            return False
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, cached.checkpoint_id)
+        ).fetchone()[0]
+        return count == len(cached.writes)
+
+    def _remember(self, key: Tuple[str, str], latest: _Latest) -> None:
+        # Caller holds the lock.
+        self._cache[key] = latest
+        self._cache.move_to_end(key)
+        now = time.monotonic()
+        while self._cache:
+            oldest_key, oldest = next(iter(self._cache.items()))
+            if len(self._cache) <= self.max_cached_threads and now - oldest.touched <= self.cache_ttl:
+                break
+            del self._cache[oldest_key]
+            self._stats["evictions"] += 1
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        # Caller holds the lock and commits.
+        if self.keep_checkpoints <= 0:
+            return
+        row = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?", (thread_id, checkpoint_ns, self.keep_checkpoints)
+        ).fetchone()
+        if row is None:
+            return
+        # "pruned" counts checkpoints; their pending writes are counted separately.
+        for table, stat in (("writes", "pruned_writes"), ("checkpoints", "pruned")):
+            self._stats[stat] += self._conn.execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id <= ?",
+                (thread_id, checkpoint_ns, row[0])
+            ).rowcount
+
+        # Blobs are shared across checkpoints: keep the versions a remaining checkpoint points at.
+        referenced = set()
+        for type_, blob in self._conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns)
+        ):
+            referenced.update(
+                (channel, str(version))
+                for channel, version in self.serde.loads_typed((type_, blob))["channel_versions"].items()
+            )
+        stale = [
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in self._conn.execute(
+                "SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns)
+            )
+            if (channel, version) not in referenced
+        ]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", stale
+        )
+        if not stale:
+            return
+
+        # Messages are per thread, so a digest stays while any namespace still refers to it.
+        digests = {
+            digest
+            for (blob,) in self._conn.execute(
+                "SELECT blob FROM blobs WHERE thread_id = ? AND type = ?", (thread_id, _MESSAGE_REFS)
+            )
+            for digest in json.loads(blob)
+        }
+        orphans = [
+            (thread_id, digest)
+            for (digest,) in self._conn.execute("SELECT digest FROM messages WHERE thread_id = ?", (thread_id,))
+            if digest not in digests
+        ]
+        self._conn.executemany("DELETE FROM messages WHERE thread_id = ? AND digest = ?", orphans)
+        if orphans:
+            # put() skips messages it believes are stored; forget the deleted ones.
+            for key, latest in self._cache.items():
+                if key[0] == thread_id:
+                    latest.messages = {d: typed for d, typed in latest.messages.items() if d in digests}
+
+    # ---------- BaseCheckpointSaver ----------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        key = (thread_id, checkpoint_ns)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and checkpoint_id in (None, cached.checkpoint_id) \
+                    and time.monotonic() - cached.touched <= self.cache_ttl \
+                    and self._is_current(thread_id, checkpoint_ns, cached):
+                self._stats["hits"] += 1
+                cached.touched = time.monotonic()
+                self._cache.move_to_end(key)
+                latest = cached
+            else:
+                self._stats["misses"] += 1
+                latest = self._read(thread_id, checkpoint_ns, checkpoint_id)
+                if latest is None:
+                    self._cache.pop(key, None)
+                    return None
+                if checkpoint_id is None:
+                    self._remember(key, latest)
+        return self._tuple(thread_id, checkpoint_ns, latest)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            keys = self._conn.execute(
+                f"SELECT thread_id, checkpoint_ns, checkpoint_id FROM checkpoints {where} "
+                "ORDER BY checkpoint_id DESC", params
+            ).fetchall()
+
+        for thread_id, checkpoint_ns, checkpoint_id in keys:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                latest = self._read(thread_id, checkpoint_ns, checkpoint_id)
+            if latest is None:
+                continue
+            if filter:
+                metadata = self.serde.loads_typed(latest.metadata)
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._tuple(thread_id, checkpoint_ns, latest)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_id = config["configurable"].get("checkpoint_id")
+        c = checkpoint.copy()
+        values: Dict[str, Any] = c.pop("channel_values")
+
+        with self._lock:
+            key = (thread_id, checkpoint_ns)
+            parent = self._cache.get(key)
+            if parent is not None and parent.checkpoint_id != parent_id:
+                parent = None
+            # Messages already stored for this thread are not written again.
+            messages = dict(parent.messages) if parent is not None else {}
+            changed = {
+                channel: self._dump_value(thread_id, values[channel], messages) if channel in values else ("empty", b"")
+                for channel in new_versions
+            }
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (thread_id, checkpoint_ns, channel, str(version), *changed[channel])
+                    for channel, version in new_versions.items()
+                ]
+            )
+            typed = self.serde.dumps_typed(c)
+            typed_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], parent_id, *typed, *typed_metadata)
+            )
+            self._prune(thread_id, checkpoint_ns)
+            self._conn.commit()
+
+            # Unchanged channels carry over from the cached parent (a first checkpoint has none).
+            if parent is not None:
+                inherited = parent.values
+            else:
+                inherited = {} if parent_id is None else None
+            carried = {
+                channel: inherited[channel]
+                for channel in c["channel_versions"] if channel not in changed and channel in (inherited or {})
+            }
+            if inherited is not None and len(carried) + len(changed) >= len(c["channel_versions"]):
+                latest_values = {**carried, **changed}
+                # Keep only what this checkpoint references: _prune never deletes
+                # those rows, and the map stays the size of the conversation.
+                referenced = {
+                    digest for typed_value in latest_values.values() if typed_value[0] == _MESSAGE_REFS
+                    for digest in json.loads(typed_value[1])
+                }
+                self._remember(key, _Latest(
+                    checkpoint["id"], parent_id, typed, typed_metadata, latest_values, {},
+                    {digest: messages[digest] for digest in referenced}
+                ))
+            else:
+                self._cache.pop(key, None)
+
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            rows.append((WRITES_IDX_MAP.get(channel, idx), channel, self.serde.dumps_typed(value)))
+
+        with self._lock:
+            cached = self._cache.get((thread_id, checkpoint_ns))
+            if cached is not None and cached.checkpoint_id != checkpoint_id:
+                cached = None
+            for idx, channel, typed in rows:
+                # Regular writes are idempotent per (task, idx); special channels are overwritten.
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                inserted = self._conn.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, *typed, task_path)
+                ).rowcount
+                if cached is not None and inserted:
+                    cached.writes[(task_id, idx)] = (task_id, channel, typed, task_path)
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for table in ("checkpoints", "blobs", "writes", "messages"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+            for key in [key for key in self._cache if key[0] == thread_id]:
+                del self._cache[key]
+
+    # SQLite calls block, so the async API runs them in worker threads, off the event loop.
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = self.list(config, filter=filter, before=before, limit=limit)
+        while (item := await asyncio.to_thread(next, items, None)) is not None:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Zero-padded so versions sort as text, matching MemorySaver's scheme.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self._stats, "cached_threads": len(self._cache), "max_cached_threads": self.max_cached_threads}
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """
+    Checkpointer selected by CHAT_CHECKPOINTER: "sqlite" (default) or "memory".
+    """
+    if CHAT_CHECKPOINTER == "memory":
+        return MemorySaver()
+    return SQLiteCheckpointer(CHAT_CHECKPOINT_PATH)
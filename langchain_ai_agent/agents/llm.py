@@ -0,0 +1,308 @@
+# langchain_ai_agent/agents/llm.py
+'''
+Shared construction of the Gemini chat models used by the agents package.
+
+Every model is created with a persistent LLM cache: completions are stored in
+SQLite keyed by a hash of the model configuration (model name, temperature,
+output limit, ...) and the fully rendered prompt. Re-running a pipeline or
+retrying an unchanged document is answered from disk without a Vertex AI call.
+
+Calls that miss the cache go through the process-wide LLM scheduler, which
+applies rate limits, adaptive concurrency and priorities, and retries 429s.
+'''
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from google.api_core.exceptions import TooManyRequests
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_google_vertexai import ChatVertexAI
+
+from langchain_ai_agent.agents.llm_scheduler import llm_scheduler
+from langchain_ai_agent.retriever.context_packer import estimate_tokens
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_MODEL_NAME = "gemini-2.0-flash-lite"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.db")
+# 0 disables the cache.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "50000"))
+# Attempts per call when Vertex AI answers 429; retries are paced by the scheduler.
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "6"))
+
+
+class BoundedSQLiteCache(BaseCache):
+    """
+    LangChain LLM cache in SQLite with least-recently-used eviction.
+    """
+
+    def __init__(self, database_path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_SIZE):
+        """
+        Args:
+            database_path (str): SQLite file, created if missing
+            max_entries (int): Completions kept; the least recently used are evicted
+        """
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions(last_used);
+            """
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        logger.info("[LLMCache] Hit.")
+        return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            value, now = dumps(return_val), time.time()
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO completions VALUES (?, ?, ?)", (key, value, now)
+            ).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                self._conn.execute(
+                    "UPDATE completions SET value = ?, last_used = ? WHERE key = ?", (value, now, key)
+                )
+            if self._count > self.max_entries:
+                # Evict a few percent at once so eviction is not paid on every insert.
+                excess = self._count - self.max_entries + self.max_entries // 20
+                self._conn.execute(
+                    "DELETE FROM completions WHERE key IN "
+                    "(SELECT key FROM completions ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            self._conn.commit()
+
+    def delete(self, prompt: str, llm_string: str) -> None:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            self._count -= self._conn.execute("DELETE FROM completions WHERE key = ?", (key,)).rowcount
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+            self._count = 0
+
+    def size(self) -> int:
+        # Not __len__: LangChain tests the cache object for truthiness.
+        with self._lock:
+            return self._count
+
+
+_llm_cache: Optional[BoundedSQLiteCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[BoundedSQLiteCache]:
+    """
+    Process-wide LLM cache, or None when disabled with LLM_CACHE_SIZE=0.
+    """
+    global _llm_cache
+    if LLM_CACHE_SIZE <= 0:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = BoundedSQLiteCache(LLM_CACHE_PATH, LLM_CACHE_SIZE)
+        return _llm_cache
+
+
+def uncache_on_failure(llm: BaseChatModel, parse: Runnable) -> Runnable:
+    """
+    `llm | parse`, evicting the cached completion when `parse` rejects it, so a
+    malformed answer is not replayed from the cache on every retry.
+
+    Args:
+        llm (BaseChatModel): Model built with `get_llm`
+        parse (Runnable): Output parsing and validation steps
+
+    Returns:
+        Runnable: Takes the rendered prompt, returns the parsed output
+    """
+    chain = llm | parse
+
+    def evict(prompt_value: PromptValue) -> None:
+        # Same key BaseChatModel used when it stored the completion.
+        if isinstance(llm.cache, BoundedSQLiteCache):
+            llm.cache.delete(dumps(prompt_value.to_messages()), llm._get_llm_string())
+            logger.warning("[LLMCache] Evicted a completion that failed validation.")
+
+    def run(prompt_value: PromptValue, config: RunnableConfig) -> Any:
+        try:
+            return chain.invoke(prompt_value, config=config)
+        except Exception:
+            evict(prompt_value)
+            raise
+
+    async def arun(prompt_value: PromptValue, config: RunnableConfig) -> Any:
+        try:
+            return await chain.ainvoke(prompt_value, config=config)
+        except Exception:
+            evict(prompt_value)
+            raise
+
+    return RunnableLambda(run, afunc=arun, name="uncache_on_failure")
+
+
+def _used_tokens(result: ChatResult) -> Optional[float]:
+    usage = getattr(result.generations[0].message, "usage_metadata", None) if result.generations else None
+    return usage.get("total_tokens") if usage else None
+
+
+class ScheduledChatVertexAI(ChatVertexAI):
+    """
+    ChatVertexAI whose requests are admitted by `llm_scheduler`. The Gemini
+    request methods are wrapped (not _generate/_stream, which call each other
+    when streaming), so every API request takes exactly one slot.
+    """
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> float:
+        text = "".join(m.content if isinstance(m.content, str) else str(m.content) for m in messages)
+        return estimate_tokens(text) + (self.max_output_tokens or 0)
+
+    def _generate_gemini(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        estimate = self._estimate_tokens(messages)
+        for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+            llm_scheduler.acquire_sync(self.model_name, estimate)
+            started = time.monotonic()
+            try:
+                result = super()._generate_gemini(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except TooManyRequests:
+                llm_scheduler.release(self.model_name, estimated_tokens=estimate, throttled=True)
+                if attempt == LLM_MAX_ATTEMPTS:
+                    raise
+                continue
+            except BaseException:
+                llm_scheduler.release(self.model_name, estimated_tokens=estimate)
+                raise
+            llm_scheduler.release(
+                self.model_name, time.monotonic() - started, estimate, _used_tokens(result)
+            )
+            return result
+
+    async def _agenerate_gemini(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        estimate = self._estimate_tokens(messages)
+        for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+            await llm_scheduler.acquire(self.model_name, estimate)
+            started = time.monotonic()
+            try:
+                result = await super()._agenerate_gemini(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except TooManyRequests:
+                llm_scheduler.release(self.model_name, estimated_tokens=estimate, throttled=True)
+                if attempt == LLM_MAX_ATTEMPTS:
+                    raise
+                continue
+            except BaseException:
+                llm_scheduler.release(self.model_name, estimated_tokens=estimate)
+                raise
+            llm_scheduler.release(
+                self.model_name, time.monotonic() - started, estimate, _used_tokens(result)
+            )
+            return result
+
+    def _stream_gemini(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        # A stream holds its slot until the last chunk; only a 429 before the first chunk is retried.
+        estimate = self._estimate_tokens(messages)
+        for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+            llm_scheduler.acquire_sync(self.model_name, estimate)
+            started, streamed, outcome = time.monotonic(), False, {}
+            try:
+                for chunk in super()._stream_gemini(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    streamed = True
+                    yield chunk
+                outcome = {"latency": time.monotonic() - started}
+                return
+            except TooManyRequests:
+                outcome = {"throttled": True}
+                if streamed or attempt == LLM_MAX_ATTEMPTS:
+                    raise
+            finally:
+                llm_scheduler.release(self.model_name, estimated_tokens=estimate, **outcome)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        estimate = self._estimate_tokens(messages)
+        for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+            await llm_scheduler.acquire(self.model_name, estimate)
+            started, streamed, outcome = time.monotonic(), False, {}
+            try:
+                async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    streamed = True
+                    yield chunk
+                outcome = {"latency": time.monotonic() - started}
+                return
+            except TooManyRequests:
+                outcome = {"throttled": True}
+                if streamed or attempt == LLM_MAX_ATTEMPTS:
+                    raise
+            finally:
+                llm_scheduler.release(self.model_name, estimated_tokens=estimate, **outcome)
+
+
+def get_llm(
+    model_name: str = DEFAULT_MODEL_NAME,
+    temperature: float = 0.3,
+    max_output_tokens: int = 1024,
+    **kwargs: Any
+) -> ChatVertexAI:
+    """
+    Build a ChatVertexAI model backed by the shared LLM cache and scheduler.
+
+    Args:
+        model_name (str): Vertex AI model
+        temperature (float): Sampling temperature
+        max_output_tokens (int): Completion limit
+        **kwargs: Passed to ChatVertexAI (e.g. location, project)
+
+    Returns:
+        ChatVertexAI: Configured chat model
+    """
+    cache = get_llm_cache()
+    # A single attempt per request: retries go back through the scheduler instead.
+    kwargs.setdefault("max_retries", 1)
+    return ScheduledChatVertexAI(
+        model_name=model_name,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        cache=cache if cache is not None else False,
+        **kwargs
+    )
@@ -0,0 +1,325 @@
+# langchain_ai_agent/agents/llm_scheduler.py
+'''
+Process-wide admission control for LLM calls.
+
+Every model gets a lane with request and token buckets (per-minute quotas) and
+an adaptive concurrency limit: it grows additively while latency stays near
+the observed baseline and is halved on a 429, which also pauses the lane with
+exponential backoff so queued calls do not turn into a retry storm. Waiting
+calls are admitted by priority class, so interactive requests go ahead of
+batch pipeline work. Works for async callers on any event loop and for sync
+callers on any thread.
+'''
+
+import os
+import time
+import heapq
+import random
+import asyncio
+import logging
+import threading
+import itertools
+from enum import IntEnum
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterable, AsyncIterator, Dict, Optional, TypeVar
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "200"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_INITIAL_CONCURRENCY = float(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+LLM_MAX_CONCURRENCY = float(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+# Bucket capacity in seconds of quota: how large a burst may be.
+BURST_SECONDS = 10.0
+# Latency above this multiple of the baseline counts as congestion.
+LATENCY_TOLERANCE = 2.0
+MAX_BACKOFF_SECONDS = 30.0
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """
+    Run LLM calls made in this context (and tasks it spawns) at `priority`.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+T = TypeVar("T")
+
+
+async def iterate_at_priority(items: AsyncIterable[T], priority: Priority) -> AsyncIterator[T]:
+    """
+    Consume `items` in a separate task whose LLM calls run at `priority`.
+
+    `llm_priority` must not wrap the `yield`s of an async generator: the
+    priority would leak into the consumer while the generator is suspended,
+    and the context variable could be reset from another context when the
+    generator is closed. The producer task owns its context instead.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    finished = object()
+
+    async def produce():
+        with llm_priority(priority):
+            try:
+                async for item in items:
+                    await queue.put((item, None))
+            except Exception as e:
+                await queue.put((finished, e))
+                return
+        await queue.put((finished, None))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is finished:
+                return
+            yield item
+    finally:
+        producer.cancel()
+
+
+class _Waiter:
+    __slots__ = ("tokens", "granted", "event", "loop", "future")
+
+    def __init__(self, tokens: float, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.tokens = tokens
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class _Lane:
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, concurrency: float, max_concurrency: float):
+        self.request_rate = requests_per_minute / 60
+        self.token_rate = tokens_per_minute / 60
+        self.request_capacity = max(self.request_rate * BURST_SECONDS, 1.0)
+        self.token_capacity = max(self.token_rate * BURST_SECONDS, 1.0)
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.refilled_at = time.monotonic()
+
+        self.limit = concurrency
+        self.max_limit = max_concurrency
+        self.in_flight = 0
+        self.waiters = []
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+        self.baseline: Optional[float] = None
+        self.latency_ewma: Optional[float] = None
+        self.timer: Optional[threading.Timer] = None
+        self.stats = {"admitted": 0, "throttled": 0, "max_queue": 0}
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.refilled_at
+        self.refilled_at = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_rate)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+
+
+class LLMScheduler:
+    """
+    Thread-safe scheduler shared by every model built with `get_llm`.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        initial_concurrency: float = LLM_INITIAL_CONCURRENCY,
+        max_concurrency: float = LLM_MAX_CONCURRENCY
+    ):
+        """
+        Args:
+            requests_per_minute (float): Request quota per model
+            tokens_per_minute (float): Token quota per model (prompt + completion)
+            initial_concurrency (float): Starting concurrency limit per model
+            max_concurrency (float): Upper bound for the adaptive limit
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._lanes: Dict[str, _Lane] = {}
+        self._seq = itertools.count()
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _Lane(
+                self.requests_per_minute, self.tokens_per_minute, self.initial_concurrency, self.max_concurrency
+            )
+        return lane
+
+    def _dispatch(self, lane: _Lane) -> None:
+        # Caller holds the lock.
+        now = time.monotonic()
+        lane.refill(now)
+        while lane.waiters and lane.in_flight < max(int(lane.limit), 1):
+            waiter = lane.waiters[0][2]
+            needed = min(waiter.tokens, lane.token_capacity)
+            if now < lane.blocked_until:
+                delay = lane.blocked_until - now
+            elif lane.requests < 1 or lane.tokens < needed:
+                delay = max(
+                    (1 - lane.requests) / lane.request_rate if lane.requests < 1 else 0.0,
+                    (needed - lane.tokens) / lane.token_rate if lane.tokens < needed else 0.0,
+                )
+            else:
+                heapq.heappop(lane.waiters)
+                lane.requests -= 1
+                lane.tokens -= needed
+                lane.in_flight += 1
+                lane.stats["admitted"] += 1
+                waiter.grant()
+                continue
+            self._wake_after(lane, delay)
+            break
+
+    def _wake_after(self, lane: _Lane, delay: float) -> None:
+        if lane.timer is not None and lane.timer.is_alive():
+            return
+
+        def wake():
+            with self._lock:
+                lane.timer = None
+                self._dispatch(lane)
+
+        lane.timer = threading.Timer(max(delay, 0.001), wake)
+        lane.timer.daemon = True
+        lane.timer.start()
+
+    def _enqueue(self, model: str, waiter: _Waiter, priority: Optional[Priority]) -> _Lane:
+        priority = _priority.get() if priority is None else priority
+        with self._lock:
+            lane = self._lane(model)
+            heapq.heappush(lane.waiters, (int(priority), next(self._seq), waiter))
+            lane.stats["max_queue"] = max(lane.stats["max_queue"], len(lane.waiters))
+            self._dispatch(lane)
+        return lane
+
+    def _withdraw(self, lane: _Lane, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted:
+                lane.in_flight -= 1
+            else:
+                lane.waiters = [entry for entry in lane.waiters if entry[2] is not waiter]
+                heapq.heapify(lane.waiters)
+            self._dispatch(lane)
+
+    async def acquire(self, model: str, tokens: float, priority: Optional[Priority] = None) -> None:
+        """
+        Wait for a slot on `model`'s lane. Pair with `release`.
+
+        Args:
+            model (str): Model name (one lane per model)
+            tokens (float): Estimated prompt + completion tokens
+            priority (Optional[Priority]): Defaults to the context's `llm_priority`
+        """
+        waiter = _Waiter(tokens, asyncio.get_running_loop())
+        lane = self._enqueue(model, waiter, priority)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._withdraw(lane, waiter)
+            raise
+
+    def acquire_sync(self, model: str, tokens: float, priority: Optional[Priority] = None) -> None:
+        """
+        Blocking variant of `acquire` for sync callers.
+        """
+        waiter = _Waiter(tokens)
+        lane = self._enqueue(model, waiter, priority)
+        try:
+            waiter.event.wait()
+        except BaseException:
+            self._withdraw(lane, waiter)
+            raise
+
+    def release(
+        self,
+        model: str,
+        latency: Optional[float] = None,
+        estimated_tokens: float = 0.0,
+        used_tokens: Optional[float] = None,
+        throttled: bool = False
+    ) -> None:
+        """
+        Return a slot and feed the outcome back into the lane.
+
+        Args:
+            model (str): Model name
+            latency (Optional[float]): Seconds the call took; None if it failed otherwise
+            estimated_tokens (float): Tokens reserved at `acquire`
+            used_tokens (Optional[float]): Actual usage, corrects the token bucket
+            throttled (bool): The call was rejected with a rate-limit error
+        """
+        with self._lock:
+            lane = self._lane(model)
+            lane.in_flight -= 1
+            if used_tokens is not None:
+                lane.tokens -= used_tokens - min(estimated_tokens, lane.token_capacity)
+            if throttled:
+                lane.stats["throttled"] += 1
+                lane.limit = max(lane.limit / 2, 1.0)
+                lane.backoff = min(max(lane.backoff * 2, 1.0), MAX_BACKOFF_SECONDS)
+                lane.blocked_until = time.monotonic() + lane.backoff * random.uniform(0.5, 1.0)
+                logger.warning(
+                    f"[LLMScheduler] {model} throttled; concurrency {lane.limit:.1f}, pausing {lane.backoff:.1f}s."
+                )
+            elif latency is not None:
+                lane.backoff = 0.0
+                lane.latency_ewma = latency if lane.latency_ewma is None else 0.8 * lane.latency_ewma + 0.2 * latency
+                # The baseline tracks the fastest recent calls and slowly forgets them.
+                lane.baseline = latency if lane.baseline is None else min(latency, lane.baseline * 1.01)
+                if lane.latency_ewma > LATENCY_TOLERANCE * lane.baseline:
+                    lane.limit = max(lane.limit * 0.9, 1.0)
+                else:
+                    lane.limit = min(lane.limit + 1 / lane.limit, lane.max_limit)
+            self._dispatch(lane)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                model: {
+                    **lane.stats,
+                    "concurrency_limit": round(lane.limit, 2),
+                    "in_flight": lane.in_flight,
+                    "queued": len(lane.waiters),
+                    "latency_ewma_ms": round(lane.latency_ewma * 1000, 1) if lane.latency_ewma else None,
+                    "baseline_ms": round(lane.baseline * 1000, 1) if lane.baseline else None,
+                    "paused_for_s": round(max(lane.blocked_until - time.monotonic(), 0.0), 2),
+                }
+                for model, lane in self._lanes.items()
+            }
+
+
+# Shared by every model built with get_llm
+llm_scheduler = LLMScheduler()
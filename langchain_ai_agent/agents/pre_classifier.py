@@ -0,0 +1,196 @@
+# langchain_ai_agent/agents/pre_classifier.py
+'''
+Local fast path for document routing.
+
+A nearest-centroid classifier over the input embeddings (already computed for
+memory recall) is trained from the labelled history in memory_log.jsonl and
+kept up to date with every label the LLM produces. When it is confident the
+agent routes directly to the tool and skips the classification round trip;
+otherwise it falls back to the LLM.
+'''
+
+import os
+import json
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+LABELS = ("meeting_note", "contract", "support_ticket", "knowledge_base")
+PRECLASSIFIER_THRESHOLD = float(os.getenv("PRECLASSIFIER_THRESHOLD", "0.9"))
+# Examples needed for every label before the fast path is used at all.
+PRECLASSIFIER_MIN_EXAMPLES = int(os.getenv("PRECLASSIFIER_MIN_EXAMPLES", "5"))
+# Most recent log records used for training.
+PRECLASSIFIER_MAX_HISTORY = int(os.getenv("PRECLASSIFIER_MAX_HISTORY", "5000"))
+# Sharpness of the softmax over cosine similarities; centroid similarities of
+# sentence embeddings differ by hundredths, so they need a large scale.
+SOFTMAX_SCALE = 50.0
+
+
+def read_labelled_history(log_path: Path, max_records: int = PRECLASSIFIER_MAX_HISTORY) -> Tuple[List[str], List[str]]:
+    """
+    Texts and task labels of successful experiences in a memory log. Only LLM
+    labels are used, so the classifier never trains on its own predictions.
+
+    Args:
+        log_path (Path): memory_log.jsonl written by MemoryStore
+        max_records (int): Keep only the most recent records
+
+    Returns:
+        Tuple[List[str], List[str]]: Input texts and their labels
+    """
+    records = deque(maxlen=max_records)
+    if not Path(log_path).exists():
+        return [], []
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            output = record.get("output")
+            if record.get("task") not in LABELS or not isinstance(output, dict) or "error" in output:
+                continue
+            if (record.get("meta") or {}).get("routed_by") == "pre_classifier":
+                continue
+            records.append((record["input_text"], record["task"]))
+    return [text for text, _ in records], [label for _, label in records]
+
+
+class CentroidClassifier:
+    """
+    Thread-safe nearest-centroid classifier over unit-normalised embeddings.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str] = LABELS,
+        threshold: float = PRECLASSIFIER_THRESHOLD,
+        min_examples: int = PRECLASSIFIER_MIN_EXAMPLES,
+        scale: float = SOFTMAX_SCALE
+    ):
+        """
+        Args:
+            labels (Sequence[str]): Routing labels
+            threshold (float): Minimum confidence for routing without the LLM
+            min_examples (int): Examples required per label before predicting
+            scale (float): Softmax scale applied to cosine similarities
+        """
+        self.labels = list(labels)
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.scale = scale
+        self._lock = threading.Lock()
+        self._sums: Optional[np.ndarray] = None
+        self._counts = np.zeros(len(self.labels), dtype=np.int64)
+        self._centroids: Optional[np.ndarray] = None
+        self._stats = {"local": 0, "fallback": 0}
+
+    @staticmethod
+    def _unit(vectors) -> np.ndarray:
+        matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def add(self, vectors, labels: Sequence[str]) -> None:
+        """
+        Add labelled examples; unknown labels are ignored.
+        """
+        matrix = self._unit(vectors)
+        with self._lock:
+            if self._sums is None:
+                self._sums = np.zeros((len(self.labels), matrix.shape[1]), dtype=np.float64)
+            for vector, label in zip(matrix, labels):
+                if label in self.labels:
+                    i = self.labels.index(label)
+                    self._sums[i] += vector
+                    self._counts[i] += 1
+            self._centroids = None
+
+    def fit(self, vectors, labels: Sequence[str]) -> "CentroidClassifier":
+        with self._lock:
+            self._sums = None
+            self._counts[:] = 0
+            self._centroids = None
+        if len(labels):
+            self.add(vectors, labels)
+        return self
+
+    def fit_from_log(self, log_path: Path, embeddings: Embeddings) -> int:
+        """
+        Train on the labelled history of a memory log.
+
+        Args:
+            log_path (Path): memory_log.jsonl
+            embeddings (Embeddings): The model used for request embeddings
+
+        Returns:
+            int: Number of training examples
+        """
+        texts, labels = read_labelled_history(log_path)
+        self.fit(embeddings.embed_documents(texts) if texts else [], labels)
+        logger.info(
+            f"[PreClassifier] Trained on {len(texts)} examples "
+            f"({dict(zip(self.labels, self._counts.tolist()))}); ready={self.ready}."
+        )
+        return len(texts)
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._counts.min() >= self.min_examples)
+
+    def predict_proba(self, vectors) -> np.ndarray:
+        """
+        Label probabilities, one row per vector, columns in `labels` order.
+        """
+        with self._lock:
+            if self._centroids is None:
+                self._centroids = self._unit(self._sums).astype(np.float32)
+            centroids = self._centroids
+        logits = self.scale * (self._unit(vectors) @ centroids.T)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def classify(self, vector) -> Optional[Tuple[str, float]]:
+        """
+        Route locally if confident.
+
+        Args:
+            vector: Input embedding
+
+        Returns:
+            Optional[Tuple[str, float]]: (label, confidence), or None to fall back to the LLM
+        """
+        if not self.ready:
+            self._stats["fallback"] += 1
+            return None
+        probs = self.predict_proba(vector)[0]
+        best = int(np.argmax(probs))
+        if probs[best] < self.threshold:
+            self._stats["fallback"] += 1
+            return None
+        self._stats["local"] += 1
+        return self.labels[best], float(probs[best])
+
+    def stats(self) -> Dict:
+        routed = self._stats["local"] + self._stats["fallback"]
+        return {
+            **self._stats,
+            "local_rate": round(self._stats["local"] / routed, 4) if routed else 0.0,
+            "examples": dict(zip(self.labels, self._counts.tolist())),
+            "ready": self.ready,
+            "threshold": self.threshold,
+        }
+
+
+# Shared by /run-agent; trained at API startup
+pre_classifier = CentroidClassifier()
@@ -0,0 +1,204 @@
+# langchain_ai_agent/agents/response_cache.py
+'''
+In-process response cache for LLM-backed endpoints.
+
+Answers are stored per scope, e.g. ("query", persist_dir, index version,
+filters), and returned for an exact repeat of the input (normalised text hash)
+or for an input whose embedding is close enough to a cached one. A semantic
+hit also needs the same numbers and identifiers ("invoice 1042" vs "invoice
+1043", "Q2" vs "Q3"), which embeddings barely tell apart. Entries expire after
+a TTL and the cache is bounded with LRU eviction.
+'''
+
+import os
+import re
+import copy
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+DEFAULT_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+DEFAULT_SIMILARITY = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.97"))
+
+Scope = Tuple[Any, ...]
+
+
+# Tokens holding a digit (1042, Q2, INV-2023-001, v1.2) or written in capitals (ACME, EMEA).
+_IDENTIFIER = re.compile(r"\b(?:[\w./-]*\d[\w./-]*|[A-Z][A-Z0-9_-]+)\b")
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def _identifiers(text: str) -> FrozenSet[str]:
+    return frozenset(token.strip("./-").lower() for token in _IDENTIFIER.findall(text))
+
+
+class _Entry:
+    __slots__ = ("value", "vector", "identifiers", "expires_at")
+
+    def __init__(self, value: Any, vector: Optional[np.ndarray], identifiers: FrozenSet[str], expires_at: float):
+        self.value = value
+        self.vector = vector
+        self.identifiers = identifiers
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache with exact and embedding-similarity lookup.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        similarity_threshold: float = DEFAULT_SIMILARITY
+    ):
+        """
+        Args:
+            max_entries (int): Capacity across all scopes; 0 disables the cache
+            ttl_seconds (float): Lifetime of an entry
+            similarity_threshold (float): Minimum cosine similarity for a semantic hit
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Scope, str], _Entry]" = OrderedDict()
+        # Per-scope (keys, matrix) of unit vectors for semantic lookup, rebuilt after changes.
+        self._matrices: Dict[Scope, Tuple[List[Tuple[Scope, str]], np.ndarray]] = {}
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def _unit(embedding: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _drop(self, key: Tuple[Scope, str]) -> None:
+        entry = self._entries.pop(key)
+        if entry.vector is not None:
+            self._matrices.pop(key[0], None)
+
+    def _matrix(self, scope: Scope):
+        if scope not in self._matrices:
+            keys = [key for key, entry in self._entries.items() if key[0] == scope and entry.vector is not None]
+            matrix = np.stack([self._entries[key].vector for key in keys]) if keys else None
+            self._matrices[scope] = (keys, matrix)
+        return self._matrices[scope]
+
+    def _live(self, key: Tuple[Scope, str], now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._drop(key)
+            self._stats["expirations"] += 1
+            return None
+        return entry
+
+    def get(self, scope: Scope, text: str, embedding: Optional[Sequence[float]] = None) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            scope (Scope): Cache partition, e.g. ("query", persist_dir, version)
+            text (str): Request input
+            embedding (Optional[Sequence[float]]): Input embedding, enables similarity hits
+
+        Returns:
+            Optional[Any]: A copy of the cached response, or None
+        """
+        if self.max_entries <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            key = (scope, _text_hash(text))
+            entry = self._live(key, now)
+            if entry is not None:
+                self._stats["exact_hits"] += 1
+            else:
+                vector = self._unit(embedding)
+                if vector is not None:
+                    keys, matrix = self._matrix(scope)
+                    if matrix is not None:
+                        scores = matrix @ vector
+                        identifiers = _identifiers(text)
+                        # Best close entry asking about the same numbers and identifiers.
+                        for i in np.argsort(-scores):
+                            if scores[i] < self.similarity_threshold:
+                                break
+                            if self._entries[keys[i]].identifiers == identifiers:
+                                key = keys[i]
+                                entry = self._live(key, now)
+                                break
+                if entry is not None:
+                    self._stats["semantic_hits"] += 1
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry.value)
+
+    def put(self, scope: Scope, text: str, value: Any, embedding: Optional[Sequence[float]] = None) -> None:
+        """
+        Store a response; evicts the least recently used entries beyond capacity.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            key = (scope, _text_hash(text))
+            if key in self._entries:
+                self._drop(key)
+            vector = self._unit(embedding)
+            self._entries[key] = _Entry(
+                copy.deepcopy(value), vector, _identifiers(text), time.monotonic() + self.ttl_seconds
+            )
+            if vector is not None:
+                self._matrices.pop(scope, None)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, *prefix: Any) -> int:
+        """
+        Drop every entry whose scope starts with `prefix`, e.g. ("query", persist_dir)
+        after the namespace is re-ingested.
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0][:len(prefix)] == prefix]
+            for key in keys:
+                self._drop(key)
+        if keys:
+            logger.info(f"[ResponseCache] Invalidated {len(keys)} entries for {prefix}.")
+        return len(keys)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats["exact_hits"] + self._stats["semantic_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Shared by /api/query (exact and semantic hits) and /run-agent (exact hits only)
+response_cache = ResponseCache()
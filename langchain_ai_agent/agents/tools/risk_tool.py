@@ -5,7 +5,7 @@ from typing import Dict, Any, List
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_vertexai import ChatVertexAI
+from langchain_ai_agent.agents.llm import get_llm, uncache_on_failure
 
 # Logger setup
 logger = logging.getLogger(__name__)
@@ -31,8 +31,8 @@ Contract Text:
 """
 )
 
-# LLM: Gemini 1.5 Flash via Vertex AI
-llm = ChatVertexAI(
+# LLM: Gemini 2.0 Flash-Lite via Vertex AI
+llm = get_llm(
     model_name="gemini-2.0-flash-lite",
     temperature=0.3,
     max_output_tokens=1024,
@@ -60,7 +60,5 @@ risk_flagger_chain: Runnable = (
     {"text": lambda x: x["text"]}
     | RunnableLambda(_log_input)
     | RISK_PROMPT
-    | llm
-    | parser
-    | RunnableLambda(_validate_risk_output)
+    | uncache_on_failure(llm, parser | RunnableLambda(_validate_risk_output))
 )
@@ -1,41 +1,61 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pathlib import Path
+import asyncio
 import os
 
 from langchain_ai_agent.ingestion.reader import DocumentIngestor
-from langchain_ai_agent.retriever.vector_store import DocumentEmbedder
+from langchain_ai_agent.ingestion.manifest import sync_directory
+from langchain_ai_agent.retriever.registry import registry, get_embedder
+from langchain_ai_agent.agents.response_cache import response_cache
 
 router = APIRouter()
 
+
+def _sync_namespace(upload_dir: Path, persist_dir: str) -> Dict:
+    # One writer per namespace: concurrent uploads would interleave FAISS, log and manifest writes.
+    with registry.write_lock(persist_dir):
+        embedder = get_embedder(persist_dir)
+        summary = sync_directory(upload_dir, DocumentIngestor(), embedder)
+        registry.invalidate(persist_dir)
+    return summary
+
+
 @router.post("/api/ingest")
 async def ingest_files(
     files: List[UploadFile] = File(...),
     namespace: Optional[str] = Query(default="default", description="Namespace for FAISS index")
 ):
     try:
-        upload_dir = Path("tmp_uploads")
-        upload_dir.mkdir(exist_ok=True)
+        # sync_directory mirrors the folder into the namespace manifest, so each
+        # namespace needs its own folder or it would ingest (and later purge)
+        # files uploaded to another one.
+        upload_dir = Path("tmp_uploads") / namespace
+        upload_dir.mkdir(parents=True, exist_ok=True)
 
         for file in files:
             file_path = upload_dir / file.filename
             with open(file_path, "wb") as f:
                 f.write(await file.read())
 
-        ingestor = DocumentIngestor()
-        all_chunks = ingestor.process_directory(upload_dir)
+        persist_dir = f"faiss_index/{namespace}"
+        # Hashing, parsing, embedding and the checkpoint would otherwise stall the event loop.
+        summary = await asyncio.to_thread(_sync_namespace, upload_dir, persist_dir)
+        response_cache.invalidate("query", persist_dir)
 
-        if not all_chunks:
+        # Re-uploading identical files is a no-op, not an error.
+        changed = summary["files"]["added"] + summary["files"]["modified"]
+        if not summary["num_chunks"] and (changed or not summary["num_files"]):
             raise HTTPException(status_code=400, detail="No valid chunks extracted.")
 
-        embedder = DocumentEmbedder(persist_dir=f"faiss_index/{namespace}")
-        embedder.build_or_update_index(all_chunks)
-
         return {
             "status": "success",
-            "num_chunks": len(all_chunks),
+            "num_chunks": summary["num_chunks"],
+            "files": summary["files"],
             "namespace": namespace
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,20 @@
 # langchain_ai_agent/api/main.py
-from typing import List
+from typing import Dict, List
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from langchain_ai_agent.api.schemas import AgentRequest, AgentResponse
-from langchain_ai_agent.agents.base_agent import get_agent_pipeline
+from langchain_ai_agent.api.schemas import AgentBatchRequest, AgentRequest, AgentResponse
+from langchain_ai_agent.agents.base_agent import get_agent_pipeline, stream_agent_batch
+from langchain_ai_agent.agents.response_cache import response_cache
+from langchain_ai_agent.agents.pre_classifier import pre_classifier
+from langchain_ai_agent.agents.llm_scheduler import Priority, iterate_at_priority, llm_scheduler
 from langchain_ai_agent.feedback_loop.memory_store import MemoryStore
 from langchain_ai_agent.pipelines.doc_to_action_pipeline import run_pipeline
 from dotenv import load_dotenv
 import logging
-import os, asyncio
+import os, asyncio, json
 from langchain_ai_agent.api import ingest_api, query_api, run_ingestion_pipeline
 
 load_dotenv()
@@ -17,10 +22,33 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+agent_pipeline = get_agent_pipeline(pre_classifier)
+# Write-behind: /run-agent only queues experiences, a background task persists them.
+memory_store = MemoryStore(persist_dir="memory_index", write_behind=True)
+
+
+async def train_pre_classifier():
+    try:
+        await asyncio.to_thread(pre_classifier.fit_from_log, memory_store.metadata_log, memory_store.embeddings)
+    except Exception as e:
+        logger.error(f"[PreClassifier] Training failed, routing stays on the LLM: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await memory_store.start()
+    # Requests fall back to LLM routing until training finishes.
+    training = asyncio.create_task(train_pre_classifier())
+    yield
+    training.cancel()
+    await memory_store.aclose()
+
+
 app = FastAPI(
     title="LangChain AI Agent API",
     description="API for processing documents with LangChain agent tools.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 app.include_router(ingest_api.router)
@@ -35,10 +63,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-agent_pipeline = get_agent_pipeline()
-memory_store = MemoryStore(persist_dir="memory_index")
-
-
 # ========== 📄 Upload Single File ==========
 @app.post("/upload-docs")
 async def upload_docs(files: List[UploadFile] = File(...)):
@@ -86,16 +110,26 @@ async def run_agent(request: AgentRequest):
 
         logger.info(f"🧠 Request.text = {request.text!r}")
 
-        memory_examples = memory_store.query_similar(request.text, k=2)
-
-        result = await agent_pipeline.ainvoke({"text": request.text})
-
-        memory_store.add_experience(
-            input_text=request.text,
-            output=result["output"],
-            task=result["task"],
-            metadata={"source": "api"}
-        )
+        # Embed once (off the event loop, batched with concurrent requests) and reuse the vector.
+        embedding = await memory_store.aembed(request.text)
+        # The search waits on the store's lock while a background flush indexes, so keep it off the loop.
+        memory_examples = await asyncio.to_thread(memory_store.query_similar, request.text, k=2, embedding=embedding)
+
+        # Only exact resubmissions reuse the earlier classification and tool output: a
+        # near-identical document can differ in the dates or amounts the tools extract.
+        result = response_cache.get(("run-agent",), request.text)
+        if result is None:
+            result = await agent_pipeline.ainvoke({"text": request.text, "embedding": embedding})
+            if "error" not in (result.get("output") or {}):
+                response_cache.put(("run-agent",), request.text, result)
+
+            await memory_store.aadd_experience(
+                input_text=request.text,
+                output=result["output"],
+                task=result["task"],
+                metadata={"source": "api", "routed_by": result["agent_trace"].get("routed_by")},
+                embedding=embedding
+            )
 
         result["agent_trace"]["similar_cases"] = memory_examples # Need to later inject them into the LLM prompt
 
@@ -104,3 +138,82 @@ async def run_agent(request: AgentRequest):
     except Exception as e:
         logger.exception("[API] Agent failed to process input.")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/run-agent/batch")
+async def run_agent_batch(request: AgentBatchRequest):
+    """
+    Process many documents in one call; one NDJSON line per document, in completion order.
+
+    Each line is {"index": <position in texts>, "task", "output", "agent_trace"}.
+    """
+    logger.info(f"[API] Received batch of {len(request.texts)} texts")
+
+    # One batched embedding call for memory lookup, caching and routing.
+    embeddings = await memory_store.embeddings.aembed_documents(request.texts)
+
+    def line(index: int, result: Dict, similar: List[List[Dict]]) -> str:
+        result["agent_trace"] = {**(result.get("agent_trace") or {}), "similar_cases": similar[index]}
+        return json.dumps({"index": index, **AgentResponse(**result).model_dump()}, default=str) + "\n"
+
+    async def results():
+        # Every memory lookup in one worker thread, not one blocking search per line on the event loop.
+        similar = await asyncio.to_thread(memory_store.query_similar_many, embeddings, 2)
+        pending = []
+        for i, text in enumerate(request.texts):
+            # Exact-hash hits only, as in /run-agent.
+            cached = response_cache.get(("run-agent",), text)
+            if cached is not None:
+                yield line(i, {**cached}, similar)
+            else:
+                pending.append(i)
+
+        # Batch work queues behind interactive requests in the LLM scheduler.
+        batch = iterate_at_priority(
+            stream_agent_batch(
+                [{"text": request.texts[i], "embedding": embeddings[i]} for i in pending], pre_classifier
+            ),
+            Priority.BATCH
+        )
+        async for j, result in batch:
+            i = pending[j]
+            if "error" not in (result.get("output") or {}):
+                response_cache.put(("run-agent",), request.texts[i], result)
+            try:
+                await memory_store.aadd_experience(
+                    input_text=request.texts[i],
+                    output=result["output"],
+                    task=result["task"],
+                    metadata={"source": "api_batch", "routed_by": result["agent_trace"].get("routed_by")},
+                    embedding=embeddings[i]
+                )
+            except Exception as e:
+                # Already streaming: a failed write must not cut off the remaining results.
+                logger.error(f"[API] Could not store experience for batch item {i}: {e}")
+            yield line(i, {**result}, similar)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+# ========== 🧠 Memory ==========
+@app.get("/memory-stats")
+async def memory_stats():
+    return memory_store.stats()
+
+
+# ========== 🧭 Routing ==========
+@app.get("/router-stats")
+async def router_stats():
+    return pre_classifier.stats()
+
+
+# ========== 🚦 LLM scheduler ==========
+@app.get("/llm-stats")
+async def llm_stats():
+    return llm_scheduler.stats()
+
+
+# ========== ⚡ Response cache ==========
+@app.get("/cache-stats")
+async def cache_stats():
+    return response_cache.stats()
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Query, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
-from langchain_ai_agent.agents.chat_agent import get_chat_agent_with_memory
-from langgraph.store.memory import InMemoryStore
-from langchain_core.messages import HumanMessage
+from langchain_ai_agent.agents.chat_agent import get_cached_chat_agent, schedule_summary, store, wait_for_summary
+from langchain_ai_agent.agents.response_cache import response_cache
+from langchain_ai_agent.retriever.embeddings import get_embeddings
+from langchain_ai_agent.retriever.registry import registry
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from typing import List, Optional
 import traceback
 import logging
 import uuid
@@ -13,34 +16,98 @@ logging.basicConfig(level=logging.INFO)
 
 router = APIRouter()
 
-# Shared store instance (same as in chat_agent)
-store = InMemoryStore()
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
 @router.get("/api/query")
 async def query_kb(
     question: str = Query(...),
     namespace: str = Query("default"),
     thread_id: str = Query(None),
-    stream: bool = Query(False)
+    stream: bool = Query(False),
+    source_type: Optional[List[str]] = Query(None),
+    filename: Optional[List[str]] = Query(None),
+    doc_path: Optional[List[str]] = Query(None)
 ):
     try:
+        # Only a fresh conversation's answer depends on the question alone, so only those are cached.
+        cacheable = thread_id is None and not stream
         thread_id = thread_id or str(uuid.uuid4())
         logger.info(f"[Thread] Using thread_id = {thread_id}")
-        agent = get_chat_agent_with_memory(persist_dir=f"faiss_index/{namespace}")
+        persist_dir = f"faiss_index/{namespace}"
+        agent = get_cached_chat_agent(persist_dir=persist_dir)
 
-        config = {"configurable": {"thread_id": thread_id}}
+        # Repeatable params, e.g. ?source_type=pdf&source_type=docx; applied inside the index search.
+        filters = {
+            field: values
+            for field, values in (("source_type", source_type), ("filename", filename), ("doc_path", doc_path))
+            if values
+        }
+        config = {"configurable": {"thread_id": thread_id, "filters": filters or None}}
         payload = {"question": question, "messages": []}
+        # A turn starts from the thread's state after its previous summary, not during it.
+        await wait_for_summary(thread_id)
 
         if stream:
+            # Events: "sources" once retrieval is done, "token" per answer chunk, then "done" (or "error").
             async def event_stream():
-                async for update in agent.astream(payload, config=config, stream_mode="updates"):
-                    yield f"data: {json.dumps(update)}\n\n"
+                answer, streamed = "", False
+                try:
+                    async for mode, chunk in agent.astream(
+                        payload, config=config, stream_mode=["custom", "messages", "updates"]
+                    ):
+                        if mode == "custom" and "sources" in chunk:
+                            yield _sse("sources", chunk["sources"])
+                        elif mode == "messages":
+                            message, metadata = chunk
+                            if (
+                                isinstance(message, AIMessageChunk)
+                                and metadata.get("langgraph_node") == "conversation"
+                                and message.content
+                            ):
+                                streamed = True
+                                yield _sse("token", message.content)
+                        elif mode == "updates" and "conversation" in chunk:
+                            answer = chunk["conversation"].get("graph_output") or ""
+                    if not streamed and answer:
+                        # Answers served from the LLM cache arrive whole.
+                        yield _sse("token", answer)
+                    yield _sse("done", {"answer": answer, "thread_id": thread_id})
+                    schedule_summary(agent, config)
+                except Exception as e:
+                    logger.error(f"Agent streaming failed: {e}")
+                    logger.error(traceback.format_exc())
+                    yield _sse("error", {"detail": str(e), "thread_id": thread_id})
             return StreamingResponse(event_stream(), media_type="text/event-stream")
 
+        if cacheable:
+            # Version is bumped whenever the namespace is re-ingested, by this or another worker.
+            scope = ("query", persist_dir, registry.version(persist_dir), json.dumps(filters, sort_keys=True))
+            embedding = await get_embeddings().aembed_query(question)
+            answer = response_cache.get(scope, question, embedding)
+            if answer is not None:
+                # Seed the new thread so follow-up questions still have history.
+                await agent.aupdate_state(config, as_node="conversation", values={
+                    "question": question,
+                    "messages": [HumanMessage(content=question), AIMessage(content=answer)],
+                    "graph_output": answer
+                })
+                return JSONResponse(content={
+                    "results": [answer],
+                    "thread_id": thread_id,
+                    "cached": True
+                })
+
         result = await agent.with_config(config).ainvoke(payload)
         answer = result.get("graph_output", "").strip()
         if not answer:
             raise HTTPException(status_code=500, detail="Agent returned no answer.")
+        if cacheable:
+            response_cache.put(scope, question, answer, embedding)
+        # Long threads are summarised after the reply, not before it.
+        schedule_summary(agent, config)
         return JSONResponse(content={
             "results": [answer],
             "thread_id": thread_id
@@ -56,7 +123,7 @@ async def query_kb(
 async def get_thread_state(thread_id: str = Query(...)):
     try:
         config = {"configurable": {"thread_id": thread_id}}
-        agent = get_chat_agent_with_memory(persist_dir="faiss_index/default")
+        agent = get_cached_chat_agent(persist_dir="faiss_index/default")
         state = await agent.get_state(config)
         return JSONResponse(content={"state": state.values})
     except Exception as e:
@@ -67,10 +134,8 @@ async def get_thread_state(thread_id: str = Query(...)):
 @router.post("/api/reset")
 async def reset_thread(thread_id: str = Query(...)):
     try:
-        namespace = ("default", thread_id)
-        keys = await store.list_namespaces(prefix=namespace)
-        for ns in keys:
-            await store.delete(ns, "state")  # assuming state is stored under key "state"
+        # Deletes every checkpoint, pending write and stored message of the thread.
+        await store.adelete_thread(thread_id)
         return JSONResponse(content={"message": f"Thread {thread_id} state deleted."})
     except Exception as e:
         logger.error(f"Failed to reset thread: {e}")
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Query, HTTPException
 from langchain_ai_agent.ingestion.reader import DocumentIngestor
-from langchain_ai_agent.retriever.vector_store import DocumentEmbedder
+from langchain_ai_agent.ingestion.manifest import sync_directory
+from langchain_ai_agent.retriever.registry import registry, get_embedder
+from langchain_ai_agent.agents.response_cache import response_cache
 from pathlib import Path
 
 router = APIRouter()
@@ -12,17 +14,21 @@ def run_ingestion_pipeline(
 ):
     try:
         ingestor = DocumentIngestor()
-        chunks = ingestor.process_directory(Path(path))
+        persist_dir = f"faiss_index/{namespace}"
+        with registry.write_lock(persist_dir):
+            embedder = get_embedder(persist_dir)
+            # Only new or changed files are parsed; edited and deleted files are purged first.
+            summary = sync_directory(Path(path), ingestor, embedder)
+            registry.invalidate(persist_dir)
+        response_cache.invalidate("query", persist_dir)
 
-        if not chunks:
+        if not summary["num_files"]:
             return {"status": "skipped", "reason": "No supported files found."}
 
-        embedder = DocumentEmbedder(persist_dir=f"faiss_index/{namespace}")
-        embedder.build_or_update_index(chunks)
-
         return {
             "status": "success",
-            "num_chunks": len(chunks),
+            "num_chunks": summary["num_chunks"],
+            "files": summary["files"],
             "namespace": namespace
         }
 
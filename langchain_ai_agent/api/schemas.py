@@ -1,7 +1,7 @@
 # langchain_ai_agent/api/schemas.py
 
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional
+from typing import Annotated, Dict, Any, List, Optional
 
 
 class AgentRequest(BaseModel):
@@ -9,6 +9,13 @@ class AgentRequest(BaseModel):
     text: str = Field(..., min_length=5, description="Document chunk to be analyzed by the agent.")
 
 
+class AgentBatchRequest(BaseModel):
+    """Request schema for submitting many documents to the agent in one call."""
+    texts: List[Annotated[str, Field(min_length=5)]] = Field(
+        ..., min_length=1, max_length=1000, description="Documents to be analyzed by the agent."
+    )
+
+
 class AgentResponse(BaseModel):
     """Response schema returned after agent processing."""
     task: Optional[str] = None
@@ -5,18 +5,30 @@ Recall similar past inputs (document chunks)
 Reuse past outputs as experience
 
 Enable future tools (like routing or generation) to learn from prior decisions
+
+In write-behind mode experiences are queued and persisted by a background task,
+so request latency does not include embedding, indexing or disk writes.
+
+Indexed documents only carry the task and small metadata plus the byte offset
+of the experience in memory_log.jsonl; the (potentially large) output is read
+back from the log for the experiences a query actually returns.
 '''
 
+import os
+import time
 import json
+import asyncio
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
 from pydantic import BaseModel, ValidationError
 
+from langchain_ai_agent.retriever.embeddings import DEFAULT_MODEL_NAME, get_embeddings
+from langchain_ai_agent.retriever.persistence import IncrementalIndex
+
 # Configure logger
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -45,7 +57,11 @@ class MemoryStore:
     def __init__(
         self,
         persist_dir: str = "memory_index",
-        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+        embedding_model: str = DEFAULT_MODEL_NAME,
+        write_behind: bool = False,
+        queue_size: int = 1000,
+        flush_interval: float = 2.0,
+        flush_batch: int = 64
     ):
         """
         Initialize the memory store.
@@ -53,17 +69,42 @@ class MemoryStore:
         Args:
             persist_dir (str): Directory to store FAISS index and logs
             embedding_model (str): Name of sentence-transformer model to use
+            write_behind (bool): Queue experiences and persist them in the background
+            queue_size (int): Bound on queued experiences before producers wait
+            flush_interval (float): Seconds between background flushes
+            flush_batch (int): Queue depth that triggers an early flush
         """
         self.persist_dir = Path(persist_dir)
         self.metadata_log = self.persist_dir / "memory_log.jsonl"
-        self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
+        self.embeddings = get_embeddings(embedding_model)
+        # Experiences are appended to a write-ahead log and checkpointed in bulk.
+        self.index = IncrementalIndex(self.persist_dir, self.embeddings)
+        # Guards the FAISS store against the background flusher writing mid-search.
+        self._lock = threading.Lock()
+        # Serialises writers, so a failed batch can be cut off the end of the log.
+        self._write_lock = threading.Lock()
+
+        self.write_behind = write_behind
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+        self._stats = {
+            "enqueued": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "failed": 0,
+            "backpressure_waits": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+        }
 
         if self.persist_dir.exists():
             try:
-                self.vector_store = FAISS.load_local(
-                    folder_path=str(self.persist_dir),
-                    embeddings=self.embeddings
-                )
+                self.vector_store = self.index.load()
                 logger.info("[MemoryStore] Loaded existing FAISS index from disk.")
             except Exception as e:
                 logger.error(f"[MemoryStore] Failed to load FAISS index: {e}")
@@ -73,24 +114,15 @@ class MemoryStore:
             self.vector_store = None
             logger.info("[MemoryStore] Initialized new FAISS memory store.")
 
-    def add_experience(
+    def _validate(
         self,
         input_text: str,
         output: Dict,
         task: str,
-        metadata: Optional[Dict] = None
-    ) -> None:
-        """
-        Log an agent experience into memory.
-
-        Args:
-            input_text (str): Document chunk
-            output (Dict): Output from the agent
-            task (str): Task type (e.g., "summarization", "triage")
-            metadata (Optional[Dict]): Extra info like filename, chunk_id
-        """
+        metadata: Optional[Dict]
+    ) -> Optional[ExperienceRecord]:
         try:
-            record = ExperienceRecord(
+            return ExperienceRecord(
                 input_text=input_text,
                 task=task,
                 output=output,
@@ -98,39 +130,251 @@ class MemoryStore:
             )
         except ValidationError as e:
             logger.error(f"[MemoryStore] Experience validation failed: {e}")
-            return
+            return None
+
+    def _write_batch(self, items: List[Tuple[ExperienceRecord, Optional[List[float]]]]) -> None:
+        """
+        Embed (where needed), index and log a batch of experiences in one pass.
+        Raises if indexing fails. The batch's log lines are removed again only
+        if the store never took the batch; once it holds them, their log_offset
+        metadata points at those lines.
+        """
+        with self._write_lock:
+            offsets = self._append_log([record for record, _ in items])
+            before = self._indexed_count()
+            try:
+                self._index_batch(items, offsets)
+            except Exception:
+                if offsets[0] is not None and self._indexed_count() == before:
+                    os.truncate(self.metadata_log, offsets[0])
+                raise
+            # Outside the search lock: a checkpoint rewrites the whole index, and
+            # readers only need the in-memory store, which it does not modify.
+            try:
+                self.index.maybe_checkpoint()
+            except Exception as e:
+                # The batch is already in the write-ahead log, so nothing is lost.
+                logger.error(f"[MemoryStore] Checkpoint failed: {e}")
+
+    def _indexed_count(self) -> int:
+        return self.index.store.index.ntotal if self.index.store is not None else 0
+
+    def _index_batch(
+        self,
+        items: List[Tuple[ExperienceRecord, Optional[List[float]]]],
+        offsets: List[Optional[int]]
+    ) -> None:
+        docs = [
+            Document(page_content=record.input_text, metadata={
+                "task": record.task,
+                **(record.meta or {}),
+                # Without a log line to point at, keep the output inline.
+                **({"log_offset": offset} if offset is not None else {"output": record.output})
+            })
+            for (record, _), offset in zip(items, offsets)
+        ]
+
+        missing = [i for i, (_, embedding) in enumerate(items) if embedding is None]
+        computed = self.embeddings.embed_documents([docs[i].page_content for i in missing]) if missing else []
+        vectors = [embedding for _, embedding in items]
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
 
         # Add to vector DB
-        doc = Document(page_content=record.input_text, metadata={
-            "task": record.task,
-            **(record.meta or {}),
-            "output": record.output  # Optional: remove if too large
-        })
+        with self._lock:
+            try:
+                self.index.add(
+                    [doc.page_content for doc in docs], vectors, [doc.metadata for doc in docs], auto_checkpoint=False
+                )
+            finally:
+                # A failed log append leaves the batch searchable in memory all the same.
+                self.vector_store = self.index.store
+        logger.info(f"[MemoryStore] {len(docs)} experience(s) added and persisted.")
 
+    def _write_logged(self, items: List[Tuple[ExperienceRecord, Optional[List[float]]]]) -> None:
+        # Direct writes keep the caller going; the background flush counts failures instead.
         try:
-            if self.vector_store:
-                self.vector_store.add_documents([doc])
-            else:
-                self.vector_store = FAISS.from_documents([doc], self.embeddings)
-            self.vector_store.save_local(str(self.persist_dir))
-            logger.info(f"[MemoryStore] Experience added and persisted for task '{task}'.")
+            self._write_batch(items)
         except Exception as e:
             logger.error(f"[MemoryStore] Failed to update vector store: {e}")
 
-        # Append to memory log
+    def _append_log(self, records: List[ExperienceRecord]) -> List[Optional[int]]:
+        """
+        Append records to the memory log.
+
+        Returns:
+            List[Optional[int]]: Byte offset of each record's line, None if the write failed
+        """
+        offsets = []
         try:
-            with open(self.metadata_log, "a") as f:
-                f.write(record.model_dump_json() + "\n")
+            with open(self.metadata_log, "ab") as f:
+                for record in records:
+                    offsets.append(f.tell())
+                    f.write((record.model_dump_json() + "\n").encode("utf-8"))
+            return offsets
         except Exception as e:
             logger.error(f"[MemoryStore] Failed to write log: {e}")
+            return [None] * len(records)
+
+    def _with_output(self, metadata: Dict, log) -> Dict:
+        # Experiences indexed before outputs moved to the log still carry them inline.
+        if "log_offset" not in metadata:
+            return metadata
+        metadata = dict(metadata)
+        log.seek(metadata.pop("log_offset"))
+        metadata["output"] = json.loads(log.readline())["output"]
+        return metadata
 
-    def query_similar(self, input_text: str, k: int = 3) -> List[Dict]:
+    def add_experience(
+        self,
+        input_text: str,
+        output: Dict,
+        task: str,
+        metadata: Optional[Dict] = None,
+        embedding: Optional[List[float]] = None
+    ) -> None:
+        """
+        Log an agent experience into memory.
+
+        Args:
+            input_text (str): Document chunk
+            output (Dict): Output from the agent
+            task (str): Task type (e.g., "summarization", "triage")
+            metadata (Optional[Dict]): Extra info like filename, chunk_id
+            embedding (Optional[List[float]]): Precomputed vector for input_text, see `aembed`
+        """
+        record = self._validate(input_text, output, task, metadata)
+        if record is not None:
+            self._write_logged([(record, embedding)])
+
+    async def aadd_experience(
+        self,
+        input_text: str,
+        output: Dict,
+        task: str,
+        metadata: Optional[Dict] = None,
+        embedding: Optional[List[float]] = None
+    ) -> None:
+        """
+        Async variant of `add_experience`. In write-behind mode this only queues
+        the experience; when the queue is full it triggers a flush and waits.
+        """
+        record = self._validate(input_text, output, task, metadata)
+        if record is None:
+            return
+        if not self.write_behind:
+            await asyncio.to_thread(self._write_logged, [(record, embedding)])
+            return
+
+        self._ensure_flusher()
+        if self._queue.full():
+            self._stats["backpressure_waits"] += 1
+            self._flush_event.set()
+        await self._queue.put((record, embedding))
+        self._stats["enqueued"] += 1
+        depth = self._queue.qsize()
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+        if depth >= self.flush_batch:
+            self._flush_event.set()
+
+    def _ensure_flusher(self) -> None:
+        # Created lazily so the queue binds to the running event loop.
+        if self._flusher is None or self._flusher.done():
+            self._queue = self._queue or asyncio.Queue(maxsize=self.queue_size)
+            self._flush_event = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def start(self) -> None:
+        """
+        Start the background flusher (call from FastAPI startup).
+        """
+        if self.write_behind:
+            self._ensure_flusher()
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Persist everything currently queued as one batch.
+
+        Returns:
+            int: Number of experiences flushed
+        """
+        if self._queue is None or self._queue.empty():
+            return 0
+        items = []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write_batch, items)
+            self._stats["flushed"] += len(items)
+        except Exception as e:
+            self._stats["failed"] += len(items)
+            logger.error(f"[MemoryStore] Background flush failed: {e}")
+        self._stats["flushes"] += 1
+        self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return len(items)
+
+    async def aclose(self) -> None:
+        """
+        Stop the flusher, drain the queue and checkpoint the index (call from FastAPI shutdown).
+        """
+        if self._flusher is not None:
+            # Let an in-flight flush finish instead of cancelling it halfway.
+            self._closing = True
+            self._flush_event.set()
+            await self._flusher
+            self._flusher = None
+            self._closing = False
+        drained = await self.flush()
+        await asyncio.to_thread(self._checkpoint)
+        logger.info(f"[MemoryStore] Drained {drained} queued experience(s) on shutdown.")
+
+    def _checkpoint(self) -> None:
+        # Writers are held off; searches keep reading the in-memory store meanwhile.
+        with self._write_lock:
+            self.index.checkpoint()
+
+    def stats(self) -> Dict:
+        """
+        Write-behind counters: queue depth, throughput and backpressure.
+        """
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "write_behind": self.write_behind,
+        }
+
+    async def aembed(self, input_text: str) -> List[float]:
+        """
+        Embed input text once through the shared batched embedding service,
+        so callers can reuse the vector for both `query_similar` and `add_experience`.
+        """
+        return await self.embeddings.aembed_query(input_text)
+
+    def query_similar(
+        self,
+        input_text: str,
+        k: int = 3,
+        embedding: Optional[List[float]] = None
+    ) -> List[Dict]:
         """
         Retrieve similar past experiences based on input text.
 
         Args:
             input_text (str): The new chunk to compare
             k (int): Number of most similar examples to return
+            embedding (Optional[List[float]]): Precomputed vector for input_text
 
         Returns:
             List[Dict]: Past experiences with metadata
@@ -140,15 +384,49 @@ class MemoryStore:
             return []
 
         try:
-            results = self.vector_store.similarity_search(input_text, k=k)
+            if embedding is None:
+                embedding = self.embeddings.embed_query(input_text)
+            with self._lock:
+                results = self.vector_store.similarity_search_by_vector(embedding, k=k)
             logger.info(f"[MemoryStore] Found {len(results)} similar experiences.")
-            return [
-                {
-                    "text": doc.page_content,
-                    "metadata": doc.metadata
-                }
-                for doc in results
-            ]
+            with open(self.metadata_log, "rb") as log:
+                return [
+                    {
+                        "text": doc.page_content,
+                        "metadata": self._with_output(doc.metadata, log)
+                    }
+                    for doc in results
+                ]
         except Exception as e:
             logger.error(f"[MemoryStore] Similarity search failed: {e}")
             return []
+
+    def query_similar_many(self, embeddings: List[List[float]], k: int = 3) -> List[List[Dict]]:
+        """
+        Batch form of `query_similar` for precomputed vectors: one lock
+        acquisition and one pass over the log, so a batch endpoint can run
+        every lookup in a single worker thread.
+
+        Args:
+            embeddings (List[List[float]]): Input vectors, one per document
+            k (int): Number of most similar examples per document
+
+        Returns:
+            List[List[Dict]]: Past experiences per input, in input order
+        """
+        if not self.vector_store:
+            logger.warning("[MemoryStore] No vector store loaded.")
+            return [[] for _ in embeddings]
+
+        try:
+            with self._lock:
+                results = [self.vector_store.similarity_search_by_vector(embedding, k=k) for embedding in embeddings]
+            logger.info(f"[MemoryStore] Found similar experiences for {len(results)} inputs.")
+            with open(self.metadata_log, "rb") as log:
+                return [
+                    [{"text": doc.page_content, "metadata": self._with_output(doc.metadata, log)} for doc in docs]
+                    for docs in results
+                ]
+        except Exception as e:
+            logger.error(f"[MemoryStore] Similarity search failed: {e}")
+            return [[] for _ in embeddings]
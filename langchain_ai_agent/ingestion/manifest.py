@@ -0,0 +1,191 @@
+# langchain_ai_agent/ingestion/manifest.py
+'''
+Per-namespace ingestion manifest.
+
+Records a fingerprint (path, size, mtime, content hash) for every file indexed
+into a namespace, so re-ingesting a directory only parses files that are new or
+changed, replaces the chunks of edited files and purges deleted ones.
+'''
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from pydantic import BaseModel
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class FileFingerprint(BaseModel):
+    path: str
+    size: int
+    mtime: float
+    sha256: str
+
+
+class ManifestDiff(BaseModel):
+    added: List[str] = []
+    modified: List[str] = []
+    deleted: List[str] = []
+    unchanged: List[str] = []
+
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.modified
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    JSON file of FileFingerprint records keyed by the file path used as `doc_path`.
+    """
+
+    def __init__(self, persist_dir: str):
+        """
+        Args:
+            persist_dir (str): Namespace directory; the manifest sits next to its metadata
+        """
+        self.path = Path(persist_dir) / MANIFEST_FILENAME
+        self.entries: Dict[str, FileFingerprint] = {}
+        self._pending: Dict[str, FileFingerprint] = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.entries = {k: FileFingerprint(**v) for k, v in json.load(f).items()}
+
+    def diff(self, files: List[Path], root: Optional[Path] = None) -> ManifestDiff:
+        """
+        Classify files against the manifest. Size and mtime are compared first;
+        the content hash is only computed when they differ.
+
+        Args:
+            files (List[Path]): Files currently present under `root`
+            root (Optional[Path]): Only manifest entries under this directory can be reported as deleted
+
+        Returns:
+            ManifestDiff: Paths grouped by status
+        """
+        result = ManifestDiff()
+        seen = set()
+        self._pending = {}
+        for file_path in files:
+            key = str(file_path)
+            seen.add(key)
+            stat = file_path.stat()
+            known = self.entries.get(key)
+            if known and known.size == stat.st_size and known.mtime == stat.st_mtime:
+                result.unchanged.append(key)
+                continue
+
+            fingerprint = FileFingerprint(
+                path=key, size=stat.st_size, mtime=stat.st_mtime, sha256=_hash_file(file_path)
+            )
+            self._pending[key] = fingerprint
+            if known is None:
+                result.added.append(key)
+            elif known.sha256 == fingerprint.sha256:
+                # Touched but not edited: refresh the fingerprint, skip parsing.
+                result.unchanged.append(key)
+            else:
+                result.modified.append(key)
+
+        prefix = str(root) + os.sep if root is not None else ""
+        result.deleted = [
+            key for key in self.entries
+            if key not in seen and key.startswith(prefix)
+        ]
+        return result
+
+    def commit(self, diff: ManifestDiff, indexed: Optional[Set[str]] = None) -> None:
+        """
+        Apply a diff after its files have been indexed, then persist atomically.
+
+        Args:
+            diff (ManifestDiff): Result of `diff`
+            indexed (Optional[Set[str]]): Changed files that produced chunks. Other
+                changed files are left out of the manifest, so the next sync retries them.
+        """
+        failed = set(diff.changed) - indexed if indexed is not None else set()
+        for key in diff.deleted:
+            self.entries.pop(key, None)
+        self.entries.update({k: v for k, v in self._pending.items() if k not in failed})
+        self._pending = {}
+        if failed:
+            logger.warning(f"[Manifest] {len(failed)} files produced no chunks and will be retried.")
+
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({k: v.model_dump() for k, v in self.entries.items()}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _track_paths(batches: Iterable[List[Dict]], seen: Set[str]) -> Iterator[List[Dict]]:
+    for batch in batches:
+        seen.update(chunk["doc_path"] for chunk in batch)
+        yield batch
+
+
+def sync_directory(folder_path: Path, ingestor, embedder) -> Dict:
+    """
+    Incrementally bring a namespace in line with a directory: skip unchanged
+    files before parsing, replace chunks of modified files, purge deleted files.
+
+    Args:
+        folder_path (Path): Directory to ingest
+        ingestor (DocumentIngestor): Parses and chunks files
+        embedder (DocumentEmbedder): Target namespace index
+
+    Returns:
+        Dict: Number of chunks indexed plus per-status file counts
+    """
+    folder_path = Path(folder_path)
+    files = ingestor.list_files(folder_path)
+    manifest = IngestManifest(embedder.persist_dir)
+    diff = manifest.diff(files, root=folder_path)
+
+    stale = diff.modified + diff.deleted
+    if stale:
+        removed = embedder.delete_files(stale)
+        logger.info(f"[Manifest] Removed {removed} stale chunks from {len(stale)} files.")
+
+    num_chunks = 0
+    # Parse failures yield no chunks (the reader logs and skips them).
+    indexed: Set[str] = set()
+    if diff.changed:
+        changed = set(diff.changed)
+        batches = ingestor.iter_chunk_batches(
+            folder_path, files=[f for f in files if str(f) in changed]
+        )
+        num_chunks = embedder.index_stream(_track_paths(batches, indexed))
+    if stale or diff.changed:
+        # One checkpoint per run, so query workers can memory-map the result.
+        embedder.flush()
+
+    manifest.commit(diff, indexed)
+    logger.info(
+        f"[Manifest] {folder_path}: {len(diff.added)} added, {len(diff.modified)} modified, "
+        f"{len(diff.deleted)} deleted, {len(diff.unchanged)} unchanged."
+    )
+    return {
+        "num_chunks": num_chunks,
+        "num_files": len(files),
+        "files": {
+            "added": len(diff.added),
+            "modified": len(diff.modified),
+            "deleted": len(diff.deleted),
+            "unchanged": len(diff.unchanged),
+        },
+    }
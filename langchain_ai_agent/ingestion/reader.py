@@ -1,6 +1,11 @@
+import os
 import logging
+import multiprocessing
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 import yaml
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -11,24 +16,49 @@ from unstructured.partition.auto import partition
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Shipped with the package, so the default does not depend on the working directory.
+DEFAULT_CONFIG_PATH = str(Path(__file__).resolve().parent.parent / "config" / "ingestion_config.yml")
+
+# Per-process ingestor used by pool workers, built once by _init_worker.
+_worker_ingestor = None
+
+
+def _init_worker(config_path: str):
+    global _worker_ingestor
+    _worker_ingestor = DocumentIngestor(config_path=config_path)
+
+
+def _process_file_in_worker(filepath: str) -> List[Dict]:
+    return _worker_ingestor.process_file(Path(filepath))
+
+
 class DocumentIngestor:
-    def __init__(self, config_path: str = "config/ingestion_config.yaml"):
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH):
+        self.config_path = config_path
         self.config = self._load_config(config_path)
         self.chunk_size = self.config.get("chunk_size", 500)
         self.chunk_overlap = self.config.get("chunk_overlap", 50)
         self.supported_extensions = set(self.config.get("supported_extensions", [".pdf", ".docx", ".txt", ".eml", ".html"]))
+        self.batch_size = self.config.get("batch_size", 256)
+        self.max_workers = self.config.get("max_workers") or os.cpu_count() or 1
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap
         )
 
     def _load_config(self, path: str) -> Dict:
-        try:
-            with open(path, "r") as f:
-                return yaml.safe_load(f)
-        except FileNotFoundError:
-            logger.warning(f"No config file found at {path}, using defaults.")
-            return {}
+        # Accept either YAML extension: the shipped file is .yml, older callers pass .yaml.
+        candidates = [Path(path)]
+        if candidates[0].suffix in (".yml", ".yaml"):
+            candidates.append(candidates[0].with_suffix(".yaml" if candidates[0].suffix == ".yml" else ".yml"))
+        for candidate in candidates:
+            try:
+                with open(candidate, "r") as f:
+                    return yaml.safe_load(f) or {}
+            except FileNotFoundError:
+                continue
+        logger.warning(f"No config file found at {path}, using defaults.")
+        return {}
     
     def _extract_text(self, filepath: Path) -> str:
         try:
@@ -74,6 +104,102 @@ class DocumentIngestor:
         logger.info(f"[Ingestor] Finished processing directory: {folder_path}")
         return all_chunks
 
+    def _iter_file_chunks(self, files: List[Path]) -> Iterator[List[Dict]]:
+        if self.max_workers <= 1 or len(files) <= 1:
+            for file_path in files:
+                yield self.process_file(file_path)
+            return
+
+        # Keep only a few files in flight per worker so parsed text never piles up.
+        max_in_flight = self.max_workers * 2
+        # (path, attempts): files lost to a crashed pool are queued again once.
+        queue = deque((str(file_path), 0) for file_path in files)
+        pending: Dict[Future, Tuple[str, int]] = {}
+        pool = self._new_pool()
+        try:
+            while queue or pending:
+                # Retried files run alone, so a second crash is attributed to the right file.
+                limit = 1 if queue and queue[0][1] else max_in_flight
+                while queue and len(pending) < limit:
+                    path, attempts = queue.popleft()
+                    try:
+                        pending[pool.submit(_process_file_in_worker, path)] = (path, attempts)
+                    except BrokenProcessPool:
+                        queue.appendleft((path, attempts))
+                        break
+                if not pending:
+                    pool = self._restart_pool(pool)
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    path, attempts = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if attempts:
+                            logger.error(f"[Ingestor] Worker crashed on {path}, skipping it: {e}")
+                        else:
+                            queue.append((path, attempts + 1))
+                    except Exception as e:
+                        logger.error(f"[Ingestor] Worker failed on {path}: {e}")
+                if broken:
+                    # The other in-flight files fail with the same pool and are queued again as they complete.
+                    pool = self._restart_pool(pool)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawn, not fork: this process runs the embedding batcher and torch threads,
+        # and forking while they hold locks can deadlock the workers.
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.config_path,)
+        )
+
+    def _restart_pool(self, pool: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        logger.warning("[Ingestor] Worker pool broke; starting a new one.")
+        pool.shutdown(wait=False, cancel_futures=True)
+        return self._new_pool()
+
+    def list_files(self, folder_path: Path) -> List[Path]:
+        folder_path = Path(folder_path)
+        if not folder_path.is_dir():
+            raise FileNotFoundError(f"[Ingestor] Not a directory: {folder_path}")
+        return sorted(p for p in folder_path.glob("**/*") if p.is_file() and self._is_supported(p))
+
+    def iter_chunk_batches(
+        self,
+        folder_path: Path,
+        batch_size: Optional[int] = None,
+        files: Optional[List[Path]] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Streaming variant of `process_directory`: files are partitioned in a
+        process pool and chunks are yielded in batches of at most `batch_size`,
+        so memory stays flat regardless of directory size.
+
+        `files` restricts the run to a subset (e.g. only changed files).
+        """
+        if files is None:
+            files = self.list_files(folder_path)
+        return self._batched(files, batch_size or self.batch_size)
+
+    def _batched(self, files: List[Path], batch_size: int) -> Iterator[List[Dict]]:
+        batch: List[Dict] = []
+        for chunks in self._iter_file_chunks(files):
+            batch.extend(chunks)
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+        if batch:
+            yield batch
+        logger.info(f"[Ingestor] Finished streaming {len(files)} files.")
+
 def ingest_and_chunk(path: str) -> dict:
     # example dummy logic
     return {"status": "ingested", "path": path}
@@ -1,77 +1,108 @@
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List
 from collections import defaultdict
 import asyncio
+import os
+from pathlib import Path
 
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-semaphore = asyncio.Semaphore(5)
+# Namespace the pipeline indexes into; DocumentEmbedder's default directory.
+PIPELINE_PERSIST_DIR = "faiss_index"
 
-async def safe_invoke(agent, input: Dict[str, str]) -> Dict[str, Any]:
-    async with semaphore:
-        return await agent.ainvoke(input)
+# Documents classified at once. The LLM scheduler limits calls, not documents:
+# without this every document's text and map-reduce state would be held at once.
+MAX_DOCS_IN_FLIGHT = int(os.getenv("PIPELINE_MAX_DOCS_IN_FLIGHT", "5"))
 
 
 async def run_pipeline(source_path: str) -> Dict:
-    logger.info("[Pipeline] Starting document ingestion...")
+    """
+    Ingest, index and classify a directory. LLM calls run at batch priority,
+    so they queue behind interactive requests in the shared LLM scheduler.
+    """
+    from langchain_ai_agent.agents.llm_scheduler import Priority, llm_priority
+
+    with llm_priority(Priority.BATCH):
+        return await _run_pipeline(source_path)
+
+
+def _index_source(source_path: str) -> Dict[str, List[str]]:
+    """
+    Chunk a file or directory, index the chunks into the pipeline namespace and
+    return each document's chunk texts, keyed by doc_path. Blocking; run it in
+    a worker thread.
+    """
+    from langchain_ai_agent.ingestion.reader import DocumentIngestor
+    from langchain_ai_agent.retriever.registry import registry, get_embedder
+
+    source = Path(source_path)
+    ingestor = DocumentIngestor()
+    if source.is_file():
+        batches = ingestor.iter_chunk_batches(source.parent, files=[source])
+    else:
+        batches = ingestor.iter_chunk_batches(source)
 
-    from langchain_ai_agent.ingestion.reader import ingest_and_chunk
-    from langchain_ai_agent.retriever.vector_store import DocumentEmbedder
-    from langchain_ai_agent.agents.base_agent import get_agent_pipeline
+    doc_groups = defaultdict(list)
 
-    chunks = ingest_and_chunk(source_path)
-    if not chunks:
-        logger.warning("[Pipeline] No chunks found.")
-        return {"status": "no_chunks"}
+    def collect(batches):
+        for batch in batches:
+            for chunk in batch:
+                doc_groups[chunk["doc_path"]].append(chunk["text"])
+            yield batch
 
-    async def format_chunk(i: int, chunk):
-        if isinstance(chunk, dict):
-            return chunk
-        elif isinstance(chunk, str):
-            return {
-                "chunk_id": i,
-                "text": chunk,
-                "filename": "unknown.txt",
-                "source_type": "raw",
-                "doc_path": source_path
-            }
+    # Same writer discipline as the ingest endpoints: one writer per namespace,
+    # and a checkpoint so read-only query workers need not replay the log.
+    with registry.write_lock(PIPELINE_PERSIST_DIR):
+        embedder = get_embedder(PIPELINE_PERSIST_DIR)
+        embedder.index_stream(collect(batches))
+        embedder.flush()
+        registry.invalidate(PIPELINE_PERSIST_DIR)
+    return doc_groups
 
-    results = [
-        format_chunk(i, chunk)
-        for i, chunk in enumerate(chunks)
-    ]
 
-    formatted_chunks = await asyncio.gather(*results)
+async def _run_pipeline(source_path: str) -> Dict:
+    logger.info("[Pipeline] Starting document ingestion...")
 
-    # Embed the chunks
-    embedder = DocumentEmbedder()
-    embedder.build_or_update_index(formatted_chunks)
+    from langchain_ai_agent.agents.response_cache import response_cache
+    from langchain_ai_agent.agents.base_agent import get_agent_pipeline
+    from langchain_ai_agent.pipelines.long_document import LONG_DOC_MIN_CHUNKS, process_long_document
+
+    # Parsing, embedding and the checkpoint would otherwise stall the event loop.
+    doc_groups = await asyncio.to_thread(_index_source, source_path)
+    if not doc_groups:
+        logger.warning("[Pipeline] No chunks found.")
+        return {"status": "no_chunks"}
+    response_cache.invalidate("query", PIPELINE_PERSIST_DIR)
 
     # Document-level classification
     agent = get_agent_pipeline()
-    doc_groups = defaultdict(list)
-
-    for chunk in formatted_chunks:
-        doc_groups[chunk["filename"]].append(chunk["text"])
+    semaphore = asyncio.Semaphore(MAX_DOCS_IN_FLIGHT)
 
-    async def classify_doc(filename: str, chunks: List[str], agent):
-        full_text = "\n".join(chunks)
+    async def classify_doc(doc_path: str, chunks: List[str], agent):
+        filename = Path(doc_path).name
         try:
-            result = await safe_invoke(agent, {"text":full_text})
+            # Rate limits are applied per LLM call by the scheduler.
+            async with semaphore:
+                if len(chunks) >= LONG_DOC_MIN_CHUNKS:
+                    result = await process_long_document(chunks)
+                else:
+                    full_text = "\n".join(chunks)
+                    result = await agent.ainvoke({"text":full_text})
             return {
                 "filename": filename,
+                "doc_path": doc_path,
                 "label": str(result.get("task") or "unknown"),
                 "output": result.get("output")
             }
         except Exception as e:
             logger.warning(f"[Pipeline] Failed to classify {filename}: {e}")
-            return {"filename": filename, "label": "error", "output": {}}
+            return {"filename": filename, "doc_path": doc_path, "label": "error", "output": {}}
 
     tasks = [
-        classify_doc(filename, chunks, agent)
-        for filename, chunks in doc_groups.items()
+        classify_doc(doc_path, chunks, agent)
+        for doc_path, chunks in doc_groups.items()
     ]
 
     doc_classification = await asyncio.gather(*tasks)
@@ -0,0 +1,134 @@
+# langchain_ai_agent/pipelines/long_document.py
+'''
+Map-reduce processing for documents too long for a single prompt.
+
+The document is classified from an evenly spaced sample of its chunks, the
+routed tool runs over batches of consecutive chunks concurrently (map), and the
+partial outputs are merged into one output of the tool's usual shape (reduce).
+Latency per document is bounded by the slowest batch rather than by its length.
+'''
+
+import os
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List
+
+from langchain_ai_agent.agents.base_agent import classify_chain, match_label, route_to_tool
+from langchain_ai_agent.agents.tools.summarize_tool import summarizer_chain
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Documents with at least this many chunks are processed with map-reduce.
+LONG_DOC_MIN_CHUNKS = int(os.getenv("LONG_DOC_MIN_CHUNKS", "16"))
+MAP_BATCH_CHUNKS = int(os.getenv("MAP_BATCH_CHUNKS", "8"))
+CLASSIFY_SAMPLE_CHUNKS = int(os.getenv("CLASSIFY_SAMPLE_CHUNKS", "4"))
+
+URGENCY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def sample_chunks(chunks: List[str], n: int = CLASSIFY_SAMPLE_CHUNKS) -> List[str]:
+    """
+    Evenly spaced chunks, always including the first (titles, parties, headers).
+    """
+    if len(chunks) <= n:
+        return list(chunks)
+    step = len(chunks) / n
+    return [chunks[int(i * step)] for i in range(n)]
+
+
+def batch_chunks(chunks: List[str], size: int = MAP_BATCH_CHUNKS) -> List[str]:
+    return ["\n".join(chunks[i:i + size]) for i in range(0, len(chunks), size)]
+
+
+def _unique(items: List[Any], key: Callable[[Any], Any]) -> List[Any]:
+    seen, result = set(), []
+    for item in items:
+        k = key(item)
+        if k not in seen:
+            seen.add(k)
+            result.append(item)
+    return result
+
+
+def _normalise(text: Any) -> str:
+    return " ".join(str(text).lower().split())
+
+
+async def _reduce_summaries(outputs: List[Dict]) -> Dict:
+    # Summaries of the parts are summarised again, so the result keeps the tool's length limits.
+    partials = "\n\n".join(
+        output["summary"] + "\n" + "\n".join(f"- {point}" for point in output["bullet_points"])
+        for output in outputs
+    )
+    return await summarizer_chain.ainvoke({"text": partials})
+
+
+async def _reduce_risks(outputs: List[Dict]) -> Dict:
+    return {
+        "risks_found": _unique([r for o in outputs for r in o["risks_found"]], key=_normalise),
+        "explanation": " ".join(_unique([o["explanation"] for o in outputs], key=_normalise)),
+    }
+
+
+async def _reduce_triage(outputs: List[Dict]) -> Dict:
+    # The most urgent part of a ticket decides its routing.
+    return max(outputs, key=lambda o: URGENCY_RANK.get(o["urgency"].lower(), 0))
+
+
+async def _reduce_qa(outputs: List[Dict]) -> Dict:
+    return {"qa_pairs": _unique([qa for o in outputs for qa in o["qa_pairs"]], key=lambda qa: _normalise(qa["question"]))}
+
+
+REDUCERS = {
+    "meeting_note": _reduce_summaries,
+    "contract": _reduce_risks,
+    "support_ticket": _reduce_triage,
+    "knowledge_base": _reduce_qa,
+}
+
+
+async def process_long_document(chunks: List[str]) -> Dict[str, Any]:
+    """
+    Classify from a sample, map the routed tool over chunk batches and reduce.
+
+    Args:
+        chunks (List[str]): The document's chunk texts, in order
+
+    Returns:
+        Dict[str, Any]: {"task", "output", "agent_trace"} like the agent pipeline
+    """
+    sample = sample_chunks(chunks)
+    trace = {"mode": "map_reduce", "chunks": len(chunks), "classified_from": len(sample)}
+
+    try:
+        raw = await classify_chain.ainvoke({"text": "\n".join(sample)})
+    except Exception as e:
+        logger.exception("[LongDoc] Classification failed.")
+        return {"task": None, "output": {"error": f"Classification failed: {str(e)}"}, "agent_trace": trace}
+    label = match_label(raw)
+    if label is None:
+        return {"task": raw, "output": {"error": f"Unknown classification result: {raw}"}, "agent_trace": trace}
+
+    tool = route_to_tool(label)
+    batches = batch_chunks(chunks)
+    results = await asyncio.gather(
+        *[tool.ainvoke({"text": batch}) for batch in batches], return_exceptions=True
+    )
+    outputs = [r for r in results if not isinstance(r, BaseException)]
+    trace.update({"routed_tool": label, "batches": len(batches), "failed_batches": len(batches) - len(outputs)})
+    for r in results:
+        if isinstance(r, BaseException):
+            logger.warning(f"[LongDoc] Batch failed for '{label}': {r}")
+
+    if not outputs:
+        return {"task": label, "output": {"error": "Tool execution failed for every batch"}, "agent_trace": trace}
+    try:
+        output = outputs[0] if len(outputs) == 1 else await REDUCERS[label](outputs)
+    except Exception as e:
+        logger.exception("[LongDoc] Reduce step failed.")
+        output = {"error": f"Reduce failed: {str(e)}"}
+
+    logger.info(f"[LongDoc] {len(chunks)} chunks → {len(batches)} '{label}' batches → 1 result.")
+    return {"task": label, "output": output, "agent_trace": trace}
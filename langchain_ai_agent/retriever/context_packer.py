@@ -0,0 +1,145 @@
+# langchain_ai_agent/retriever/context_packer.py
+'''
+Context assembly between retrieval and the stuff-documents chain.
+
+Retrieved chunks are merged when they are neighbours in the same file (their
+shared chunk_overlap text is kept once), near-duplicates are dropped, and the
+result is cut to a token budget, most relevant first. The LLM sees less
+repeated text and a bounded prompt.
+'''
+
+import os
+import re
+import logging
+from typing import Dict, List, Optional, Set
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# Rough English average; avoids a tokenizer round trip for the hosted model.
+CHARS_PER_TOKEN = 4
+# Longest chunk overlap searched for when merging neighbours (chars).
+MAX_OVERLAP = 200
+DUPLICATE_THRESHOLD = 0.8
+# A truncated tail shorter than this is not worth including.
+MIN_TAIL_TOKENS = 50
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _join_overlapping(left: str, right: str) -> str:
+    for size in range(min(len(left), len(right), MAX_OVERLAP), 0, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left + "\n" + right
+
+
+def _shingles(text: str) -> Set[str]:
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+
+
+def _merge_neighbours(docs: List[Document]) -> List[Document]:
+    """
+    Merge chunks of the same file with consecutive chunk_ids. A merged block
+    takes the position of its best-ranked member.
+    """
+    groups: Dict[str, List[int]] = {}
+    for rank, doc in enumerate(docs):
+        source = doc.metadata.get("doc_path") or doc.metadata.get("filename")
+        if source is None or doc.metadata.get("chunk_id") is None:
+            groups[f"#{rank}"] = [rank]
+        else:
+            groups.setdefault(source, []).append(rank)
+
+    blocks = []
+    for ranks in groups.values():
+        ranks.sort(key=lambda r: docs[r].metadata.get("chunk_id", 0))
+        run = [ranks[0]]
+        for rank in ranks[1:] + [None]:
+            previous = docs[run[-1]].metadata.get("chunk_id")
+            if rank is not None and docs[rank].metadata.get("chunk_id") == previous + 1:
+                run.append(rank)
+                continue
+            text = docs[run[0]].page_content
+            for member in run[1:]:
+                text = _join_overlapping(text, docs[member].page_content)
+            metadata = dict(docs[run[0]].metadata)
+            if len(run) > 1:
+                metadata["chunk_ids"] = [docs[r].metadata["chunk_id"] for r in run]
+            blocks.append((min(run), Document(page_content=text, metadata=metadata)))
+            if rank is not None:
+                run = [rank]
+
+    return [doc for _, doc in sorted(blocks, key=lambda block: block[0])]
+
+
+def _drop_near_duplicates(docs: List[Document]) -> List[Document]:
+    kept, kept_shingles = [], []
+    for doc in docs:
+        shingles = _shingles(doc.page_content)
+        duplicate = any(
+            len(shingles & other) / max(len(shingles | other), 1) >= DUPLICATE_THRESHOLD
+            for other in kept_shingles
+        )
+        if not duplicate:
+            kept.append(doc)
+            kept_shingles.append(shingles)
+    return kept
+
+
+def _truncate(text: str, tokens: int) -> str:
+    cut = text[:tokens * CHARS_PER_TOKEN]
+    boundary = cut.rfind(" ")
+    return (cut[:boundary] if boundary > 0 else cut) + " …"
+
+
+def pack_context(docs: List[Document], token_budget: int = DEFAULT_TOKEN_BUDGET) -> List[Document]:
+    """
+    Merge neighbouring chunks, drop near-duplicates and fit to a token budget.
+
+    Args:
+        docs (List[Document]): Retrieved documents, most relevant first
+        token_budget (int): Approximate token limit for all returned text
+
+    Returns:
+        List[Document]: Packed documents, most relevant first
+    """
+    if not docs:
+        return []
+    packed = _drop_near_duplicates(_merge_neighbours(docs))
+
+    result, used = [], 0
+    for doc in packed:
+        tokens = estimate_tokens(doc.page_content)
+        if used + tokens <= token_budget:
+            result.append(doc)
+            used += tokens
+            continue
+        remaining = token_budget - used
+        if remaining >= MIN_TAIL_TOKENS:
+            result.append(Document(
+                page_content=_truncate(doc.page_content, remaining), metadata={**doc.metadata, "truncated": True}
+            ))
+            used = token_budget
+        break
+
+    logger.info(
+        f"[Context] Packed {len(docs)} chunks into {len(result)} blocks (~{used}/{token_budget} tokens)."
+    )
+    return result
+
+
+def get_context_packer(token_budget: Optional[int] = None) -> RunnableLambda:
+    """
+    Runnable to pipe after a retriever: `retriever | get_context_packer()`.
+    """
+    budget = token_budget or DEFAULT_TOKEN_BUDGET
+    return RunnableLambda(lambda docs: pack_context(docs, budget), name="ContextPacker")
@@ -0,0 +1,220 @@
+# langchain_ai_agent/retriever/docstore.py
+'''
+Columnar chunk store written at each checkpoint, replacing the pickled index.pkl.
+
+All documents of a namespace live in one file, `chunks.bin`, laid out as flat
+arrays: the texts are a single UTF-8 blob addressed by an offsets array,
+doc ids are a fixed-width array (plus a sorted copy for id lookups), and each
+metadata key is an int32 column of codes into one table of interned values.
+The file is memory-mapped, so opening it costs nothing and a Document is only
+built for the rows a search actually returns.
+'''
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Set, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+CHUNKS_FILENAME = "chunks.bin"
+
+_MAGIC = b"CHUNKS01"
+_ALIGN = 8
+
+
+def _blob(values: List[bytes]):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(values), dtype=np.uint8)
+
+
+def write_chunks(path: Path, docstore: Docstore, index_to_docstore_id: Mapping[int, str]) -> None:
+    """
+    Write every document, in FAISS row order, to a chunk file at `path`.
+
+    Args:
+        path (Path): Target file; written in place, so pass a staging path
+        docstore (Docstore): Source of the documents
+        index_to_docstore_id (Mapping[int, str]): FAISS row -> docstore id
+    """
+    n = len(index_to_docstore_id)
+    texts: List[bytes] = []
+    ids: List[bytes] = []
+    interned: Dict[str, int] = {}
+    columns: Dict[str, np.ndarray] = {}
+
+    for row, position in enumerate(sorted(index_to_docstore_id)):
+        doc_id = index_to_docstore_id[position]
+        doc = docstore.search(doc_id)
+        texts.append(doc.page_content.encode("utf-8"))
+        ids.append(doc_id.encode("utf-8"))
+        for key, value in doc.metadata.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = np.full(n, -1, dtype=np.int32)
+            encoded = json.dumps(value, sort_keys=True)
+            column[row] = interned.setdefault(encoded, len(interned))
+
+    width = max((len(i) for i in ids), default=1)
+    id_array = np.array(ids, dtype=f"S{width}")
+    order = np.argsort(id_array, kind="stable")
+    text_offsets, text_data = _blob(texts)
+    value_offsets, value_data = _blob([v.encode("utf-8") for v in interned])
+
+    sections = {
+        "text_offsets": text_offsets,
+        "text_data": text_data,
+        "ids": id_array,
+        "ids_sorted": id_array[order],
+        "ids_sorted_rows": order.astype(np.int64),
+        "value_offsets": value_offsets,
+        "value_data": value_data,
+        **{f"meta:{key}": column for key, column in columns.items()},
+    }
+
+    layout, cursor = {}, 0
+    for name, array in sections.items():
+        layout[name] = {"offset": cursor, "dtype": array.dtype.str, "shape": list(array.shape)}
+        cursor += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({"count": n, "sections": layout}).encode("utf-8")
+    header += b" " * (-len(header) % _ALIGN)
+
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(np.int64(len(header)).tobytes())
+        f.write(header)
+        for name, array in sections.items():
+            data = np.ascontiguousarray(array).tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % _ALIGN))
+
+
+class ColumnarChunks:
+    """
+    Read-only, memory-mapped view over a chunk file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if bytes(buffer[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"[Chunks] {self.path} is not a chunk file.")
+        header_len = int(buffer[8:16].view(np.int64)[0])
+        header = json.loads(bytes(buffer[16:16 + header_len]))
+        base = 16 + header_len
+
+        arrays = {}
+        for name, spec in header["sections"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            start = base + spec["offset"]
+            arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+        self.count = header["count"]
+        self._text_offsets = arrays["text_offsets"]
+        self._text_data = arrays["text_data"]
+        self._ids = arrays["ids"]
+        self._ids_sorted = arrays["ids_sorted"]
+        self._ids_sorted_rows = arrays["ids_sorted_rows"]
+        self._value_offsets = arrays["value_offsets"]
+        self._value_data = arrays["value_data"]
+        self._columns = {
+            name[len("meta:"):]: array for name, array in arrays.items() if name.startswith("meta:")
+        }
+        # Interned values are decoded once; there are few of them (filenames, types, ...).
+        self._values: Dict[int, object] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def doc_id(self, row: int) -> str:
+        return self._ids[row].decode("utf-8")
+
+    def rows(self, doc_ids: Sequence[str]) -> np.ndarray:
+        """
+        Rows of the given doc ids, skipping ids not in the file.
+        """
+        if not len(doc_ids) or not self.count:
+            return np.empty(0, dtype=np.int64)
+        keys = np.array([doc_id.encode("utf-8") for doc_id in doc_ids], dtype=self._ids_sorted.dtype)
+        idx = np.searchsorted(self._ids_sorted, keys)
+        idx[idx == self.count] = 0
+        found = self._ids_sorted[idx] == keys
+        return self._ids_sorted_rows[idx[found]]
+
+    def _value(self, code: int):
+        if code not in self._values:
+            start, end = self._value_offsets[code], self._value_offsets[code + 1]
+            self._values[code] = json.loads(bytes(self._value_data[start:end]).decode("utf-8"))
+        return self._values[code]
+
+    def document(self, row: int) -> Document:
+        start, end = self._text_offsets[row], self._text_offsets[row + 1]
+        metadata = {}
+        for key, column in self._columns.items():
+            code = int(column[row])
+            if code >= 0:
+                metadata[key] = self._value(code)
+        return Document(
+            id=self.doc_id(row),
+            page_content=bytes(self._text_data[start:end]).decode("utf-8"),
+            metadata=metadata,
+        )
+
+
+class ChunkDocstore(Docstore, AddableMixin):
+    """
+    LangChain docstore over a ColumnarChunks file, with an in-memory overlay
+    for documents added or deleted since that file was written.
+    """
+
+    def __init__(self, chunks: Optional[ColumnarChunks] = None):
+        self.chunks = chunks
+        self._added: Dict[str, Document] = {}
+        self._deleted: Set[str] = set()
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search in self._added:
+            return self._added[search]
+        if self.chunks is not None and search not in self._deleted:
+            rows = self.chunks.rows([search])
+            if len(rows):
+                return self.chunks.document(int(rows[0]))
+        return f"ID {search} not found."
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        self._added.update(texts)
+        self._deleted.difference_update(texts)
+
+    def delete(self, ids: List) -> None:
+        for doc_id in ids:
+            if self._added.pop(doc_id, None) is None:
+                self._deleted.add(doc_id)
+
+
+class RowMap(Mapping):
+    """
+    Lazy FAISS row -> docstore id mapping over a chunk file, used as a
+    read-only store's index_to_docstore_id.
+    """
+
+    def __init__(self, chunks: ColumnarChunks):
+        self._chunks = chunks
+
+    def __getitem__(self, row: int) -> str:
+        if not 0 <= row < len(self._chunks):
+            raise KeyError(row)
+        return self._chunks.doc_id(row)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._chunks)))
+
+    def __len__(self) -> int:
+        return len(self._chunks)
@@ -0,0 +1,221 @@
+# langchain_ai_agent/retriever/embedding_cache.py
+'''
+Content-addressed, on-disk embedding cache.
+
+Vectors are keyed by (model_name, sha256(text)), so identical text is embedded
+once no matter which file, namespace or store it comes from. Each model gets
+its own directory holding a memory-mapped float32 matrix (one row per slot)
+and a small SQLite index mapping keys to slots with LRU timestamps.
+
+Several processes share the files. Writers take SQLite's write lock. Each slot
+also has a generation counter in a second memory-mapped file, bumped to an odd
+value while its row is rewritten and to the next even value when done. A
+reader keeps a row only if the slot's generation matches the one in the index
+before and after the copy, so it never returns a vector a concurrent writer
+is putting into a reused slot.
+'''
+
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent LRU cache of embedding vectors for a single model.
+    The matrix is allocated on the first `put`, once the vector size is known.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, max_entries: int = 200_000):
+        """
+        Args:
+            cache_dir (str): Root directory for all model caches
+            model_name (str): Embedding model the vectors belong to
+            max_entries (int): Capacity in vectors; least recently used are evicted
+        """
+        self.model_name = model_name
+        self.dir = Path(cache_dir) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._vectors_file = self.dir / "vectors.f32"
+        self._generations_file = self.dir / "generations.u64"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.dir / "index.db"), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL UNIQUE,
+                last_used REAL NOT NULL,
+                generation INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if "generation" not in columns:
+            # Caches created before slot generations; their rows were written with none.
+            self._conn.execute("ALTER TABLE entries ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+        # Capacity is fixed by whoever created the matrix first.
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('capacity', ?)", (max_entries,))
+        self._conn.commit()
+        self.max_entries = self._meta("capacity")
+        self.dim = self._meta("dim")
+        self._matrix: Optional[np.memmap] = None
+        self._generations: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _meta(self, name: str) -> Optional[int]:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _open_matrix(self, dim: int) -> np.memmap:
+        # Caller holds SQLite's write lock, so only one process creates the files.
+        if self._matrix is None:
+            mode = "r+" if self._vectors_file.exists() else "w+"
+            self._matrix = np.memmap(
+                self._vectors_file, dtype=np.float32, mode=mode, shape=(self.max_entries, dim)
+            )
+            mode = "r+" if self._generations_file.exists() else "w+"
+            self._generations = np.memmap(
+                self._generations_file, dtype=np.uint64, mode=mode, shape=(self.max_entries,)
+            )
+            if self.dim is None:
+                # Committed by the caller, together with its entries.
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (dim,))
+                self.dim = dim
+        return self._matrix
+
+    def _lookup_slots(self, keys: Sequence[str]) -> Dict[str, Tuple[int, int]]:
+        slots = {}
+        unique = list(dict.fromkeys(keys))
+        # Stay under SQLite's bound-parameter limit.
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            slots.update(
+                (key, (slot, generation)) for key, slot, generation in self._conn.execute(
+                    f"SELECT key, slot, generation FROM entries WHERE key IN ({placeholders})", batch
+                )
+            )
+        return slots
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached vectors.
+
+        Returns:
+            List[Optional[List[float]]]: Vector per text, None on a miss
+        """
+        keys = [text_key(t) for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        with self._lock:
+            if self._matrix is None:
+                # Another process may have written the first vectors since this one opened.
+                self.dim = self.dim or self._meta("dim")
+                if self.dim is None:
+                    self.misses += len(texts)
+                    return results
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._open_matrix(self.dim)
+                self._conn.commit()
+
+            # One snapshot of the index; rows are copied while it is held.
+            self._conn.execute("BEGIN")
+            try:
+                slots = self._lookup_slots(keys)
+                rows = {}
+                for key, (slot, generation) in slots.items():
+                    if self._generations[slot] != generation:
+                        continue
+                    row = np.array(self._matrix[slot])
+                    # A writer reusing the slot bumps its generation before touching the row.
+                    if self._generations[slot] == generation:
+                        rows[key] = row
+            finally:
+                self._conn.commit()
+
+            if rows:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in rows]
+                )
+                self._conn.commit()
+            for i, key in enumerate(keys):
+                if key in rows:
+                    results[i] = rows[key].tolist()
+
+        hit_count = sum(r is not None for r in results)
+        self.hits += hit_count
+        self.misses += len(texts) - hit_count
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Store vectors, evicting the least recently used entries when full.
+        """
+        if not texts:
+            return
+        new = {text_key(t): v for t, v in zip(texts, vectors)}
+
+        with self._lock:
+            try:
+                # Other processes (API workers, the ingestion CLI) share the files:
+                # take SQLite's write lock before choosing slots and writing vectors,
+                # so no two writers can claim the same slot.
+                self._conn.execute("BEGIN IMMEDIATE")
+                self.dim = self.dim or self._meta("dim")
+                matrix = self._open_matrix(self.dim or len(next(iter(new.values()))))
+                generations = self._generations
+                existing = self._lookup_slots(list(new))
+                pending = [k for k in new if k not in existing][: self.max_entries]
+                if not pending:
+                    self._conn.commit()
+                    return
+                # Slots are handed out densely and evicted slots are reused right
+                # away, so the free ones are always [count, capacity).
+                count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                free_slots = list(range(count, min(self.max_entries, count + len(pending))))
+                shortfall = len(pending) - len(free_slots)
+                if shortfall > 0:
+                    evicted = self._conn.execute(
+                        "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (shortfall,)
+                    ).fetchall()
+                    self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in evicted])
+                    free_slots.extend(slot for _, slot in evicted)
+                    logger.info(f"[EmbeddingCache] Evicted {len(evicted)} LRU vectors.")
+
+                now = time.time()
+                rows = []
+                for key, slot in zip(pending, free_slots):
+                    # Odd while the row is being rewritten, so readers of the old entry back off.
+                    generation = int(generations[slot]) + 1 + int(generations[slot]) % 2
+                    generations[slot] = generation
+                    matrix[slot] = np.asarray(new[key], dtype=np.float32)
+                    generations[slot] = generation + 1
+                    rows.append((key, slot, now, generation + 1))
+                matrix.flush()
+                generations.flush()
+                self._conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?)", rows)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
@@ -0,0 +1,235 @@
+# langchain_ai_agent/retriever/embeddings.py
+'''
+Process-wide embedding service.
+
+Every DocumentEmbedder namespace and the MemoryStore embed with the same
+sentence-transformer, so the weights are loaded once (lazily, on first use)
+and shared by all of them. Concurrent embed calls are coalesced into
+micro-batches on a worker thread, so the FastAPI event loop never runs the
+model and throughput grows with concurrency.
+'''
+
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from langchain_ai_agent.retriever.embedding_cache import EmbeddingCache
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+DEFAULT_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+# Set to 0 to disable the on-disk vector cache.
+DEFAULT_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "200000"))
+
+
+class EmbeddingBatcher:
+    """
+    Collects embed requests from any thread into micro-batches.
+
+    A single daemon worker takes the first pending text, waits up to
+    `max_wait_ms` for more (never more than `max_batch_size`), embeds the
+    batch in one model call and resolves each caller's Future.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = DEFAULT_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS
+    ):
+        """
+        Args:
+            embed_fn (Callable): Embeds a list of texts in one call
+            max_batch_size (int): Upper bound on texts per model call
+            max_wait_ms (float): How long the first request waits for company
+        """
+        self.embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        """
+        Enqueue texts for embedding.
+
+        Returns:
+            List[Future]: One Future per text resolving to its vector
+        """
+        self._ensure_worker()
+        futures = []
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return futures
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Drain whatever is already queued even after the deadline.
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            # Skip callers that cancelled (e.g. a disconnected request) while queued.
+            batch = [item for item in self._next_batch() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            # Identical texts in the same window are embedded once.
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(unique_texts, self.embed_fn(unique_texts)))
+            except Exception as e:
+                logger.error(f"[Embeddings] Batch of {len(unique_texts)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+
+class SharedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings backed by a single lazily loaded HuggingFace model.
+    Safe to hand to any number of FAISS stores.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str,
+        batch_size: int,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        cache: Optional[EmbeddingCache] = None
+    ):
+        """
+        Args:
+            model_name (str): Name of sentence-transformer model to use
+            device (str): Torch device for the model, e.g. "cpu" or "cuda"
+            batch_size (int): Encode batch size and micro-batch upper bound
+            max_wait_ms (float): Coalescing window for concurrent requests
+            cache (Optional[EmbeddingCache]): Consulted before calling the model
+        """
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.cache = cache
+        self._model: Optional[HuggingFaceEmbeddings] = None
+        self._lock = threading.Lock()
+        self.batcher = EmbeddingBatcher(
+            self._embed_batch, max_batch_size=batch_size, max_wait_ms=max_wait_ms
+        )
+
+    @property
+    def model(self) -> HuggingFaceEmbeddings:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"[Embeddings] Loading '{self.model_name}' on {self.device}.")
+                    self._model = HuggingFaceEmbeddings(
+                        model_name=self.model_name,
+                        model_kwargs={"device": self.device},
+                        encode_kwargs={"batch_size": self.batch_size},
+                    )
+        return self._model
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self.model.embed_documents(texts)
+
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            computed = self.model.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            try:
+                self.cache.put_many([texts[i] for i in missing], computed)
+            except Exception as e:
+                logger.warning(f"[Embeddings] Failed to write embedding cache: {e}")
+        return vectors
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        return self.batcher.submit(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [future.result() for future in self.submit(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit([text])[0].result()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*[asyncio.wrap_future(f) for f in self.submit(texts)]))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit([text])[0])
+
+
+_services: Dict[Tuple[str, str], SharedEmbeddings] = {}
+_services_lock = threading.Lock()
+
+
+def get_embeddings(
+    model_name: str = DEFAULT_MODEL_NAME,
+    device: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> SharedEmbeddings:
+    """
+    Return the shared embedding service for a model, creating it on first call.
+
+    Args:
+        model_name (str): Name of sentence-transformer model to use
+        device (Optional[str]): Overrides EMBEDDING_DEVICE for a new service
+        batch_size (Optional[int]): Overrides EMBEDDING_BATCH_SIZE for a new service
+
+    Returns:
+        SharedEmbeddings: One instance per (model_name, device) in the process
+    """
+    device = device or DEFAULT_DEVICE
+    key = (model_name, device)
+    with _services_lock:
+        if key not in _services:
+            cache = (
+                EmbeddingCache(DEFAULT_CACHE_DIR, model_name, max_entries=DEFAULT_CACHE_SIZE)
+                if DEFAULT_CACHE_SIZE > 0 else None
+            )
+            _services[key] = SharedEmbeddings(
+                model_name=model_name,
+                device=device,
+                batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                cache=cache,
+            )
+        return _services[key]
@@ -0,0 +1,179 @@
+# langchain_ai_agent/retriever/index_factory.py
+'''
+Per-namespace FAISS index types.
+
+A namespace starts as an exact flat index. Its `index_config.json` can select
+HNSW, IVF-Flat or IVF-PQ instead; IVF variants are trained on a sample of the
+stored vectors once enough exist. Search-time knobs (nprobe, efSearch) are
+applied on load and can be changed without rebuilding.
+'''
+
+import json
+import math
+import logging
+from pathlib import Path
+from typing import Literal, Optional
+
+import faiss
+import numpy as np
+from pydantic import BaseModel
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+INDEX_CONFIG_FILENAME = "index_config.json"
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Vectors are re-added in blocks so a rebuild never holds two full copies in memory.
+_ADD_BLOCK = 65536
+
+
+class IndexConfig(BaseModel):
+    """
+    Index settings for one namespace.
+    """
+    index_type: Literal["flat", "hnsw", "ivf_flat", "ivf_pq"] = "flat"
+    # HNSW
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    # IVF; nlist defaults to ~4*sqrt(N) at training time
+    nlist: Optional[int] = None
+    nprobe: int = 16
+    min_train_vectors: int = 10_000
+    train_sample: int = 100_000
+    # PQ; pq_m must divide the embedding dimension
+    pq_m: int = 16
+    pq_bits: int = 8
+
+    @classmethod
+    def load(cls, persist_dir: Path) -> "IndexConfig":
+        path = Path(persist_dir) / INDEX_CONFIG_FILENAME
+        if not path.exists():
+            return cls()
+        with open(path, "r") as f:
+            return cls(**json.load(f))
+
+    def save(self, persist_dir: Path) -> None:
+        with open(Path(persist_dir) / INDEX_CONFIG_FILENAME, "w") as f:
+            json.dump(self.model_dump(), f, indent=2)
+
+    def ready_to_build(self, ntotal: int) -> bool:
+        """
+        Whether a namespace with `ntotal` vectors has enough data to build this index type.
+        """
+        if self.index_type in ("flat", "hnsw"):
+            return True
+        return ntotal >= self.min_train_vectors
+
+
+def index_kind(index: faiss.Index) -> str:
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def _factory_string(config: IndexConfig, ntotal: int) -> str:
+    if config.index_type == "hnsw":
+        return f"HNSW{config.hnsw_m},Flat"
+    if config.index_type in ("ivf_flat", "ivf_pq"):
+        # At least ~39 training points per centroid, per FAISS' k-means guidance.
+        nlist = config.nlist or int(4 * math.sqrt(ntotal))
+        nlist = max(1, min(nlist, ntotal // 39 or 1))
+        if config.index_type == "ivf_flat":
+            return f"IVF{nlist},Flat"
+        return f"IVF{nlist},PQ{config.pq_m}x{config.pq_bits}"
+    return "Flat"
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig) -> None:
+    """
+    Set the default nprobe / efSearch used by unparameterised searches.
+    """
+    kind = index_kind(index)
+    if kind == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = config.ef_search
+    elif kind in ("ivf_flat", "ivf_pq"):
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = config.nprobe
+        # Needed for reconstruct(), which deletes and exact filtered search rely on.
+        if ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+
+
+def search_parameters(
+    index: faiss.Index,
+    config: IndexConfig,
+    selector: faiss.IDSelector,
+    selectivity: float
+) -> faiss.SearchParameters:
+    """
+    Search parameters carrying an ID selector. When only a fraction of the
+    index is allowed, nprobe / efSearch are widened proportionally so a
+    filtered query explores about as many allowed vectors as an unfiltered one.
+
+    Args:
+        index (faiss.Index): Index being searched
+        config (IndexConfig): Namespace settings
+        selector (faiss.IDSelector): Allowed rows
+        selectivity (float): Allowed rows / total rows, in (0, 1]
+    """
+    boost = 1.0 / max(selectivity, 1e-6)
+    kind = index_kind(index)
+    if kind == "hnsw":
+        ef_search = int(min(config.ef_search * boost, max(config.ef_search, index.ntotal)))
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+    if kind in ("ivf_flat", "ivf_pq"):
+        nlist = faiss.extract_index_ivf(index).nlist
+        return faiss.SearchParametersIVF(sel=selector, nprobe=int(min(nlist, math.ceil(config.nprobe * boost))))
+    return faiss.SearchParameters(sel=selector)
+
+
+def build_index(source: faiss.Index, config: IndexConfig) -> faiss.Index:
+    """
+    Build a new index of the configured type holding the same vectors, in the
+    same order, as `source`. IVF indexes are trained on a random sample.
+
+    Args:
+        source (faiss.Index): Existing index; must support reconstruct
+        config (IndexConfig): Target settings
+
+    Returns:
+        faiss.Index: Populated index whose row i equals row i of `source`
+    """
+    ntotal = source.ntotal
+    spec = _factory_string(config, ntotal)
+    index = faiss.index_factory(source.d, spec, source.metric_type)
+    if config.index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = config.ef_construction
+
+    if not index.is_trained:
+        sample_size = min(ntotal, config.train_sample)
+        sample = np.sort(np.random.default_rng(0).choice(ntotal, sample_size, replace=False)).astype(np.int64)
+        logger.info(f"[IndexFactory] Training {spec} on {sample_size} of {ntotal} vectors.")
+        index.train(source.reconstruct_batch(sample))
+
+    apply_search_params(index, config)
+    for start in range(0, ntotal, _ADD_BLOCK):
+        index.add(source.reconstruct_n(start, min(_ADD_BLOCK, ntotal - start)))
+    logger.info(f"[IndexFactory] Built {spec} index with {index.ntotal} vectors.")
+    return index
+
+
+def rebuild_without(index: faiss.Index, keep: np.ndarray) -> faiss.Index:
+    """
+    Copy of a trained index holding only the rows in `keep`, renumbered 0..len(keep)-1.
+    Used for deletes on index types that cannot remove ids in place. The
+    coarse quantizer is reused, so IVF indexes are not retrained.
+    """
+    rebuilt = faiss.clone_index(index)
+    rebuilt.reset()
+    for start in range(0, len(keep), _ADD_BLOCK):
+        rebuilt.add(index.reconstruct_batch(keep[start:start + _ADD_BLOCK]))
+    return rebuilt
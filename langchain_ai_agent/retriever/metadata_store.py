@@ -0,0 +1,291 @@
+# langchain_ai_agent/retriever/metadata_store.py
+'''
+Indexed chunk metadata for a namespace.
+
+Replaces the append-only metadata.jsonl, which had to be read in full on every
+ingest. Rows live in SQLite with indexes on (filename, chunk_id), doc_path
+and source_type, so dedup lookups, per-file deletes and filtered scans touch
+only the rows they need.
+
+Chunk texts are also kept in an FTS5 table, an inverted index updated with
+every add and delete, which provides BM25 keyword search for exact terms such
+as contract numbers or error codes that dense embeddings tend to miss.
+'''
+
+import re
+import json
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+METADATA_DB_FILENAME = "metadata.db"
+FILTERABLE_FIELDS = ("chunk_id", "filename", "source_type", "doc_path")
+
+# SQLite's default limit on bound parameters is 999 on older builds.
+_MAX_PARAMS = 500
+
+
+def _batches(items: List, size: int = _MAX_PARAMS) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _match_query(text: str) -> str:
+    """
+    FTS5 query matching any word of `text`. Words the tokenizer would split,
+    like INV-2023-001, become phrases so their parts must appear in order.
+    """
+    terms = []
+    for word in text.split():
+        parts = re.findall(r"\w+", word)
+        if parts:
+            terms.append('"' + " ".join(parts) + '"')
+    return " OR ".join(dict.fromkeys(terms))
+
+
+def _filter_clauses(filters: Dict[str, object], alias: str = "") -> Tuple[List[str], List]:
+    clauses, params = [], []
+    for field, value in filters.items():
+        if field not in FILTERABLE_FIELDS:
+            raise ValueError(f"[Metadata] Unsupported filter field: {field}")
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        clauses.append(f"{alias}{field} IN ({','.join('?' * len(values))})")
+        params.extend(values)
+    return clauses, params
+
+
+class ChunkMetadataStore:
+    """
+    SQLite-backed table of chunk metadata keyed by docstore id.
+    """
+
+    def __init__(self, persist_dir: Path):
+        """
+        Args:
+            persist_dir (Path): Namespace directory that holds metadata.db
+        """
+        self.db_path = Path(persist_dir) / METADATA_DB_FILENAME
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS chunks (
+                doc_id TEXT PRIMARY KEY,
+                chunk_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                doc_path TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_key ON chunks(filename, chunk_id);
+            CREATE INDEX IF NOT EXISTS idx_chunks_doc_path ON chunks(doc_path);
+            CREATE INDEX IF NOT EXISTS idx_chunks_source_type ON chunks(source_type);
+            -- Rows share the rowid of their chunks row.
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text);
+            """
+        )
+        self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def keyword_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks_fts").fetchone()[0]
+
+    def add(self, records: List[Dict], texts: Optional[List[str]] = None) -> None:
+        """
+        Insert metadata rows. Each record needs a `doc_id` plus the chunk fields.
+
+        Args:
+            records (List[Dict]): Chunk metadata with doc_id
+            texts (Optional[List[str]]): Chunk texts, aligned with records, for keyword search
+        """
+        rows = [
+            (r["doc_id"], r["chunk_id"], r["filename"], r["source_type"], r["doc_path"])
+            for r in records
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)", rows)
+            if texts is not None:
+                self._insert_keywords([r["doc_id"] for r in records], texts)
+            self._conn.commit()
+
+    def add_keywords(self, doc_ids: List[str], texts: List[str]) -> None:
+        """
+        Add texts to the keyword index only, e.g. to backfill chunks indexed before it existed.
+        """
+        with self._lock:
+            self._insert_keywords(doc_ids, texts)
+            self._conn.commit()
+
+    def _insert_keywords(self, doc_ids: List[str], texts: List[str]) -> None:
+        self._conn.executemany(
+            "INSERT INTO chunks_fts (rowid, text) SELECT rowid, ? FROM chunks WHERE doc_id = ?",
+            [(text, doc_id) for doc_id, text in zip(doc_ids, texts)]
+        )
+
+    def keyword_search(
+        self,
+        query: str,
+        k: int,
+        filters: Optional[Dict[str, object]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        BM25-ranked keyword search over chunk texts, restricted to chunks matching `filters`.
+
+        Args:
+            query (str): Free-text query
+            k (int): Number of results
+            filters (Optional[Dict[str, object]]): Same format as `filter_ids`
+
+        Returns:
+            List[Tuple[str, float]]: (doc_id, bm25 score) pairs, best first; lower scores are better
+        """
+        match = _match_query(query)
+        if not match:
+            return []
+        sql = "SELECT c.doc_id, bm25(chunks_fts) AS score FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid"
+        clauses, params = ["chunks_fts MATCH ?"], [match]
+        if filters:
+            extra, extra_params = _filter_clauses(filters, alias="c.")
+            clauses += extra
+            params += extra_params
+        sql += " WHERE " + " AND ".join(clauses) + " ORDER BY score LIMIT ?"
+        params.append(int(k))
+        with self._lock:
+            return [(row[0], row[1]) for row in self._conn.execute(sql, params)]
+
+    def existing_keys(self, keys: Iterable[Tuple[int, str]]) -> Set[Tuple[int, str]]:
+        """
+        Return which (chunk_id, doc_path) keys are already indexed, using the doc_path index.
+        """
+        keys = set(keys)
+        doc_paths = sorted({doc_path for _, doc_path in keys})
+        found = set()
+        with self._lock:
+            for batch in _batches(doc_paths):
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT chunk_id, doc_path FROM chunks WHERE doc_path IN ({placeholders})", batch
+                ).fetchall())
+        return keys & found
+
+    def ids_for_files(self, doc_paths: Iterable[str]) -> List[str]:
+        doc_paths = list(doc_paths)
+        ids = []
+        with self._lock:
+            for batch in _batches(doc_paths):
+                placeholders = ",".join("?" * len(batch))
+                ids.extend(row[0] for row in self._conn.execute(
+                    f"SELECT doc_id FROM chunks WHERE doc_path IN ({placeholders})", batch
+                ))
+        return ids
+
+    def delete_files(self, doc_paths: Iterable[str]) -> int:
+        """
+        Delete all rows for the given files.
+
+        Returns:
+            int: Number of rows removed
+        """
+        doc_paths = list(doc_paths)
+        removed = 0
+        with self._lock:
+            for batch in _batches(doc_paths):
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(
+                    f"DELETE FROM chunks_fts WHERE rowid IN "
+                    f"(SELECT rowid FROM chunks WHERE doc_path IN ({placeholders}))", batch
+                )
+                removed += self._conn.execute(
+                    f"DELETE FROM chunks WHERE doc_path IN ({placeholders})", batch
+                ).rowcount
+            self._conn.commit()
+        return removed
+
+    def filter_ids(self, filters: Dict[str, object], limit: Optional[int] = None) -> List[str]:
+        """
+        Scan doc_ids matching all filters. A filter value may be a scalar or a
+        list of allowed values.
+
+        Args:
+            filters (Dict[str, object]): Field name -> value(s), fields from FILTERABLE_FIELDS
+            limit (Optional[int]): Stop after this many ids
+
+        Returns:
+            List[str]: Matching docstore ids
+        """
+        clauses, params = _filter_clauses(filters)
+        sql = "SELECT doc_id FROM chunks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+
+    def count_matching(self, filters: Dict[str, object]) -> int:
+        """
+        Number of chunks matching all filters, answered from the column indexes
+        without materialising their ids.
+        """
+        clauses, params = _filter_clauses(filters)
+        sql = "SELECT COUNT(*) FROM chunks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def matching_ids(self, doc_ids: Iterable[str], filters: Dict[str, object]) -> Set[str]:
+        """
+        Subset of `doc_ids` matching all filters, e.g. to post-filter search hits.
+
+        Args:
+            doc_ids (Iterable[str]): Candidate docstore ids
+            filters (Dict[str, object]): Field name -> value(s), as in `filter_ids`
+
+        Returns:
+            Set[str]: Candidates that satisfy the filters
+        """
+        clauses, params = _filter_clauses(filters)
+        where = "".join(f" AND {clause}" for clause in clauses)
+        found: Set[str] = set()
+        with self._lock:
+            for batch in _batches(list(dict.fromkeys(doc_ids))):
+                found.update(row[0] for row in self._conn.execute(
+                    f"SELECT doc_id FROM chunks WHERE doc_id IN ({','.join('?' * len(batch))}){where}",
+                    (*batch, *params)
+                ))
+        return found
+
+    def migrate_jsonl(self, jsonl_path: Path, id_lookup: Dict[Tuple[int, str], str]) -> int:
+        """
+        One-time import of a legacy metadata.jsonl. Records did not carry the
+        docstore id, so it is recovered from the loaded index via `id_lookup`,
+        keyed on (chunk_id, doc_path) like deduplication and deletes.
+        The JSONL file is renamed afterwards so the import never runs twice.
+
+        Returns:
+            int: Number of records imported
+        """
+        records = []
+        with open(jsonl_path, "r") as f:
+            for line in f:
+                record = json.loads(line)
+                doc_id = record.get("doc_id") or id_lookup.get((record["chunk_id"], record["doc_path"]))
+                if doc_id is None:
+                    logger.warning(f"[Metadata] No indexed vector for {record['filename']}#{record['chunk_id']}, skipping.")
+                    continue
+                records.append({**record, "doc_id": doc_id})
+        self.add(records)
+        jsonl_path.rename(jsonl_path.with_suffix(".jsonl.migrated"))
+        logger.info(f"[Metadata] Migrated {len(records)} records from {jsonl_path}.")
+        return len(records)
@@ -0,0 +1,553 @@
+# langchain_ai_agent/retriever/persistence.py
+'''
+Append-only persistence for LangChain FAISS stores.
+
+Instead of calling `save_local` (full index + pickled docstore) after every
+write, new vectors and documents are appended to a write-ahead log. The full
+index is only rewritten at checkpoints, triggered by log size or age. On load
+the last checkpoint is read and the log replayed on top, so a write costs
+O(new items) and nothing acknowledged is lost if the process dies.
+
+`search` also runs filtered queries inside the index: the allowed docstore ids
+become a FAISS ID selector, so a filter narrows the candidates instead of
+discarding hits after top-k.
+
+The index type itself (flat, HNSW, IVF) comes from the namespace's
+IndexConfig; see index_factory.
+
+Checkpoints are a plain FAISS index file plus a columnar chunk file (no
+pickle, see docstore). Query workers can open them with `load_read_only`,
+which memory-maps both, so every worker shares one page-cache copy of the
+namespace and Documents are only built for returned hits.
+'''
+
+import os
+import json
+import time
+import uuid
+import base64
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+from langchain_ai_agent.retriever.docstore import (
+    CHUNKS_FILENAME,
+    ChunkDocstore,
+    ColumnarChunks,
+    RowMap,
+    write_chunks,
+)
+from langchain_ai_agent.retriever.index_factory import (
+    IndexConfig,
+    apply_search_params,
+    build_index,
+    index_kind,
+    rebuild_without,
+    search_parameters,
+)
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_CHECKPOINT_EVERY = int(os.getenv("FAISS_WAL_CHECKPOINT_EVERY", "1000"))
+DEFAULT_CHECKPOINT_SECONDS = float(os.getenv("FAISS_WAL_CHECKPOINT_SECONDS", "300"))
+# Filters matching at most this many vectors are scored exactly over just those rows.
+EXACT_SUBSET_MAX = int(os.getenv("FAISS_EXACT_SUBSET_MAX", "4096"))
+
+WAL_FILENAME = "wal.jsonl"
+INDEX_FILENAMES = ("index.faiss", CHUNKS_FILENAME)
+LEGACY_DOCSTORE_FILENAME = "index.pkl"
+# Checkpoints are staged here; the marker is written once every staged file is complete.
+STAGING_DIRNAME = ".checkpoint"
+STAGING_COMPLETE = "COMPLETE"
+
+# Map flat codes straight from the file; older FAISS builds only map IVF lists.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """
+    JSONL log of added and deleted documents. Vectors are stored as base64 float32 so a
+    record is roughly the size of the raw embedding plus its text.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = sum(1 for _ in self._lines()) if path.exists() else 0
+
+    def _lines(self):
+        with open(self.path, "r") as f:
+            yield from f
+
+    def append(self, records: List[Dict]) -> None:
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(records)
+
+    def read(self) -> List[Dict]:
+        if not self.path.exists():
+            return []
+        records = []
+        for line in self._lines():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line means the process died mid-append; that write was never acknowledged.
+                logger.warning(f"[WAL] Ignoring truncated record in {self.path}.")
+                break
+        return records
+
+    def truncate(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
+        self.count = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    @staticmethod
+    def encode_vector(vector: Sequence[float]) -> str:
+        return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+    @staticmethod
+    def decode_vector(data: str) -> List[float]:
+        return np.frombuffer(base64.b64decode(data), dtype=np.float32).tolist()
+
+
+class IncrementalIndex:
+    """
+    Owns a FAISS store in `persist_dir` together with its write-ahead log.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Path,
+        embeddings: Embeddings,
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+        checkpoint_seconds: float = DEFAULT_CHECKPOINT_SECONDS,
+        index_config: Optional[IndexConfig] = None
+    ):
+        """
+        Args:
+            persist_dir (Path): Directory holding the checkpoint and log
+            embeddings (Embeddings): Embedding function attached to the store
+            checkpoint_every (int): Log records that trigger a checkpoint
+            checkpoint_seconds (float): Max age of un-checkpointed records
+            index_config (Optional[IndexConfig]): Index type; defaults to the namespace's index_config.json
+        """
+        self.persist_dir = Path(persist_dir)
+        self.index_config = index_config or IndexConfig.load(self.persist_dir)
+        self.embeddings = embeddings
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_seconds = checkpoint_seconds
+        self.wal = WriteAheadLog(self.persist_dir / WAL_FILENAME)
+        self.store: Optional[FAISS] = None
+        self._last_checkpoint = time.monotonic()
+        # docstore id -> FAISS row, rebuilt lazily after any write.
+        self._positions: Optional[Dict[str, int]] = None
+        # Rows of deleted documents still inside an HNSW/IVF index, masked from
+        # searches until the next compaction drops them in a single rebuild.
+        self._tombstones: Set[int] = set()
+        self.read_only = False
+
+    def has_checkpoint(self) -> bool:
+        return (self.persist_dir / INDEX_FILENAMES[0]).exists()
+
+    def load(self) -> Optional[FAISS]:
+        """
+        Load the last checkpoint (if any) and replay the log on top of it.
+        Raises if the checkpoint exists but cannot be read.
+        """
+        self._finish_checkpoint()
+        if self.has_checkpoint():
+            self.store = self._load_checkpoint()
+            apply_search_params(self.store.index, self.index_config)
+        records = self.wal.read()
+        known = set(self.store.index_to_docstore_id.values()) if self.store else set()
+        pending: List[Dict] = []
+        replayed = 0
+
+        def apply_pending():
+            if pending:
+                self._add_to_store(
+                    [r["text"] for r in pending],
+                    [WriteAheadLog.decode_vector(r["vector"]) for r in pending],
+                    [r["metadata"] for r in pending],
+                    [r["id"] for r in pending],
+                )
+                pending.clear()
+
+        for record in records:
+            if record.get("op") == "delete":
+                apply_pending()
+                ids = [doc_id for doc_id in record["ids"] if doc_id in known]
+                if ids:
+                    self._delete_from_store(ids)
+                    known.difference_update(ids)
+                    replayed += 1
+            # A crash between checkpoint and truncate leaves records already in the index.
+            elif record["id"] not in known:
+                pending.append(record)
+                known.add(record["id"])
+                replayed += 1
+        apply_pending()
+        self.compact()
+        self._positions = None
+        if records:
+            logger.info(f"[WAL] Replayed {replayed} records from {self.wal.path}.")
+        return self.store
+
+    def _load_checkpoint(self) -> FAISS:
+        chunks_path = self.persist_dir / CHUNKS_FILENAME
+        if not chunks_path.exists() and (self.persist_dir / LEGACY_DOCSTORE_FILENAME).exists():
+            # Checkpoint from before the chunk file; the next checkpoint converts it.
+            return FAISS.load_local(
+                folder_path=str(self.persist_dir),
+                embeddings=self.embeddings,
+                allow_dangerous_deserialization=True
+            )
+        index = faiss.read_index(str(self.persist_dir / INDEX_FILENAMES[0]))
+        chunks = ColumnarChunks(chunks_path)
+        if len(chunks) != index.ntotal:
+            raise RuntimeError(
+                f"[WAL] {self.persist_dir} has {index.ntotal} vectors but {len(chunks)} chunks."
+            )
+        # Writers keep ids in a dict (LangChain mutates it); documents stay on disk.
+        index_to_docstore_id = {row: chunks.doc_id(row) for row in range(len(chunks))}
+        return FAISS(self.embeddings, index, ChunkDocstore(chunks), index_to_docstore_id)
+
+    def load_read_only(self, retries: int = 3) -> Optional[FAISS]:
+        """
+        Open the last checkpoint for serving: vectors are memory-mapped from
+        index.faiss and documents are built from chunks.bin per hit.
+
+        Falls back to a regular `load` when the log holds writes that are not
+        checkpointed yet, or the namespace still has a legacy pickled docstore,
+        since neither can be served from the files alone.
+
+        Args:
+            retries (int): Attempts when a checkpoint is being swapped in mid-open
+
+        Returns:
+            Optional[FAISS]: Store that rejects writes, or None if the namespace is empty
+        """
+        if self.wal.count or not (self.persist_dir / CHUNKS_FILENAME).exists():
+            if self.has_checkpoint() or self.wal.count:
+                logger.info(f"[WAL] {self.persist_dir} cannot be served from its checkpoint yet, loading into memory.")
+            return self.load()
+
+        for attempt in range(retries):
+            index = faiss.read_index(str(self.persist_dir / INDEX_FILENAMES[0]), MMAP_FLAGS)
+            chunks = ColumnarChunks(self.persist_dir / CHUNKS_FILENAME)
+            # index.faiss and chunks.bin are replaced one after the other.
+            if len(chunks) == index.ntotal:
+                break
+            time.sleep(0.05 * (attempt + 1))
+        else:
+            raise RuntimeError(f"[WAL] Index and docstore in {self.persist_dir} do not match.")
+
+        apply_search_params(index, self.index_config)
+        self.store = FAISS(self.embeddings, index, ChunkDocstore(chunks), RowMap(chunks))
+        self.read_only = True
+        return self.store
+
+    def _check_writable(self) -> None:
+        # Writing to a memory-mapped index aborts inside FAISS, so refuse up front.
+        if self.read_only:
+            raise RuntimeError(f"[WAL] {self.persist_dir} was opened read-only.")
+
+    def _add_to_store(
+        self,
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: List[Dict],
+        ids: List[str]
+    ) -> None:
+        text_embeddings = list(zip(texts, vectors))
+        self._positions = None
+        if self.store is None:
+            self.store = FAISS.from_embeddings(
+                text_embeddings, self.embeddings, metadatas=metadatas, ids=ids
+            )
+        else:
+            self.store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+    def add(
+        self,
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None,
+        auto_checkpoint: bool = True
+    ) -> List[str]:
+        """
+        Add precomputed vectors. Large batches go straight to a checkpoint,
+        small ones are logged and checkpointed when the policy says so.
+
+        Args:
+            auto_checkpoint (bool): False only logs the batch; the caller runs
+                `maybe_checkpoint` later, e.g. after releasing a lock readers wait on
+
+        Returns:
+            List[str]: Docstore ids of the added documents
+        """
+        self._check_writable()
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self._add_to_store(texts, vectors, metadatas, ids)
+
+        if auto_checkpoint and len(texts) >= self.checkpoint_every:
+            self.checkpoint()
+            return ids
+
+        self.wal.append([
+            {
+                "id": doc_id,
+                "text": text,
+                "metadata": metadata,
+                "vector": WriteAheadLog.encode_vector(vector),
+            }
+            for doc_id, text, vector, metadata in zip(ids, texts, vectors, metadatas)
+        ])
+        if auto_checkpoint:
+            self.maybe_checkpoint()
+        return ids
+
+    def delete(self, ids: List[str]) -> int:
+        """
+        Remove documents by docstore id and log the deletion.
+
+        Returns:
+            int: Number of documents removed
+        """
+        self._check_writable()
+        if self.store is None or not ids:
+            return 0
+        known = {
+            doc_id for pos, doc_id in self.store.index_to_docstore_id.items()
+            if pos not in self._tombstones
+        }
+        ids = [doc_id for doc_id in ids if doc_id in known]
+        if not ids:
+            return 0
+        self._delete_from_store(ids)
+        self.wal.append([{"op": "delete", "ids": ids}])
+        self.maybe_checkpoint()
+        return len(ids)
+
+    def _delete_from_store(self, ids: List[str]) -> None:
+        if index_kind(self.store.index) == "flat":
+            self._positions = None
+            self.store.delete(ids)
+            return
+        # HNSW cannot remove ids and IVF would leave gaps in the row numbering
+        # the docstore mapping relies on. Rebuilding per delete is a full re-add
+        # of the corpus, so mask the rows here and drop them all in `compact`.
+        # The mapping keeps its entries: LangChain numbers new rows by its length.
+        self._tombstones.update(int(pos) for pos in self.positions(ids))
+        self.store.docstore.delete(ids)
+
+    def compact(self) -> None:
+        """
+        Drop the rows of deleted documents from an HNSW/IVF index in one rebuild.
+        Runs before every checkpoint, and before the store is handed to code
+        that searches it through LangChain, which cannot skip masked rows.
+        """
+        if self.store is None or not self._tombstones:
+            return
+        mapping = self.store.index_to_docstore_id
+        keep = np.array(
+            [pos for pos in sorted(mapping) if pos not in self._tombstones], dtype=np.int64
+        )
+        self.store.index = rebuild_without(self.store.index, keep)
+        self.store.index_to_docstore_id = {i: mapping[int(pos)] for i, pos in enumerate(keep)}
+        logger.info(f"[WAL] Compacted {len(self._tombstones)} deleted rows out of {self.persist_dir}.")
+        self._tombstones = set()
+        self._positions = None
+
+    def _maybe_build_index(self) -> bool:
+        # Swap the flat index for the configured type once there is enough data to train on.
+        index = self.store.index
+        if index_kind(index) == self.index_config.index_type:
+            return False
+        if not self.index_config.ready_to_build(index.ntotal):
+            return False
+        self.store.index = build_index(index, self.index_config)
+        return True
+
+    def rebuild(self, index_config: Optional[IndexConfig] = None) -> None:
+        """
+        Offline migration to another index type (or retrain of the current one).
+        Persists the config, rebuilds the index and checkpoints.
+
+        Args:
+            index_config (Optional[IndexConfig]): New settings; defaults to the current ones
+        """
+        self._check_writable()
+        if index_config is not None:
+            self.index_config = index_config
+        self.index_config.save(self.persist_dir)
+        if self.store is None:
+            logger.info(f"[WAL] {self.persist_dir} is empty; config saved for future writes.")
+            return
+        self.compact()
+        if self.index_config.ready_to_build(self.store.index.ntotal):
+            self.store.index = build_index(self.store.index, self.index_config)
+        else:
+            logger.warning(
+                f"[WAL] {self.persist_dir} has {self.store.index.ntotal} vectors, fewer than "
+                f"min_train_vectors={self.index_config.min_train_vectors}; keeping the current index for now."
+            )
+            apply_search_params(self.store.index, self.index_config)
+        self.checkpoint()
+
+    def maybe_checkpoint(self) -> None:
+        age = time.monotonic() - self._last_checkpoint
+        if self.wal.count >= self.checkpoint_every or (self.wal.count and age >= self.checkpoint_seconds):
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Write the full index and clear the log. Files are written to a staging
+        directory first and moved into place, so readers never see half a save.
+        """
+        if self.store is None or self.read_only:
+            return
+        self.compact()
+        self._maybe_build_index()
+        staging = self.persist_dir / STAGING_DIRNAME
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        faiss.write_index(self.store.index, str(staging / INDEX_FILENAMES[0]))
+        write_chunks(staging / CHUNKS_FILENAME, self.store.docstore, self.store.index_to_docstore_id)
+        for name in INDEX_FILENAMES:
+            _fsync(staging / name)
+        # From here on the checkpoint is committed: `_finish_checkpoint` completes
+        # the swap below if the process dies between the two renames.
+        (staging / STAGING_COMPLETE).touch()
+        _fsync(staging)
+        self._finish_checkpoint()
+        # Everything is in the new file now; drop the in-memory overlay.
+        self.store.docstore = ChunkDocstore(ColumnarChunks(self.persist_dir / CHUNKS_FILENAME))
+        legacy = self.persist_dir / LEGACY_DOCSTORE_FILENAME
+        if legacy.exists():
+            legacy.unlink()
+        self.wal.truncate()
+        self._last_checkpoint = time.monotonic()
+        logger.info(f"[WAL] Checkpointed {self.persist_dir} ({self.store.index.ntotal} vectors).")
+
+    def _finish_checkpoint(self) -> None:
+        # Move a committed staged checkpoint into place; discard one that never completed.
+        staging = self.persist_dir / STAGING_DIRNAME
+        if not staging.exists():
+            return
+        if (staging / STAGING_COMPLETE).exists():
+            for name in INDEX_FILENAMES:
+                if (staging / name).exists():
+                    os.replace(staging / name, self.persist_dir / name)
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def positions(self, ids: Sequence[str]) -> np.ndarray:
+        """
+        Map docstore ids to FAISS row positions, skipping ids not in the index.
+        """
+        if isinstance(self.store.index_to_docstore_id, RowMap):
+            return self.store.docstore.chunks.rows(ids)
+        if self._positions is None:
+            self._positions = {doc_id: pos for pos, doc_id in self.store.index_to_docstore_id.items()}
+        return np.fromiter(
+            (self._positions[doc_id] for doc_id in ids if doc_id in self._positions), dtype=np.int64
+        )
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int,
+        ids: Optional[Sequence[str]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Top-k search, optionally restricted to a set of docstore ids.
+
+        Small id sets are scored exactly against their stored vectors; larger
+        ones are passed to FAISS as an IDSelectorBatch so the index only ever
+        considers allowed rows.
+
+        Args:
+            vector (Sequence[float]): Query embedding
+            k (int): Number of results
+            ids (Optional[Sequence[str]]): Allowed docstore ids, None for no restriction
+
+        Returns:
+            List[Tuple[Document, float]]: Documents with their raw FAISS scores
+        """
+        if self.store is None:
+            return []
+        index = self.store.index
+        query = np.asarray([vector], dtype=np.float32)
+        if self.store._normalize_L2:
+            faiss.normalize_L2(query)
+
+        if ids is None and not self._tombstones:
+            scores, rows = index.search(query, k)
+        elif ids is None:
+            live = index.ntotal - len(self._tombstones)
+            # IDSelectorNot does not own the wrapped selector; keep it referenced.
+            masked = faiss.IDSelectorBatch(self._tombstone_array())
+            selector = faiss.IDSelectorNot(masked)
+            params = search_parameters(index, self.index_config, selector, live / index.ntotal)
+            scores, rows = index.search(query, k, params=params)
+        else:
+            positions = self.positions(ids)
+            if self._tombstones:
+                positions = positions[~np.isin(positions, self._tombstone_array())]
+            if not len(positions):
+                return []
+            if len(positions) <= EXACT_SUBSET_MAX:
+                scores, rows = self._exact_subset_search(query, k, positions)
+            else:
+                selector = faiss.IDSelectorBatch(positions)
+                params = search_parameters(index, self.index_config, selector, len(positions) / index.ntotal)
+                scores, rows = index.search(query, k, params=params)
+
+        results = []
+        for score, row in zip(scores[0], rows[0]):
+            if row == -1:
+                continue
+            doc_id = self.store.index_to_docstore_id[int(row)]
+            doc = self.store.docstore.search(doc_id)
+            # Documents from legacy pickled checkpoints may not carry their id.
+            doc.id = doc.id or doc_id
+            results.append((doc, float(score)))
+        return results
+
+    def _tombstone_array(self) -> np.ndarray:
+        return np.fromiter(self._tombstones, dtype=np.int64, count=len(self._tombstones))
+
+    def _exact_subset_search(self, query: np.ndarray, k: int, positions: np.ndarray):
+        vectors = self.store.index.reconstruct_batch(positions)
+        if self.store.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            scores = vectors @ query[0]
+            order = np.argsort(-scores)[:k]
+        else:
+            scores = ((vectors - query[0]) ** 2).sum(axis=1)
+            order = np.argsort(scores)[:k]
+        return scores[order][None, :], positions[order][None, :]
@@ -0,0 +1,48 @@
+# langchain_ai_agent/retriever/rebuild.py
+'''
+Offline index migration for a namespace, e.g. flat -> IVF-PQ:
+
+    python -m langchain_ai_agent.retriever.rebuild --persist-dir faiss_index/default --index-type ivf_pq
+
+Only options that are passed override the namespace's current index_config.json.
+Run while the API is not writing to the namespace.
+'''
+
+import argparse
+
+from langchain_ai_agent.retriever.embeddings import get_embeddings
+from langchain_ai_agent.retriever.index_factory import INDEX_TYPES, IndexConfig
+from langchain_ai_agent.retriever.persistence import IncrementalIndex
+
+TUNABLES = (
+    "hnsw_m", "ef_construction", "ef_search", "nlist", "nprobe",
+    "min_train_vectors", "train_sample", "pq_m", "pq_bits",
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild a namespace's FAISS index with another index type.")
+    parser.add_argument(
+        "--persist-dir",
+        required=True,
+        help="Namespace directory (e.g. faiss_index/default)"
+    )
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="Target index type")
+    for name in TUNABLES:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name)
+    args = parser.parse_args(argv)
+
+    current = IndexConfig.load(args.persist_dir)
+    overrides = {name: getattr(args, name) for name in TUNABLES if getattr(args, name) is not None}
+    if args.index_type:
+        overrides["index_type"] = args.index_type
+    config = current.model_copy(update=overrides)
+
+    index = IncrementalIndex(args.persist_dir, get_embeddings(), index_config=config)
+    index.load()
+    index.rebuild()
+    print(f"[Rebuild] {args.persist_dir}: {config.model_dump()}")
+
+
+if __name__ == "__main__":
+    main()
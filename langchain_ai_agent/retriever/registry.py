@@ -0,0 +1,172 @@
+# langchain_ai_agent/retriever/registry.py
+'''
+Process-wide registry of per-namespace objects (embedders, compiled graphs).
+
+Loading a namespace means reading the FAISS index from disk and compiling the
+LangGraph workflow on top of it. The registry keeps those objects alive between
+requests and drops them when the namespace is written to, either by this
+process (explicit invalidate) or by another worker (on-disk fingerprint change).
+'''
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_ai_agent.retriever.vector_store import DocumentEmbedder
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def _fingerprint(persist_dir: str) -> Tuple[int, ...]:
+    """
+    Cheap change detector for a namespace directory: (file count, newest mtime).
+    """
+    path = Path(persist_dir)
+    if not path.exists():
+        return (0, 0)
+    # SQLite sidecar files change on reads too, so they are not a write signal.
+    mtimes = [
+        f.stat().st_mtime_ns for f in path.iterdir()
+        if f.is_file() and not f.name.endswith(("-shm", "-wal", "-journal"))
+    ]
+    return (len(mtimes), max(mtimes, default=0))
+
+
+class NamespaceRegistry:
+    """
+    Thread-safe cache of objects keyed by (persist_dir, kind).
+
+    Every namespace carries a version counter that is bumped on invalidation,
+    so callers can key their own caches on it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, Tuple[int, ...]] = {}
+        self._versions: Dict[str, int] = {}
+        # One lock per (namespace, kind): a slow build only blocks callers waiting for the same object.
+        self._build_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    @staticmethod
+    def _key(persist_dir: str) -> str:
+        return str(Path(persist_dir))
+
+    def _cached(self, key: str, kind: str) -> Optional[Any]:
+        # Caller holds the lock.
+        fingerprint = _fingerprint(key)
+        if key in self._fingerprints and self._fingerprints[key] != fingerprint:
+            logger.info(f"[Registry] Namespace '{key}' changed on disk, reloading.")
+            self._drop(key)
+        return self._entries.get(key, {}).get(kind)
+
+    def get_or_create(self, persist_dir: str, kind: str, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached object for (persist_dir, kind), building it with `factory` on a miss.
+
+        The factory runs outside the registry lock, so loading one namespace does
+        not stall lookups of the others; concurrent misses on the same object wait
+        for a single build.
+
+        Args:
+            persist_dir (str): Namespace directory, e.g. "faiss_index/default"
+            kind (str): Object type stored for the namespace, e.g. "embedder"
+            factory (Callable): Zero-argument builder used on a cache miss
+
+        Returns:
+            Any: The cached or freshly built object
+        """
+        key = self._key(persist_dir)
+        while True:
+            with self._lock:
+                cached = self._cached(key, kind)
+                if cached is not None:
+                    return cached
+                build_lock = self._build_locks.setdefault((key, kind), threading.Lock())
+
+            with build_lock:
+                with self._lock:
+                    # Built by the caller this one waited for.
+                    cached = self._cached(key, kind)
+                    if cached is not None:
+                        return cached
+                    version = self._versions.get(key, 0)
+
+                built = factory()
+
+                with self._lock:
+                    if self._versions.get(key, 0) != version:
+                        # Invalidated mid-build: the object may predate the write, build again.
+                        logger.info(f"[Registry] Namespace '{key}' changed while loading '{kind}', reloading.")
+                        continue
+                    self._entries.setdefault(key, {})[kind] = built
+                    # Building may itself touch the directory (e.g. mkdir), so re-read it.
+                    self._fingerprints[key] = _fingerprint(key)
+                    logger.info(f"[Registry] Loaded '{kind}' for namespace '{key}'.")
+                    return built
+
+    def write_lock(self, persist_dir: str) -> threading.Lock:
+        """
+        Lock serialising writers of a namespace. The write embedder, its FAISS
+        index, log and manifest are not safe for concurrent writes, so hold it
+        from `get_embedder` through `invalidate`.
+        """
+        with self._lock:
+            return self._build_locks.setdefault((self._key(persist_dir), "write"), threading.Lock())
+
+    def invalidate(self, persist_dir: str) -> None:
+        """
+        Drop every cached object for a namespace after it has been written to.
+        """
+        key = self._key(persist_dir)
+        with self._lock:
+            self._drop(key)
+        logger.info(f"[Registry] Invalidated namespace '{key}'.")
+
+    def version(self, persist_dir: str) -> int:
+        """
+        Monotonic counter bumped every time the namespace is invalidated.
+        """
+        with self._lock:
+            return self._versions.get(self._key(persist_dir), 0)
+
+    def _drop(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._fingerprints.pop(key, None)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+
+# Shared registry instance for the whole process
+registry = NamespaceRegistry()
+
+
+def get_embedder(persist_dir: str, read_only: bool = False) -> DocumentEmbedder:
+    """
+    Return the process-wide DocumentEmbedder for a namespace directory.
+
+    Args:
+        persist_dir (str): Namespace directory
+        read_only (bool): Serve queries from the memory-mapped checkpoint; used by query paths
+
+    Returns:
+        DocumentEmbedder: Cached embedder for the namespace
+    """
+    if read_only:
+        return registry.get_or_create(persist_dir, "embedder_ro", lambda: _open_read_only(persist_dir))
+    return registry.get_or_create(
+        persist_dir, "embedder", lambda: DocumentEmbedder(persist_dir=persist_dir)
+    )
+
+
+def _open_read_only(persist_dir: str) -> DocumentEmbedder:
+    embedder = DocumentEmbedder(persist_dir=persist_dir, read_only=True)
+    if embedder.needs_migration:
+        # Legacy namespace: the write embedder migrates it on load, then reopen read-only.
+        logger.info(f"[Registry] Migrating legacy namespace '{persist_dir}' before serving it read-only.")
+        with registry.write_lock(persist_dir):
+            get_embedder(persist_dir)
+        embedder = DocumentEmbedder(persist_dir=persist_dir, read_only=True)
+    return embedder
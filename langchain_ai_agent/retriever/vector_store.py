@@ -1,20 +1,51 @@
 import os
-import json
+import math
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, Sequence, Tuple
 from pathlib import Path
 
 from sentence_transformers import SentenceTransformer  # if needed elsewhere
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
 from pydantic import BaseModel, Field, PrivateAttr, ValidationError
 from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+
+from langchain_ai_agent.retriever.embeddings import DEFAULT_MODEL_NAME, get_embeddings
+from langchain_ai_agent.retriever.persistence import IncrementalIndex
+from langchain_ai_agent.retriever.metadata_store import ChunkMetadataStore
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Each ranker contributes this many candidates to hybrid fusion, per requested result.
+HYBRID_CANDIDATES_PER_K = int(os.getenv("HYBRID_CANDIDATES_PER_K", "5"))
+RRF_K = 60
+# Filters matching at least this share of the index post-filter an over-fetched
+# unfiltered search instead of resolving every matching id into an ID selector.
+POST_FILTER_MIN_SHARE = float(os.getenv("POST_FILTER_MIN_SHARE", "0.1"))
+POST_FILTER_OVERFETCH = float(os.getenv("POST_FILTER_OVERFETCH", "2"))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], rrf_k: int = RRF_K) -> List[str]:
+    """
+    Merge ranked id lists by summing 1 / (rrf_k + rank) per list. Rank-based, so
+    BM25 and vector distances need no score normalisation.
+
+    Args:
+        rankings (Sequence[Sequence[str]]): Ids per ranker, best first
+        rrf_k (int): Damping constant; 60 is the usual choice
+
+    Returns:
+        List[str]: Ids ordered by fused score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
 
 class ChunkMetadata(BaseModel):
     chunk_id: int
@@ -26,22 +57,29 @@ class ChunkMetadata(BaseModel):
 
 class DocumentEmbedder(BaseRetriever, BaseModel):
     # Public fields, part of the retriever's configuration.
-    model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    model_name: str = DEFAULT_MODEL_NAME
     persist_dir: str = "faiss_index"
+    # Query-only: memory-map the last checkpoint instead of loading it into the heap.
+    read_only: bool = False
 
     # Private attributes that will not be part of the Pydantic model
     _persist_dir: Path = PrivateAttr()
     _metadata_file: Path = PrivateAttr()
     _embedding_function: Any = PrivateAttr()
     _vector_store: Optional[Any] = PrivateAttr(default=None)
+    _index: Optional[IncrementalIndex] = PrivateAttr(default=None)
+    _metadata: Optional[ChunkMetadataStore] = PrivateAttr(default=None)
 
     def __init__(self, **data):
         super().__init__(**data)
         # Convert the persist_dir (a string) into a Path object and store it as a private attribute.
         self._persist_dir = Path(self.persist_dir)
         self._metadata_file = self._persist_dir / "metadata.jsonl"
-        self._embedding_function = HuggingFaceEmbeddings(model_name=self.model_name)
-        
+        # Shared across namespaces and the MemoryStore; loaded on first embed.
+        self._embedding_function = get_embeddings(self.model_name)
+        # Checkpoint + write-ahead log, so appends don't rewrite the whole index.
+        self._index = IncrementalIndex(self._persist_dir, self._embedding_function)
+
         # Create the directory if it doesn't exist; otherwise try to load the FAISS index.
         if not self._persist_dir.exists():
             self._persist_dir.mkdir(parents=True, exist_ok=True)
@@ -49,14 +87,37 @@ class DocumentEmbedder(BaseRetriever, BaseModel):
         else:
             self._load_faiss()
 
+        # Opened after loading, since a corrupted namespace is wiped above.
+        self._metadata = ChunkMetadataStore(self._persist_dir)
+        if not self.read_only:
+            if self._metadata_file.exists():
+                self._migrate_metadata()
+            if self._needs_keyword_backfill():
+                self._backfill_keywords()
+
+    @property
+    def needs_migration(self) -> bool:
+        """
+        True while the namespace predates the metadata store or the keyword index.
+        Read-only embedders cannot migrate it and would serve empty filtered and
+        hybrid results, so the registry opens a write embedder first.
+        """
+        return self._metadata_file.exists() or self._needs_keyword_backfill()
+
+    def _needs_keyword_backfill(self) -> bool:
+        return self._metadata.keyword_count() == 0 and self._metadata.count() > 0
+
     def _load_faiss(self):
+        if self.read_only:
+            # Never wipe a namespace from a query worker; let the error surface.
+            self._vector_store = self._index.load_read_only()
+            if self._vector_store is not None:
+                logger.info("[Embedder] Opened FAISS index read-only.")
+            return
         try:
-            self._vector_store = FAISS.load_local(
-                folder_path=str(self._persist_dir),
-                embeddings=self._embedding_function,
-                allow_dangerous_deserialization=True
-            )
-            logger.info("[Embedder] Loaded FAISS index from disk.")
+            self._vector_store = self._index.load()
+            if self._vector_store is not None:
+                logger.info("[Embedder] Loaded FAISS index from disk.")
         except Exception as e:
             logger.error(f"[Embedder] Failed to load FAISS index: {e}")
             # The existing index file might be corrupted or incompatible.
@@ -64,6 +125,7 @@ class DocumentEmbedder(BaseRetriever, BaseModel):
             try:
                 for file in self._persist_dir.iterdir():
                     file.unlink()
+                self._index.wal.truncate()
                 logger.info("[Embedder] Removed corrupted FAISS index files from disk.")
             except Exception as remove_error:
                 logger.error(f"[Embedder] Failed to remove corrupted FAISS index files: {remove_error}")
@@ -72,35 +134,42 @@ class DocumentEmbedder(BaseRetriever, BaseModel):
             self._vector_store = None
 
 
-    def _load_existing_metadata(self) -> List[Dict]:
-        if self._metadata_file.exists():
-            with open(self._metadata_file, "r") as f:
-                return [json.loads(line) for line in f]
-        return []
-
-    def _append_metadata(self, metadata: List[Dict]):
-        with open(self._metadata_file, "a") as f:
-            for record in metadata:
-                f.write(json.dumps(record) + "\n")
-
-    def _deduplicate_chunks(
-        self,
-        new_chunks: List[ChunkMetadata],
-        existing_metadata: List[Dict]
-    ) -> List[ChunkMetadata]:
-        existing_keys = {
-            (item["chunk_id"], item["filename"])
-            for item in existing_metadata
-        }
+    def _migrate_metadata(self):
+        # Legacy metadata.jsonl rows carry no docstore id; recover it from the index.
+        id_lookup = {}
+        if self._vector_store is not None:
+            for doc_id in self._vector_store.index_to_docstore_id.values():
+                doc = self._vector_store.docstore.search(doc_id)
+                # Keyed like _deduplicate_chunks: basenames collide across folders.
+                id_lookup[(doc.metadata.get("chunk_id"), doc.metadata.get("doc_path"))] = doc_id
+        self._metadata.migrate_jsonl(self._metadata_file, id_lookup)
+
+    def _backfill_keywords(self):
+        # Namespaces indexed before the keyword index existed: fill it from the docstore once.
+        if self._vector_store is None:
+            return
+        indexed = set(self._metadata.filter_ids({}))
+        doc_ids = [doc_id for doc_id in self._vector_store.index_to_docstore_id.values() if doc_id in indexed]
+        texts = [self._vector_store.docstore.search(doc_id).page_content for doc_id in doc_ids]
+        self._metadata.add_keywords(doc_ids, texts)
+        logger.info(f"[Embedder] Built keyword index for {len(doc_ids)} existing chunks.")
+
+    def _deduplicate_chunks(self, new_chunks: List[ChunkMetadata]) -> List[ChunkMetadata]:
+        # Keyed on the full path: files sharing a basename in different folders are distinct.
+        existing_keys = self._metadata.existing_keys(
+            (chunk.chunk_id, chunk.doc_path) for chunk in new_chunks
+        )
         filtered = [
             chunk for chunk in new_chunks
-            if (chunk.chunk_id, chunk.filename) not in existing_keys
+            if (chunk.chunk_id, chunk.doc_path) not in existing_keys
         ]
         return filtered
 
-    def build_or_update_index(self, chunk_data: List[Dict]):
+    def build_or_update_index(self, chunk_data: List[Dict]) -> int:
         if not chunk_data:
             raise ValueError("[Embedder] No chunks provided.")
+        if self.read_only:
+            raise ValueError("[Embedder] Index was opened read-only.")
 
         validated_chunks = []
         for i, item in enumerate(chunk_data):
@@ -113,57 +182,200 @@ class DocumentEmbedder(BaseRetriever, BaseModel):
                 logger.error(f"[Embedder] Invalid chunk at index {i}: {e}")
                 raise
 
-        existing_metadata = self._load_existing_metadata()
-        new_chunks = self._deduplicate_chunks(validated_chunks, existing_metadata)
+        new_chunks = self._deduplicate_chunks(validated_chunks)
 
         if not new_chunks:
             logger.info("[Embedder] No new unique chunks to index.")
-            return
+            return 0
 
-        documents = [
-            Document(
-                page_content=chunk.text,
-                metadata={
-                    "chunk_id": chunk.chunk_id,
-                    "filename": chunk.filename,
-                    "source_type": chunk.source_type,
-                    "doc_path": chunk.doc_path
-                }
-            )
+        texts = [chunk.text for chunk in new_chunks]
+        metadatas = [
+            {
+                "chunk_id": chunk.chunk_id,
+                "filename": chunk.filename,
+                "source_type": chunk.source_type,
+                "doc_path": chunk.doc_path
+            }
             for chunk in new_chunks
         ]
+        vectors = self._embedding_function.embed_documents(texts)
 
-        if self._vector_store:
-            self._vector_store.add_documents(documents)
-            logger.info(f"[Embedder] Appended {len(documents)} new documents to existing index.")
+        existed = self._vector_store is not None
+        ids = self._index.add(texts, vectors, metadatas)
+        self._vector_store = self._index.store
+        if existed:
+            logger.info(f"[Embedder] Appended {len(texts)} new documents to existing index.")
         else:
-            self._vector_store = FAISS.from_documents(documents, self._embedding_function)
-            logger.info(f"[Embedder] Created new FAISS index with {len(documents)} documents.")
+            logger.info(f"[Embedder] Created new FAISS index with {len(texts)} documents.")
+
+        self._metadata.add([{**m, "doc_id": doc_id} for m, doc_id in zip(metadatas, ids)], texts=texts)
+        return len(texts)
+
+    def delete_files(self, doc_paths: List[str]) -> int:
+        """
+        Remove every chunk of the given files (matched on `doc_path`) from the
+        index and the metadata store, e.g. before re-indexing an edited file.
 
-        self._vector_store.save_local(str(self._persist_dir))
-        self._append_metadata([doc.metadata for doc in documents])
+        Returns:
+            int: Number of chunks removed from the index
+        """
+        targets = set(doc_paths)
+        removed = self._index.delete(self._metadata.ids_for_files(targets))
+        self._metadata.delete_files(targets)
+        logger.info(f"[Embedder] Removed {removed} chunks for {len(targets)} files.")
+        return removed
+
+    def flush(self) -> None:
+        """
+        Checkpoint pending log records, so read-only workers can serve the
+        namespace straight from its files. Call at the end of an ingestion run.
+        """
+        if self._index.wal.count:
+            self._index.checkpoint()
+
+    def index_stream(self, chunk_batches: Iterable[List[Dict]]) -> int:
+        """
+        Index chunk batches as they arrive (see DocumentIngestor.iter_chunk_batches),
+        so only one batch of text is held in memory at a time.
+
+        Returns:
+            int: Total number of chunks consumed from the stream
+        """
+        consumed = indexed = 0
+        for batch in chunk_batches:
+            if not batch:
+                continue
+            consumed += len(batch)
+            indexed += self.build_or_update_index(batch)
+        logger.info(f"[Embedder] Streamed {consumed} chunks, {indexed} newly indexed.")
+        return consumed
 
     def get_retriever(self, k: int = 4):
         if self._vector_store is None:
             raise ValueError("[Embedder] Vector store not initialized.")
+        # Rows masked by deletes are only dropped at the writer's next flush(), and
+        # the LangChain retriever cannot skip them; `query` can.
         return self._vector_store.as_retriever(search_kwargs={"k": k})
 
-    def query(self, question: str, k: int = 4) -> List[Document]:
-        retriever = self.get_retriever(k=k)
-        docs = retriever.get_relevant_documents(question)
-        logger.info(f"[Embedder] Retrieved {len(docs)} relevant documents for query.")
+    def get_filterable_retriever(self, k: int = 4, hybrid: bool = False) -> RunnableLambda:
+        """
+        Retriever runnable that reads metadata filters from the call's config,
+        i.e. `config["configurable"]["filters"]`, so one compiled chain can serve
+        filtered and unfiltered requests.
+
+        Args:
+            k (int): Number of documents per query
+            hybrid (bool): Fuse BM25 keyword hits with vector hits, see `hybrid_query`
+
+        Returns:
+            RunnableLambda: str -> List[Document]
+        """
+        search = self.hybrid_query if hybrid else self.query
+
+        def retrieve(question: str, config: RunnableConfig) -> List[Document]:
+            filters = (config.get("configurable") or {}).get("filters")
+            return search(question, k=k, filters=filters)
+
+        return RunnableLambda(retrieve, name="DocumentEmbedderRetriever")
+
+    def _filtered_search(self, vector: List[float], n: int, filters: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        """
+        Top-n search restricted to chunks matching `filters`.
+
+        Selective filters resolve their ids through the metadata store and run
+        inside the FAISS search. Broad ones would make that O(matches) per
+        request, so the index is searched unfiltered for about
+        n * POST_FILTER_OVERFETCH / share hits and only those are checked
+        against the metadata store; if too few survive, the selector path runs.
+
+        Args:
+            vector (List[float]): Query embedding
+            n (int): Number of results
+            filters (Dict[str, Any]): Metadata constraints, all must match
+
+        Returns:
+            List[Tuple[Document, float]]: Matching documents with their scores, best first
+        """
+        total = self._vector_store.index.ntotal
+        matched = self._metadata.count_matching(filters)
+        if not matched or not total:
+            return []
+        if matched < total * POST_FILTER_MIN_SHARE:
+            return self._index.search(vector, n, ids=self._metadata.filter_ids(filters))
+
+        fetch = min(total, math.ceil(n * POST_FILTER_OVERFETCH * total / matched))
+        hits = self._index.search(vector, fetch)
+        allowed = self._metadata.matching_ids((doc.id for doc, _ in hits), filters)
+        kept = [(doc, score) for doc, score in hits if doc.id in allowed][:n]
+        if len(kept) < n and fetch < total:
+            # The nearest neighbours fall mostly outside the filter; search inside it.
+            return self._index.search(vector, n, ids=self._metadata.filter_ids(filters))
+        return kept
+
+    def query(self, question: str, k: int = 4, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Top-k search. Filters (field -> value or list of values, on chunk_id,
+        filename, source_type or doc_path) are applied by the search itself
+        (see `_filtered_search`), so they never cost any of the k slots.
+
+        Args:
+            question (str): Query text
+            k (int): Number of documents to return
+            filters (Optional[Dict[str, Any]]): Metadata constraints, all must match
+
+        Returns:
+            List[Document]: Matching documents, best first
+        """
+        if self._vector_store is None:
+            raise ValueError("[Embedder] Vector store not initialized.")
+        vector = self._embedding_function.embed_query(question)
+        if not filters:
+            # Skips rows masked by deletes, so reads never have to compact the index.
+            docs = [doc for doc, _ in self._index.search(vector, k)]
+            logger.info(f"[Embedder] Retrieved {len(docs)} relevant documents for query.")
+            return docs
+
+        docs = [doc for doc, _ in self._filtered_search(vector, k, filters)]
+        logger.info(f"[Embedder] Retrieved {len(docs)} filtered documents for query.")
+        return docs
+
+    def hybrid_query(self, question: str, k: int = 4, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Hybrid search: BM25 over the keyword index and vector search, each
+        fetching a few times k candidates under the same filters, merged with
+        reciprocal rank fusion. Exact identifiers (contract numbers, error codes)
+        rank high through BM25 even when the embedding does not capture them.
+
+        Args:
+            question (str): Query text
+            k (int): Number of documents to return
+            filters (Optional[Dict[str, Any]]): Metadata constraints, as in `query`
+
+        Returns:
+            List[Document]: Fused top-k documents
+        """
+        if self._vector_store is None:
+            raise ValueError("[Embedder] Vector store not initialized.")
+        candidates = k * HYBRID_CANDIDATES_PER_K
+        vector = self._embedding_function.embed_query(question)
+        hits = self._filtered_search(vector, candidates, filters) if filters else self._index.search(vector, candidates)
+        dense = {doc.id: doc for doc, _ in hits}
+        keyword = [doc_id for doc_id, _ in self._metadata.keyword_search(question, candidates, filters)]
+
+        docs = []
+        for doc_id in reciprocal_rank_fusion([list(dense), keyword])[:k]:
+            doc = dense.get(doc_id) or self._vector_store.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                docs.append(doc)
+        logger.info(
+            f"[Embedder] Hybrid search fused {len(dense)} vector and {len(keyword)} keyword hits into {len(docs)}."
+        )
         return docs
 
     # Required by BaseRetriever: a synchronous method accepting a string and returning documents.
     def _get_relevant_documents(self, query: str) -> List[Document]:
-        retriever = self.get_retriever(k=4)
-        docs = retriever.get_relevant_documents(query)
-        logger.info(f"[Embedder] Retrieved {len(docs)} relevant documents for query.")
-        return docs
+        return self.query(query, k=4)
 
     # Optional asynchronous version.
     async def _aget_relevant_documents(self, query: str) -> List[Document]:
-        retriever = self.get_retriever(k=4)
-        docs = await retriever.aget_relevant_documents(query)
-        logger.info(f"[Embedder] Retrieved {len(docs)} relevant documents for query (async).")
-        return docs
+        return await asyncio.to_thread(self.query, query, 4)
@@ -0,0 +1,15 @@
+# tests/conftest.py
+
+import os
+import atexit
+import shutil
+import tempfile
+
+# Persistent stores default to paths under the working directory; point them at
+# a scratch directory before any module reads its settings.
+_state_dir = tempfile.mkdtemp(prefix="langchain_ai_agent_tests_")
+atexit.register(shutil.rmtree, _state_dir, ignore_errors=True)
+
+os.environ.setdefault("EMBEDDING_CACHE_DIR", os.path.join(_state_dir, "embedding_cache"))
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_state_dir, "llm_cache.db"))
+os.environ.setdefault("CHAT_CHECKPOINT_PATH", os.path.join(_state_dir, "chat_state", "checkpoints.db"))
@@ -0,0 +1,60 @@
+# tests/test_agent_batch.py
+
+import unittest
+from unittest.mock import patch
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableLambda
+from pydantic import ValidationError
+
+load_dotenv()
+
+from langchain_ai_agent.agents import base_agent
+from langchain_ai_agent.agents.base_agent import stream_agent_batch
+from langchain_ai_agent.api.schemas import AgentBatchRequest
+
+
+class TestAgentBatch(unittest.IsolatedAsyncioTestCase):
+    async def test_items_are_classified_together_and_grouped_by_label(self):
+        classified, tool_calls = [], []
+
+        def classify(x):
+            classified.append(x["text"])
+            return "support_ticket" if "ticket" in x["text"] else "Contract."
+
+        def tool_for(label):
+            def run(x):
+                tool_calls.append((label, x["text"]))
+                if x["text"] == "broken contract":
+                    raise ValueError("boom")
+                return {"handled": x["text"]}
+            return RunnableLambda(run)
+
+        inputs = [{"text": "ticket 1"}, {"text": "contract 1"}, {"text": "  "}, {"text": "ticket 2"}, {"text": "broken contract"}]
+        with patch.object(base_agent, "classify_chain", RunnableLambda(classify)), \
+                patch.object(base_agent, "route_to_tool", tool_for):
+            results = dict([item async for item in stream_agent_batch(inputs)])
+
+        self.assertEqual(sorted(results), [0, 1, 2, 3, 4])
+        self.assertEqual(len(classified), 4)
+        self.assertEqual(results[0], {
+            "task": "support_ticket",
+            "output": {"handled": "ticket 1"},
+            "agent_trace": {"input_preview": "ticket 1", "routed_tool": "support_ticket", "routed_by": "llm"}
+        })
+        self.assertEqual(results[1]["task"], "contract")
+        self.assertIn("error", results[2]["output"])
+        self.assertIn("Tool execution failed", results[4]["output"]["error"])
+        self.assertEqual(sorted(label for label, _ in tool_calls), ["contract", "contract", "support_ticket", "support_ticket"])
+
+
+class TestAgentBatchRequest(unittest.TestCase):
+    def test_every_text_needs_the_single_request_minimum(self):
+        self.assertEqual(len(AgentBatchRequest(texts=["contract 1", "ticket 2"]).texts), 2)
+        with self.assertRaises(ValidationError):
+            AgentBatchRequest(texts=["contract 1", "hi"])
+        with self.assertRaises(ValidationError):
+            AgentBatchRequest(texts=[])
+
+
+if __name__ == "__main__":
+    unittest.main()
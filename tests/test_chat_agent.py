@@ -2,8 +2,15 @@
 
 import unittest
 import shutil
+import tempfile
 from pathlib import Path
-from langchain_ai_agent.agents.chat_agent import get_chat_agent_with_memory
+from unittest import mock
+from langchain_ai_agent.agents import chat_agent
+from langchain_ai_agent.agents.chat_agent import AgentState, get_chat_agent_with_memory, needs_rewrite
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph
 from dotenv import load_dotenv
 import asyncio
 
@@ -12,15 +19,12 @@ load_dotenv()
 
 class TestChatAgent(unittest.TestCase):
     def setUp(self):
-        self.test_dir = Path("tests/tmp_chat_agent_store")
-        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.test_dir = Path(tempfile.mkdtemp(prefix="chat_agent_store_"))
+        # Registered first, so the directory goes even if building the agent fails.
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
         self.persist_dir = str(self.test_dir)
         self.agent = get_chat_agent_with_memory(persist_dir=self.persist_dir)
 
-    def tearDown(self):
-        if self.test_dir.exists():
-            shutil.rmtree(self.test_dir)
-
     def test_chat_agent_returns_answer(self):
         result = asyncio.run(
             self.agent.ainvoke({"question": "What is LangChain?"})
@@ -44,5 +48,86 @@ class TestChatAgent(unittest.TestCase):
         self.assertTrue(any("vector" in msg.content.lower() for msg in result["messages"] if hasattr(msg, "content")))
 
 
+class TestNeedsRewrite(unittest.TestCase):
+    def setUp(self):
+        self.history = [HumanMessage(content="What is FAISS?"), AIMessage(content="A vector search library.")]
+
+    def test_first_turn_skips_rewrite(self):
+        self.assertFalse(needs_rewrite("How does it scale?", []))
+
+    def test_self_contained_question_skips_rewrite(self):
+        self.assertFalse(needs_rewrite("What is LangChain?", self.history))
+
+    def test_follow_up_question_is_rewritten(self):
+        self.assertTrue(needs_rewrite("How does it scale?", self.history))
+        self.assertTrue(needs_rewrite("Tell me more", self.history))
+
+
+class TestBackgroundSummary(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        graph = StateGraph(AgentState)
+        graph.add_node("conversation", lambda state: {})
+        graph.set_entry_point("conversation")
+        graph.set_finish_point("conversation")
+        self.agent = graph.compile(checkpointer=MemorySaver())
+        self.config = {"configurable": {"thread_id": "t1"}}
+        self.llm = FakeListChatModel(responses=["summary one", "summary two"])
+        patcher = mock.patch.object(chat_agent, "_summary_llm", lambda: self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def add_turn(self, n):
+        await self.agent.aupdate_state(self.config, {"messages": [
+            HumanMessage(content=f"question {n} " * 50), AIMessage(content=f"answer {n} " * 50)
+        ]}, as_node="conversation")
+
+    async def test_short_threads_are_not_summarised(self):
+        await self.add_turn(1)
+        with mock.patch.object(chat_agent, "SUMMARY_TRIGGER_TOKENS", 10_000):
+            self.assertFalse(await chat_agent.summarize_conversation(self.agent, self.config))
+
+    async def test_only_new_messages_are_summarised(self):
+        with mock.patch.object(chat_agent, "SUMMARY_TRIGGER_TOKENS", 100):
+            for n in range(3):
+                await self.add_turn(n)
+            await chat_agent.schedule_summary(self.agent, self.config)
+            state = (await self.agent.aget_state(self.config)).values
+            self.assertEqual(state["summary"], "summary one")
+            self.assertEqual(len(state["messages"]), 2)
+
+            await self.add_turn(3)
+            self.assertTrue(await chat_agent.summarize_conversation(self.agent, self.config))
+            state = (await self.agent.aget_state(self.config)).values
+            self.assertEqual(state["summary"], "summary two")
+            self.assertEqual([m.content.split()[1] for m in state["messages"]], ["3", "3"])
+
+    async def test_next_turn_waits_for_pending_summary(self):
+        release = asyncio.Event()
+        summarise = chat_agent.summarize_conversation
+
+        async def slow_summary(agent, config):
+            await release.wait()
+            return await summarise(agent, config)
+
+        with mock.patch.object(chat_agent, "SUMMARY_TRIGGER_TOKENS", 100), \
+                mock.patch.object(chat_agent, "summarize_conversation", slow_summary):
+            for n in range(3):
+                await self.add_turn(n)
+            chat_agent.schedule_summary(self.agent, self.config)
+            waiter = asyncio.create_task(chat_agent.wait_for_summary("t1"))
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())
+
+            release.set()
+            await waiter
+            self.assertNotIn("t1", chat_agent._summaries)
+            await self.add_turn(3)
+            state = (await self.agent.aget_state(self.config)).values
+            self.assertEqual(state["summary"], "summary one")
+            self.assertEqual([m.content.split()[1] for m in state["messages"]], ["2", "2", "3", "3"])
+
+        await chat_agent.wait_for_summary("no-such-thread")
+
+
 if __name__ == "__main__":
     unittest.main()
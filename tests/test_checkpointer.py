@@ -0,0 +1,122 @@
+# tests/test_checkpointer.py
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.graph import StateGraph, MessagesState
+from langchain_ai_agent.agents.checkpointer import SQLiteCheckpointer
+
+
+def echo(state: MessagesState) -> dict:
+    return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+
+
+def build_graph(checkpointer):
+    graph = StateGraph(MessagesState)
+    graph.add_node("echo", echo)
+    graph.set_entry_point("echo")
+    graph.set_finish_point("echo")
+    return graph.compile(checkpointer=checkpointer)
+
+
+class TestSQLiteCheckpointer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "checkpoints.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def config(self, thread_id):
+        return {"configurable": {"thread_id": thread_id}}
+
+    def test_history_survives_restart_and_messages_are_stored_once(self):
+        checkpointer = SQLiteCheckpointer(self.path)
+        graph = build_graph(checkpointer)
+        graph.invoke({"messages": [HumanMessage(content="hi")]}, self.config("t1"))
+        graph.invoke({"messages": [HumanMessage(content="again")]}, self.config("t1"))
+        self.assertGreater(checkpointer.stats()["hits"], 0)
+
+        reopened = build_graph(SQLiteCheckpointer(self.path))
+        messages = reopened.get_state(self.config("t1")).values["messages"]
+        self.assertEqual([m.content for m in messages], ["hi", "echo: hi", "again", "echo: again"])
+        stored = checkpointer._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        self.assertEqual(stored, 4)
+        self.assertGreater(len(list(reopened.get_state_history(self.config("t1")))), 2)
+
+    def test_cache_is_bounded_and_threads_can_be_deleted(self):
+        checkpointer = SQLiteCheckpointer(self.path, max_cached_threads=1)
+        graph = build_graph(checkpointer)
+        for thread_id in ("a", "b", "c"):
+            graph.invoke({"messages": [HumanMessage(content=thread_id)]}, self.config(thread_id))
+        self.assertEqual(checkpointer.stats()["cached_threads"], 1)
+        self.assertEqual(len(graph.get_state(self.config("a")).values["messages"]), 2)
+
+        checkpointer.delete_thread("a")
+        self.assertEqual(graph.get_state(self.config("a")).values, {})
+
+    def test_idle_threads_expire_from_memory(self):
+        checkpointer = SQLiteCheckpointer(self.path, cache_ttl=0)
+        graph = build_graph(checkpointer)
+        graph.invoke({"messages": [HumanMessage(content="hi")]}, self.config("t1"))
+        self.assertEqual(checkpointer.stats()["cached_threads"], 0)
+        self.assertEqual(len(graph.get_state(self.config("t1")).values["messages"]), 2)
+
+    def test_old_checkpoints_and_unreferenced_messages_are_pruned(self):
+        checkpointer = SQLiteCheckpointer(self.path, keep_checkpoints=2)
+        graph = build_graph(checkpointer)
+        graph.invoke({"messages": [HumanMessage(content="hi", id="hi")]}, self.config("t1"))
+        graph.invoke({"messages": [RemoveMessage(id="hi"), HumanMessage(content="again")]}, self.config("t1"))
+
+        count = lambda table: checkpointer._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        self.assertEqual(count("checkpoints"), 2)
+        self.assertGreater(checkpointer.stats()["pruned"], 0)
+        kept = {row[0] for row in checkpointer._conn.execute("SELECT checkpoint_id FROM checkpoints")}
+        written = {row[0] for row in checkpointer._conn.execute("SELECT checkpoint_id FROM writes")}
+        self.assertLessEqual(written, kept)
+        # "hi" was removed from the conversation, so its stored copy goes with the old checkpoints.
+        self.assertEqual(count("messages"), 3)
+
+        reopened = build_graph(SQLiteCheckpointer(self.path))
+        messages = reopened.get_state(self.config("t1")).values["messages"]
+        self.assertEqual([m.content for m in messages], ["echo: hi", "again", "echo: again"])
+
+    def test_cached_digests_follow_pruned_messages(self):
+        checkpointer = SQLiteCheckpointer(self.path, keep_checkpoints=2)
+        graph = build_graph(checkpointer)
+        graph.invoke({"messages": [HumanMessage(content="hi", id="hi")]}, self.config("t1"))
+        for turn in range(4):
+            graph.invoke({"messages": [
+                RemoveMessage(id=m.id) for m in graph.get_state(self.config("t1")).values["messages"]
+            ] + [HumanMessage(content=f"turn {turn}")]}, self.config("t1"))
+
+        cached = set(checkpointer._cache[("t1", "")].messages)
+        stored = {row[0] for row in checkpointer._conn.execute("SELECT digest FROM messages")}
+        self.assertLessEqual(cached, stored)
+        self.assertEqual(len(cached), 2)
+
+        # A digest the cache still trusts must be readable cold.
+        graph.invoke({"messages": [HumanMessage(content="hi", id="hi")]}, self.config("t1"))
+        reopened = build_graph(SQLiteCheckpointer(self.path))
+        messages = reopened.get_state(self.config("t1")).values["messages"]
+        self.assertEqual([m.content for m in messages], ["turn 3", "echo: turn 3", "hi", "echo: hi"])
+
+    def test_async_api_round_trips(self):
+        graph = build_graph(SQLiteCheckpointer(self.path))
+
+        async def chat():
+            await graph.ainvoke({"messages": [HumanMessage(content="hi")]}, self.config("t1"))
+            await graph.ainvoke({"messages": [HumanMessage(content="again")]}, self.config("t1"))
+            state = await graph.aget_state(self.config("t1"))
+            history = [item async for item in graph.aget_state_history(self.config("t1"))]
+            return state, history
+
+        state, history = asyncio.run(chat())
+        self.assertEqual(len(state.values["messages"]), 4)
+        self.assertGreater(len(history), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# tests/test_context_packer.py
+
+import unittest
+from langchain_core.documents import Document
+from langchain_ai_agent.retriever.context_packer import estimate_tokens, pack_context
+
+
+def chunk(text, chunk_id, doc_path="/docs/a.txt"):
+    return Document(page_content=text, metadata={"chunk_id": chunk_id, "doc_path": doc_path})
+
+
+class TestContextPacker(unittest.TestCase):
+    def test_merges_adjacent_chunks_and_removes_overlap(self):
+        docs = [
+            chunk("the renewal date is set in clause four.", 1),
+            chunk("The contract starts in May and the renewal date", 0),
+        ]
+        packed = pack_context(docs)
+        self.assertEqual(len(packed), 1)
+        self.assertEqual(
+            packed[0].page_content,
+            "The contract starts in May and the renewal date is set in clause four."
+        )
+        self.assertEqual(packed[0].metadata["chunk_ids"], [0, 1])
+
+    def test_keeps_relevance_order_across_files(self):
+        docs = [chunk("Beta content here.", 3, "/docs/b.txt"), chunk("Alpha content here.", 0)]
+        packed = pack_context(docs)
+        self.assertEqual([d.page_content for d in packed], ["Beta content here.", "Alpha content here."])
+
+    def test_drops_near_duplicates(self):
+        text = "Refunds are processed within fourteen days of the request being approved by finance."
+        docs = [chunk(text, 0, "/docs/a.txt"), chunk(text + " Thanks.", 5, "/docs/copy.txt")]
+        self.assertEqual(len(pack_context(docs)), 1)
+
+    def test_respects_token_budget(self):
+        docs = [chunk(f"word{i} " * 400, i, f"/docs/{i}.txt") for i in range(5)]
+        packed = pack_context(docs, token_budget=800)
+        self.assertLessEqual(sum(estimate_tokens(d.page_content) for d in packed), 800 + 1)
+        self.assertTrue(packed[-1].metadata.get("truncated"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# tests/test_doc_to_action_pipeline.py
+
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.runnables import RunnableLambda
+
+load_dotenv()
+
+from langchain_ai_agent.pipelines import doc_to_action_pipeline, long_document
+from langchain_ai_agent.pipelines.doc_to_action_pipeline import run_pipeline
+
+
+class TestRunPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.docs_dir = Path("tests/tmp_pipeline_docs")
+        self.index_dir = Path("tests/tmp_pipeline_index")
+        self.docs_dir.mkdir(parents=True, exist_ok=True)
+        (self.docs_dir / "note.txt").write_text("Please reset my password, the login page rejects it.")
+        (self.docs_dir / "contract.txt").write_text("\n\n".join(
+            f"Clause {i}. The supplier shall deliver all goods on time and bear any losses. " * 8
+            for i in range(40)
+        ))
+
+    def tearDown(self):
+        for path in (self.docs_dir, self.index_dir):
+            if path.exists():
+                shutil.rmtree(path)
+
+    async def test_files_are_chunked_indexed_and_classified(self):
+        short_inputs, long_inputs = [], []
+
+        def classify(x):
+            short_inputs.append(x["text"])
+            return {"task": "triage", "output": {"priority": "low"}}
+
+        async def map_reduce(chunks):
+            long_inputs.append(chunks)
+            return {"task": "contract", "output": {"risks_found": []}}
+
+        with patch.object(doc_to_action_pipeline, "PIPELINE_PERSIST_DIR", str(self.index_dir)), \
+                patch("langchain_ai_agent.retriever.vector_store.get_embeddings",
+                      return_value=DeterministicFakeEmbedding(size=8)), \
+                patch("langchain_ai_agent.agents.base_agent.get_agent_pipeline",
+                      return_value=RunnableLambda(classify)), \
+                patch.object(long_document, "process_long_document", side_effect=map_reduce):
+            result = await run_pipeline(str(self.docs_dir))
+
+        self.assertEqual(result["status"], "classified")
+        labels = {doc["filename"]: doc["label"] for doc in result["documents"]}
+        self.assertEqual(labels, {"note.txt": "triage", "contract.txt": "contract"})
+        self.assertEqual(short_inputs, ["Please reset my password, the login page rejects it."])
+        self.assertEqual(len(long_inputs), 1)
+        self.assertGreaterEqual(len(long_inputs[0]), long_document.LONG_DOC_MIN_CHUNKS)
+        self.assertTrue((self.index_dir / "index.faiss").exists())
+
+    async def test_empty_directory_reports_no_chunks(self):
+        empty = self.docs_dir / "empty"
+        empty.mkdir()
+        with patch.object(doc_to_action_pipeline, "PIPELINE_PERSIST_DIR", str(self.index_dir)), \
+                patch("langchain_ai_agent.retriever.vector_store.get_embeddings",
+                      return_value=DeterministicFakeEmbedding(size=8)):
+            result = await run_pipeline(str(empty))
+        self.assertEqual(result, {"status": "no_chunks"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+# tests/test_docstore.py
+
+import unittest
+import shutil
+from pathlib import Path
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_ai_agent.retriever.docstore import ChunkDocstore, ColumnarChunks, RowMap, write_chunks
+
+
+class TestColumnarChunks(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path("tests/tmp_chunk_store")
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.test_dir / "chunks.bin"
+        docs = {
+            f"id-{i}": Document(page_content=f"chunk {i} ✓", metadata={
+                "chunk_id": i, "filename": f"doc{i % 2}.pdf", "source_type": "pdf"
+            })
+            for i in range(6)
+        }
+        docs["id-x"] = Document(page_content="no metadata")
+        self.ids = list(docs)
+        write_chunks(self.path, InMemoryDocstore(docs), dict(enumerate(self.ids)))
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_round_trip(self):
+        chunks = ColumnarChunks(self.path)
+        self.assertEqual(len(chunks), 7)
+        doc = chunks.document(3)
+        self.assertEqual(doc.id, "id-3")
+        self.assertEqual(doc.page_content, "chunk 3 ✓")
+        self.assertEqual(doc.metadata, {"chunk_id": 3, "filename": "doc1.pdf", "source_type": "pdf"})
+        self.assertEqual(chunks.document(6).metadata, {})
+
+    def test_repeated_values_are_interned(self):
+        chunks = ColumnarChunks(self.path)
+        # 6 chunk ids + 2 filenames + 1 source type
+        self.assertEqual(len(chunks._value_offsets) - 1, 9)
+
+    def test_rows_by_id(self):
+        chunks = ColumnarChunks(self.path)
+        self.assertEqual(list(chunks.rows(["id-5", "missing", "id-0"])), [5, 0])
+        self.assertEqual(RowMap(chunks)[2], "id-2")
+
+    def test_overlay_add_and_delete(self):
+        docstore = ChunkDocstore(ColumnarChunks(self.path))
+        docstore.add({"new": Document(page_content="fresh")})
+        docstore.delete(["id-1"])
+        self.assertEqual(docstore.search("new").page_content, "fresh")
+        self.assertIsInstance(docstore.search("id-1"), str)
+        self.assertEqual(docstore.search("id-2").page_content, "chunk 2 ✓")
+
+    def test_empty_store(self):
+        write_chunks(self.path, InMemoryDocstore({}), {})
+        chunks = ColumnarChunks(self.path)
+        self.assertEqual(len(chunks), 0)
+        self.assertEqual(len(chunks.rows(["id-0"])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
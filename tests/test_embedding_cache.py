@@ -0,0 +1,76 @@
+# tests/test_embedding_cache.py
+
+import unittest
+import shutil
+import multiprocessing
+from pathlib import Path
+from langchain_ai_agent.retriever.embedding_cache import EmbeddingCache, text_key
+
+
+def _put_from_process(args):
+    cache_dir, worker = args
+    cache = EmbeddingCache(cache_dir, "test/concurrent")
+    for i in range(20):
+        cache.put_many([f"w{worker}-{i}-{j}" for j in range(5)], [[worker, i, j] for j in range(5)])
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path("tests/tmp_embedding_cache")
+        self.cache = EmbeddingCache(str(self.test_dir), "test/model", max_entries=2)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.cache.get_many(["hello"]), [None])
+        self.cache.put_many(["hello"], [[1.0, 2.0, 3.0]])
+        self.assertEqual(self.cache.get_many(["hello"]), [[1.0, 2.0, 3.0]])
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_persists_across_instances(self):
+        self.cache.put_many(["boilerplate clause"], [[0.5, 0.25]])
+        reopened = EmbeddingCache(str(self.test_dir), "test/model")
+        self.assertEqual(reopened.get_many(["boilerplate clause"]), [[0.5, 0.25]])
+
+    def test_keyed_by_model_name(self):
+        self.cache.put_many(["same text"], [[1.0]])
+        other = EmbeddingCache(str(self.test_dir), "other/model")
+        self.assertEqual(other.get_many(["same text"]), [None])
+
+    def test_concurrent_writers_never_share_a_slot(self):
+        cache = EmbeddingCache(str(self.test_dir), "test/concurrent", max_entries=1000)
+        cache.put_many(["seed"], [[0.0, 0.0, 0.0]])
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            pool.map(_put_from_process, [(str(self.test_dir), w) for w in range(1, 5)])
+
+        texts = [f"w{w}-{i}-{j}" for w in range(1, 5) for i in range(20) for j in range(5)]
+        expected = [[float(w), float(i), float(j)] for w in range(1, 5) for i in range(20) for j in range(5)]
+        self.assertEqual(cache.get_many(texts), expected)
+
+    def test_reader_opened_empty_sees_other_writers(self):
+        reader = EmbeddingCache(str(self.test_dir), "test/model")
+        self.assertEqual(reader.get_many(["hello"]), [None])
+        self.cache.put_many(["hello"], [[1.0, 2.0]])
+        self.assertEqual(reader.get_many(["hello"]), [[1.0, 2.0]])
+
+    def test_slot_being_rewritten_is_a_miss(self):
+        self.cache.put_many(["hello"], [[1.0, 2.0]])
+        reader = EmbeddingCache(str(self.test_dir), "test/model")
+        self.assertEqual(reader.get_many(["hello"]), [[1.0, 2.0]])
+        # What another process's put_many does to a slot it is about to reuse.
+        slot, _ = reader._lookup_slots([text_key("hello")])[text_key("hello")]
+        reader._generations[slot] += 1
+        self.assertEqual(reader.get_many(["hello"]), [None])
+
+    def test_lru_eviction(self):
+        self.cache.put_many(["a", "b"], [[1.0], [2.0]])
+        self.cache.get_many(["a"])  # "b" is now least recently used
+        self.cache.put_many(["c"], [[3.0]])
+        self.assertEqual(self.cache.get_many(["a", "b", "c"]), [[1.0], None, [3.0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
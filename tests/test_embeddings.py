@@ -0,0 +1,66 @@
+# tests/test_embeddings.py
+
+import unittest
+from langchain_ai_agent.retriever.embeddings import (
+    get_embeddings,
+    DEFAULT_MODEL_NAME,
+    EmbeddingBatcher,
+)
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TestSharedEmbeddings(unittest.TestCase):
+    def test_same_instance_per_model(self):
+        first = get_embeddings(DEFAULT_MODEL_NAME)
+        second = get_embeddings(DEFAULT_MODEL_NAME)
+        self.assertIs(first, second)
+
+    def test_embed_query_dimension(self):
+        vector = get_embeddings().embed_query("LangChain helps build LLM-powered apps.")
+        self.assertEqual(len(vector), 384)
+
+    def test_embed_documents_batch(self):
+        vectors = get_embeddings().embed_documents(["first chunk", "second chunk"])
+        self.assertEqual(len(vectors), 2)
+
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def _fake_embed(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def test_concurrent_requests_are_coalesced(self):
+        batcher = EmbeddingBatcher(self._fake_embed, max_batch_size=8, max_wait_ms=50)
+        futures = batcher.submit(["a", "bb", "ccc"])
+        self.assertEqual([f.result(timeout=5) for f in futures], [[1.0], [2.0], [3.0]])
+        self.assertEqual(len(self.batches), 1)
+
+    def test_batch_size_is_bounded(self):
+        batcher = EmbeddingBatcher(self._fake_embed, max_batch_size=2, max_wait_ms=50)
+        futures = batcher.submit(["a", "b", "c", "d", "e"])
+        [f.result(timeout=5) for f in futures]
+        self.assertTrue(all(len(batch) <= 2 for batch in self.batches))
+
+    def test_duplicate_texts_embedded_once(self):
+        batcher = EmbeddingBatcher(self._fake_embed, max_batch_size=8, max_wait_ms=50)
+        futures = batcher.submit(["same", "same"])
+        self.assertEqual(futures[0].result(timeout=5), futures[1].result(timeout=5))
+        self.assertEqual(self.batches, [["same"]])
+
+    def test_errors_propagate_to_futures(self):
+        def failing(texts):
+            raise RuntimeError("model down")
+
+        batcher = EmbeddingBatcher(failing, max_wait_ms=1)
+        future = batcher.submit(["text"])[0]
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
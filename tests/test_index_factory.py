@@ -0,0 +1,98 @@
+# tests/test_index_factory.py
+
+import unittest
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_ai_agent.retriever.index_factory import IndexConfig, index_kind, rebuild_without
+from langchain_ai_agent.retriever.persistence import IncrementalIndex
+from langchain_ai_agent.retriever.rebuild import main as rebuild_main
+
+
+class TestIndexTypes(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path("tests/tmp_index_types")
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.texts = [f"chunk number {i}" for i in range(400)]
+        self.vectors = self.embeddings.embed_documents(self.texts)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _index(self, **config):
+        return IncrementalIndex(
+            self.test_dir, self.embeddings, checkpoint_every=1000,
+            index_config=IndexConfig(**config) if config else None
+        )
+
+    def _top1(self, index, i):
+        return index.search(self.vectors[i], k=1)[0][0].page_content
+
+    def test_hnsw_built_at_checkpoint_and_reloaded(self):
+        index = self._index(index_type="hnsw", hnsw_m=8)
+        index.add(self.texts, self.vectors, [{} for _ in self.texts])
+        index.checkpoint()
+        self.assertEqual(index_kind(index.store.index), "hnsw")
+
+        reopened = self._index(index_type="hnsw", hnsw_m=8)
+        reopened.load()
+        self.assertEqual(index_kind(reopened.store.index), "hnsw")
+        self.assertEqual(self._top1(reopened, 7), "chunk number 7")
+
+    def test_ivf_waits_for_enough_training_vectors(self):
+        index = self._index(index_type="ivf_flat", min_train_vectors=1000)
+        index.add(self.texts, self.vectors, [{} for _ in self.texts])
+        index.checkpoint()
+        self.assertEqual(index_kind(index.store.index), "flat")
+
+    def test_delete_on_hnsw_keeps_mapping(self):
+        index = self._index(index_type="hnsw", hnsw_m=8)
+        ids = index.add(self.texts, self.vectors, [{} for _ in self.texts])
+        index.checkpoint()
+        index.delete(ids[:10])
+        self.assertEqual(self._top1(index, 50), "chunk number 50")
+        self.assertNotEqual(self._top1(index, 3), "chunk number 3")
+        results = index.search(self.vectors[0], k=3, ids=ids[8:12])
+        self.assertEqual({doc.page_content for doc, _ in results}, {"chunk number 10", "chunk number 11"})
+        index.checkpoint()
+        self.assertEqual(index.store.index.ntotal, 390)
+        self.assertEqual(self._top1(index, 50), "chunk number 50")
+
+    def test_deletes_rebuild_once_at_checkpoint(self):
+        index = self._index(index_type="ivf_flat", min_train_vectors=100, nprobe=4)
+        ids = index.add(self.texts, self.vectors, [{} for _ in self.texts])
+        index.checkpoint()
+        with patch("langchain_ai_agent.retriever.persistence.rebuild_without", wraps=rebuild_without) as rebuild:
+            for doc_id in ids[:5]:
+                index.delete([doc_id])
+            self.assertEqual(rebuild.call_count, 0)
+            index.checkpoint()
+            self.assertEqual(rebuild.call_count, 1)
+
+        reopened = self._index(index_type="ivf_flat", min_train_vectors=100, nprobe=4)
+        reopened.load()
+        self.assertEqual(reopened.store.index.ntotal, 395)
+        self.assertEqual(self._top1(reopened, 123), "chunk number 123")
+
+    def test_rebuild_command_migrates_flat_index(self):
+        index = self._index()
+        index.add(self.texts, self.vectors, [{} for _ in self.texts])
+        index.checkpoint()
+
+        rebuild_main([
+            "--persist-dir", str(self.test_dir), "--index-type", "ivf_flat",
+            "--min-train-vectors", "100", "--nprobe", "4",
+        ])
+        reopened = self._index()
+        reopened.load()
+        self.assertEqual(reopened.index_config.index_type, "ivf_flat")
+        self.assertEqual(index_kind(reopened.store.index), "ivf_flat")
+        self.assertEqual(reopened.store.index.ntotal, 400)
+        self.assertEqual(self._top1(reopened, 123), "chunk number 123")
+
+
+if __name__ == "__main__":
+    unittest.main()
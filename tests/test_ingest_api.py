@@ -1,9 +1,12 @@
 # tests/test_ingest_api.py
 
 import os
+import time
 import shutil
+import threading
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from langchain_ai_agent.api.main import app
 from dotenv import load_dotenv
@@ -62,6 +65,37 @@ class TestIngestAPI(unittest.TestCase):
 
         empty_file_path.unlink()
 
+    def test_concurrent_ingests_write_one_at_a_time(self):
+        active, overlaps = [0], []
+        lock = threading.Lock()
+
+        def fake_sync(upload_dir, ingestor, embedder):
+            with lock:
+                active[0] += 1
+                overlaps.append(active[0])
+            time.sleep(0.2)
+            with lock:
+                active[0] -= 1
+            return {"num_files": 1, "num_chunks": 1, "files": {"added": 1, "modified": 0, "deleted": 0, "unchanged": 0}}
+
+        def upload(name):
+            with open(self.sample_file_path, "rb") as f:
+                responses.append(self.client.post(
+                    "/api/ingest", files={"files": (name, f, "text/plain")}
+                ))
+
+        responses = []
+        with patch("langchain_ai_agent.api.ingest_api.sync_directory", side_effect=fake_sync), \
+                patch("langchain_ai_agent.api.ingest_api.get_embedder"):
+            uploads = [threading.Thread(target=upload, args=(f"sample_{i}.txt",)) for i in range(2)]
+            for thread in uploads:
+                thread.start()
+            for thread in uploads:
+                thread.join(10)
+
+        self.assertEqual([r.status_code for r in responses], [200, 200])
+        self.assertEqual(max(overlaps), 1)
+
     def test_ingest_missing_file(self):
         response = self.client.post("/api/ingest", files={})
         self.assertEqual(response.status_code, 422)
@@ -0,0 +1,73 @@
+# tests/test_llm_cache.py
+
+import tempfile
+import unittest
+from pathlib import Path
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_ai_agent.agents.llm import BoundedSQLiteCache, uncache_on_failure
+
+
+class TestBoundedSQLiteCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "llm_cache.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        cache = BoundedSQLiteCache(self.path, max_entries=10)
+        llm = FakeListChatModel(responses=["first", "second"], cache=cache)
+        self.assertEqual(llm.invoke("classify this").content, "first")
+        self.assertEqual(llm.invoke("classify this").content, "first")
+        self.assertEqual(llm.invoke("something else").content, "second")
+
+    def test_cache_persists_and_is_keyed_by_model_config(self):
+        llm = FakeListChatModel(responses=["stored", "fresh"], cache=BoundedSQLiteCache(self.path, max_entries=10))
+        llm.invoke("prompt")
+
+        reopened = BoundedSQLiteCache(self.path, max_entries=10)
+        self.assertEqual(reopened.size(), 1)
+        same = FakeListChatModel(responses=["stored", "fresh"], cache=reopened)
+        same.invoke("warm up")
+        self.assertEqual(same.invoke("prompt").content, "stored")
+        other = FakeListChatModel(responses=["other model"], cache=reopened)
+        self.assertEqual(other.invoke("prompt").content, "other model")
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = BoundedSQLiteCache(self.path, max_entries=2)
+        llm = FakeListChatModel(responses=["a", "b", "c"], cache=cache)
+        llm.invoke("one")
+        llm.invoke("two")
+        llm.invoke("one")
+        llm.invoke("three")
+        self.assertEqual(cache.size(), 2)
+        self.assertEqual(llm.invoke("one").content, "a")
+        self.assertIsNone(cache.lookup("two", llm._get_llm_string()))
+
+    def test_replacing_an_entry_does_not_grow_the_count(self):
+        cache = BoundedSQLiteCache(self.path, max_entries=10)
+        for text in ["a", "b", "c"]:
+            cache.update("prompt", "llm", [ChatGeneration(message=AIMessage(content=text))])
+        self.assertEqual(cache.size(), 1)
+        self.assertEqual(cache._count, 1)
+        self.assertEqual(cache.lookup("prompt", "llm")[0].message.content, "c")
+
+    def test_completion_failing_validation_is_not_replayed(self):
+        cache = BoundedSQLiteCache(self.path, max_entries=10)
+        llm = FakeListChatModel(responses=["not json", '{"ok": true}'], cache=cache)
+        chain = PromptTemplate.from_template("{text}") | uncache_on_failure(llm, JsonOutputParser())
+
+        with self.assertRaises(Exception):
+            chain.invoke({"text": "classify this"})
+        self.assertEqual(cache.size(), 0)
+        self.assertEqual(chain.invoke({"text": "classify this"}), {"ok": True})
+        self.assertEqual(cache.size(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
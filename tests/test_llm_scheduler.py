@@ -0,0 +1,90 @@
+# tests/test_llm_scheduler.py
+
+import time
+import asyncio
+import unittest
+from langchain_ai_agent.agents.llm_scheduler import LLMScheduler, Priority, _priority, iterate_at_priority, llm_priority
+
+
+class TestLLMScheduler(unittest.IsolatedAsyncioTestCase):
+    def make(self, **kwargs):
+        options = {"requests_per_minute": 6000, "tokens_per_minute": 1e9, "initial_concurrency": 1, "max_concurrency": 4}
+        return LLMScheduler(**{**options, **kwargs})
+
+    async def test_interactive_calls_are_admitted_before_batch_calls(self):
+        scheduler = self.make()
+        await scheduler.acquire("gemini", 10)
+        order = []
+
+        async def call(name):
+            await scheduler.acquire("gemini", 10)
+            order.append(name)
+            scheduler.release("gemini", latency=0.1, estimated_tokens=10)
+
+        with llm_priority(Priority.BATCH):
+            batch = asyncio.create_task(call("batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive"))
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.stats()["gemini"]["queued"], 2)
+
+        scheduler.release("gemini", latency=0.1, estimated_tokens=10)
+        await asyncio.gather(batch, interactive)
+        self.assertEqual(order, ["interactive", "batch"])
+
+    async def test_iterate_at_priority_keeps_priority_in_the_producer(self):
+        async def produce():
+            for i in range(3):
+                yield i, _priority.get()
+
+        seen = []
+        async for item in iterate_at_priority(produce(), Priority.BATCH):
+            seen.append((*item, _priority.get()))
+        self.assertEqual(seen, [(i, Priority.BATCH, Priority.INTERACTIVE) for i in range(3)])
+
+        async def fail():
+            yield 1
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            async for _ in iterate_at_priority(fail(), Priority.BATCH):
+                pass
+
+        # Closing early cancels the producer without touching this context.
+        items = iterate_at_priority(produce(), Priority.BATCH)
+        await items.__anext__()
+        await items.aclose()
+        self.assertEqual(_priority.get(), Priority.INTERACTIVE)
+
+    async def test_throttling_halves_concurrency_and_pauses_the_lane(self):
+        scheduler = self.make(initial_concurrency=4)
+        await scheduler.acquire("gemini", 10)
+        scheduler.release("gemini", estimated_tokens=10, throttled=True)
+        stats = scheduler.stats()["gemini"]
+        self.assertEqual(stats["concurrency_limit"], 2)
+        self.assertGreater(stats["paused_for_s"], 0)
+
+    async def test_fast_calls_grow_concurrency_and_token_budget_delays_calls(self):
+        scheduler = self.make(tokens_per_minute=6000)
+        for _ in range(3):
+            await scheduler.acquire("gemini", 10)
+            scheduler.release("gemini", latency=0.1, estimated_tokens=10)
+        self.assertGreater(scheduler.stats()["gemini"]["concurrency_limit"], 1)
+
+        # 100 tokens/s with a 1000 token burst: the burst is spent, the next call waits ~0.2s.
+        await scheduler.acquire("gemini", 1000)
+        scheduler.release("gemini", latency=0.1, estimated_tokens=1000)
+        started = time.monotonic()
+        await scheduler.acquire("gemini", 20)
+        self.assertGreater(time.monotonic() - started, 0.1)
+
+    def test_sync_callers_share_the_lane(self):
+        scheduler = self.make()
+        scheduler.acquire_sync("gemini", 10)
+        self.assertEqual(scheduler.stats()["gemini"]["in_flight"], 1)
+        scheduler.release("gemini", latency=0.1, estimated_tokens=10)
+        self.assertEqual(scheduler.stats()["gemini"]["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# tests/test_long_document.py
+
+import unittest
+from unittest.mock import patch
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableLambda
+
+load_dotenv()
+
+from langchain_ai_agent.pipelines import long_document
+from langchain_ai_agent.pipelines.long_document import batch_chunks, process_long_document, sample_chunks
+
+
+class TestLongDocument(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.chunks = [f"clause {i}" for i in range(20)]
+
+    def test_sample_and_batches_cover_the_document(self):
+        self.assertEqual(sample_chunks(self.chunks, 4), ["clause 0", "clause 5", "clause 10", "clause 15"])
+        batches = batch_chunks(self.chunks, 8)
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(batches[-1], "\n".join(self.chunks[16:]))
+
+    async def test_batches_are_mapped_and_reduced(self):
+        seen = []
+
+        def flag_risks(x):
+            seen.append(x["text"])
+            return {"risks_found": ["Unlimited liability", x["text"].split("\n")[0]], "explanation": "Liability."}
+
+        with patch.object(long_document, "classify_chain", RunnableLambda(lambda x: "Contract.")), \
+                patch.object(long_document, "route_to_tool", lambda label: RunnableLambda(flag_risks)):
+            result = await process_long_document(self.chunks)
+
+        self.assertEqual(result["task"], "contract")
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(
+            result["output"]["risks_found"], ["Unlimited liability", "clause 0", "clause 8", "clause 16"]
+        )
+        self.assertEqual(result["output"]["explanation"], "Liability.")
+        self.assertEqual(result["agent_trace"]["batches"], 3)
+
+    async def test_failed_batches_are_skipped(self):
+        def answer(x):
+            if "clause 0" in x["text"]:
+                raise ValueError("bad JSON")
+            return {"qa_pairs": [{"question": "What is clause 8?", "answer": "A clause."}]}
+
+        with patch.object(long_document, "classify_chain", RunnableLambda(lambda x: "knowledge_base")), \
+                patch.object(long_document, "route_to_tool", lambda label: RunnableLambda(answer)):
+            result = await process_long_document(self.chunks)
+
+        self.assertEqual(len(result["output"]["qa_pairs"]), 1)
+        self.assertEqual(result["agent_trace"]["failed_batches"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# tests/test_manifest.py
+
+import os
+import unittest
+import shutil
+from pathlib import Path
+from langchain_ai_agent.ingestion.manifest import IngestManifest, sync_directory
+from langchain_ai_agent.ingestion.reader import DocumentIngestor
+from langchain_ai_agent.retriever.vector_store import DocumentEmbedder
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TestIngestManifest(unittest.TestCase):
+    def setUp(self):
+        self.docs_dir = Path("tests/tmp_manifest_docs")
+        self.index_dir = Path("tests/tmp_manifest_index")
+        self.docs_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        (self.docs_dir / "a.txt").write_text("Contract A covers payment terms.")
+        (self.docs_dir / "b.txt").write_text("Ticket B reports a login failure.")
+
+    def tearDown(self):
+        for path in (self.docs_dir, self.index_dir):
+            if path.exists():
+                shutil.rmtree(path)
+
+    def _files(self):
+        return sorted(self.docs_dir.glob("*.txt"))
+
+    def test_first_run_reports_all_added(self):
+        diff = IngestManifest(str(self.index_dir)).diff(self._files(), root=self.docs_dir)
+        self.assertEqual(len(diff.added), 2)
+        self.assertEqual(diff.modified + diff.deleted + diff.unchanged, [])
+
+    def test_detects_modified_deleted_and_touched(self):
+        manifest = IngestManifest(str(self.index_dir))
+        manifest.commit(manifest.diff(self._files(), root=self.docs_dir))
+
+        (self.docs_dir / "a.txt").write_text("Contract A now has a termination clause.")
+        (self.docs_dir / "b.txt").unlink()
+        (self.docs_dir / "c.txt").write_text("Meeting note C.")
+        untouched = self.docs_dir / "a.txt"
+        os.utime(untouched)
+
+        diff = IngestManifest(str(self.index_dir)).diff(self._files(), root=self.docs_dir)
+        self.assertEqual(diff.modified, [str(self.docs_dir / "a.txt")])
+        self.assertEqual(diff.deleted, [str(self.docs_dir / "b.txt")])
+        self.assertEqual(diff.added, [str(self.docs_dir / "c.txt")])
+
+    def test_touched_file_with_same_content_is_unchanged(self):
+        manifest = IngestManifest(str(self.index_dir))
+        manifest.commit(manifest.diff(self._files(), root=self.docs_dir))
+        os.utime(self.docs_dir / "a.txt", (1, 1))
+
+        diff = IngestManifest(str(self.index_dir)).diff(self._files(), root=self.docs_dir)
+        self.assertEqual(len(diff.unchanged), 2)
+
+    def test_files_without_chunks_are_retried(self):
+        manifest = IngestManifest(str(self.index_dir))
+        diff = manifest.diff(self._files(), root=self.docs_dir)
+        manifest.commit(diff, indexed={str(self.docs_dir / "a.txt")})
+
+        diff = IngestManifest(str(self.index_dir)).diff(self._files(), root=self.docs_dir)
+        self.assertEqual(diff.added, [str(self.docs_dir / "b.txt")])
+        self.assertEqual(diff.unchanged, [str(self.docs_dir / "a.txt")])
+
+    def test_sync_directory_replaces_and_purges_chunks(self):
+        ingestor = DocumentIngestor()
+        embedder = DocumentEmbedder(persist_dir=str(self.index_dir))
+
+        first = sync_directory(self.docs_dir, ingestor, embedder)
+        self.assertEqual(first["files"]["added"], 2)
+        self.assertEqual(embedder._vector_store.index.ntotal, 2)
+
+        second = sync_directory(self.docs_dir, ingestor, embedder)
+        self.assertEqual(second["num_chunks"], 0)
+        self.assertEqual(second["files"]["unchanged"], 2)
+
+        (self.docs_dir / "a.txt").write_text("Contract A was amended.")
+        (self.docs_dir / "b.txt").unlink()
+        third = sync_directory(self.docs_dir, ingestor, embedder)
+        self.assertEqual(third["files"]["modified"], 1)
+        self.assertEqual(third["files"]["deleted"], 1)
+
+        store = embedder._vector_store
+        texts = [store.docstore.search(doc_id).page_content for doc_id in store.index_to_docstore_id.values()]
+        self.assertEqual(texts, ["Contract A was amended."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,10 @@
 
 import unittest
 import shutil
+import tempfile
+import asyncio
 from pathlib import Path
+from unittest.mock import patch
 from langchain_ai_agent.feedback_loop.memory_store import MemoryStore
 from dotenv import load_dotenv
 
@@ -49,6 +52,34 @@ class TestMemoryStore(unittest.TestCase):
         self.assertIn("output", result["metadata"])
         self.assertEqual(result["metadata"]["filename"], self.meta["filename"])
 
+    def test_query_similar_many_matches_single_lookups(self):
+        self.store.add_experience(
+            input_text=self.sample_input,
+            output=self.sample_output,
+            task=self.task,
+            metadata=self.meta
+        )
+        vectors = self.store.embeddings.embed_documents([self.sample_input, "Unrelated input"])
+
+        results = self.store.query_similar_many(vectors, k=1)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], self.store.query_similar(self.sample_input, k=1, embedding=vectors[0]))
+        self.assertEqual(results[0][0]["metadata"]["output"], self.sample_output)
+
+    def test_output_is_read_back_from_log_after_reload(self):
+        self.store.add_experience(
+            input_text=self.sample_input,
+            output=self.sample_output,
+            task=self.task,
+            metadata=self.meta
+        )
+        self.store.index.checkpoint()
+
+        reopened = MemoryStore(persist_dir=str(self.test_dir))
+        result = reopened.query_similar(self.sample_input, k=1)[0]
+        self.assertEqual(result["metadata"]["output"], self.sample_output)
+        self.assertNotIn("log_offset", result["metadata"])
+
     def test_query_no_data(self):
         empty_dir = Path("tests/empty_memory_store")
         empty_store = MemoryStore(persist_dir=str(empty_dir))
@@ -64,5 +95,109 @@ class TestMemoryStore(unittest.TestCase):
             self.assertTrue(any("Experience validation failed" in msg for msg in cm.output))
 
 
+class TestWriteBehindMemoryStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="write_behind_store_"))
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+
+    def test_experiences_are_queued_then_drained(self):
+        async def scenario():
+            store = MemoryStore(persist_dir=str(self.test_dir), write_behind=True, flush_interval=60)
+            await store.start()
+            await store.aadd_experience(
+                input_text="Invoice 4411 is overdue by 30 days.",
+                output={"category": "billing"},
+                task="support_ticket"
+            )
+            queued = store.stats()
+            self.assertEqual(queued["enqueued"], 1)
+            self.assertEqual(queued["queue_depth"], 1)
+            self.assertIsNone(store.vector_store)
+
+            await store.aclose()
+            return store
+
+        store = asyncio.run(scenario())
+        self.assertEqual(store.stats()["flushed"], 1)
+        self.assertEqual(len(store.query_similar("overdue invoice", k=1)), 1)
+
+        reloaded = MemoryStore(persist_dir=str(self.test_dir))
+        self.assertEqual(len(reloaded.query_similar("overdue invoice", k=1)), 1)
+
+    def test_failed_flush_is_counted_and_leaves_no_log_record(self):
+        async def scenario():
+            store = MemoryStore(persist_dir=str(self.test_dir), write_behind=True, flush_interval=60)
+            await store.aadd_experience(
+                input_text="Invoice 4411 is overdue by 30 days.",
+                output={"category": "billing"},
+                task="support_ticket",
+                embedding=[0.1, 0.2, 0.3]
+            )
+            with patch.object(store.index, "add", side_effect=RuntimeError("disk full")):
+                await store.flush()
+            return store
+
+        store = asyncio.run(scenario())
+        self.assertEqual(store.stats()["failed"], 1)
+        self.assertEqual(store.stats()["flushed"], 0)
+        self.assertEqual(store.metadata_log.read_text(), "")
+
+    def test_log_lines_stay_once_the_store_holds_the_batch(self):
+        async def scenario():
+            store = MemoryStore(persist_dir=str(self.test_dir), write_behind=True, flush_interval=60)
+            await store.aadd_experience(
+                input_text="Invoice 4411 is overdue by 30 days.",
+                output={"category": "billing"},
+                task="support_ticket",
+                embedding=[0.1, 0.2, 0.3]
+            )
+            with patch.object(store.index.wal, "append", side_effect=OSError("disk full")):
+                await store.flush()
+            return store
+
+        store = asyncio.run(scenario())
+        self.assertEqual(store.stats()["failed"], 1)
+        result = store.query_similar("Invoice 4411", k=1, embedding=[0.1, 0.2, 0.3])[0]
+        self.assertEqual(result["metadata"]["output"], {"category": "billing"})
+
+    def test_checkpoint_runs_outside_the_search_lock(self):
+        store = MemoryStore(persist_dir=str(self.test_dir))
+        store.index.checkpoint_every = 1
+        held = []
+        checkpoint = store.index.checkpoint
+
+        def spy():
+            held.append(store._lock.locked())
+            checkpoint()
+
+        with patch.object(store.index, "checkpoint", side_effect=spy):
+            store.add_experience(
+                input_text="Invoice 4411 is overdue by 30 days.",
+                output={"category": "billing"},
+                task="support_ticket",
+                embedding=[0.1, 0.2, 0.3]
+            )
+        self.assertEqual(held, [False])
+        self.assertTrue(store.index.has_checkpoint())
+
+    def test_full_queue_applies_backpressure(self):
+        async def scenario():
+            store = MemoryStore(
+                persist_dir=str(self.test_dir), write_behind=True, queue_size=1, flush_interval=60
+            )
+            for i in range(3):
+                await store.aadd_experience(
+                    input_text=f"Support ticket number {i}",
+                    output={},
+                    task="support_ticket"
+                )
+            await store.aclose()
+            return store.stats()
+
+        stats = asyncio.run(scenario())
+        self.assertGreaterEqual(stats["backpressure_waits"], 1)
+        self.assertEqual(stats["flushed"], 3)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,79 @@
+# tests/test_metadata_store.py
+
+import json
+import unittest
+import shutil
+from pathlib import Path
+from langchain_ai_agent.retriever.metadata_store import ChunkMetadataStore
+
+
+class TestChunkMetadataStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path("tests/tmp_metadata_store")
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.store = ChunkMetadataStore(self.test_dir)
+        self.store.add([
+            {"doc_id": "a0", "chunk_id": 0, "filename": "a.txt", "source_type": "txt", "doc_path": "/docs/a.txt"},
+            {"doc_id": "a1", "chunk_id": 1, "filename": "a.txt", "source_type": "txt", "doc_path": "/docs/a.txt"},
+            {"doc_id": "b0", "chunk_id": 0, "filename": "b.pdf", "source_type": "pdf", "doc_path": "/docs/b.pdf"},
+        ], texts=[
+            "Contract CN-4471 renews every year.",
+            "Payment terms are net 30 days.",
+            "Error E1042 appears when the contract is missing.",
+        ])
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_existing_keys(self):
+        found = self.store.existing_keys([(0, "/docs/a.txt"), (2, "/docs/a.txt"), (0, "/other/a.txt")])
+        self.assertEqual(found, {(0, "/docs/a.txt")})
+
+    def test_delete_files(self):
+        self.assertEqual(sorted(self.store.ids_for_files(["/docs/a.txt"])), ["a0", "a1"])
+        self.assertEqual(self.store.delete_files(["/docs/a.txt"]), 2)
+        self.assertEqual(self.store.count(), 1)
+
+    def test_keyword_search_matches_identifiers(self):
+        hits = self.store.keyword_search("what is contract CN-4471?", k=3)
+        self.assertEqual(hits[0][0], "a0")
+        self.assertEqual([doc_id for doc_id, _ in self.store.keyword_search("E1042", k=3)], ["b0"])
+
+    def test_keyword_search_respects_filters_and_deletes(self):
+        hits = self.store.keyword_search("contract", k=3, filters={"source_type": "pdf"})
+        self.assertEqual([doc_id for doc_id, _ in hits], ["b0"])
+        self.store.delete_files(["/docs/b.pdf"])
+        self.assertEqual(self.store.keyword_search("E1042", k=3), [])
+        self.assertEqual(self.store.keyword_count(), 2)
+
+    def test_filter_ids(self):
+        self.assertEqual(self.store.filter_ids({"source_type": "pdf"}), ["b0"])
+        self.assertEqual(
+            sorted(self.store.filter_ids({"source_type": ["pdf", "txt"], "chunk_id": 0})),
+            ["a0", "b0"]
+        )
+        with self.assertRaises(ValueError):
+            self.store.filter_ids({"text": "anything"})
+
+    def test_count_and_matching_ids(self):
+        self.assertEqual(self.store.count_matching({"source_type": "txt"}), 2)
+        self.assertEqual(self.store.count_matching({}), 3)
+        self.assertEqual(self.store.matching_ids(["a0", "b0", "zz"], {"source_type": "txt"}), {"a0"})
+        self.assertEqual(self.store.matching_ids(["a1", "b0"], {}), {"a1", "b0"})
+
+    def test_migrate_jsonl(self):
+        legacy = self.test_dir / "metadata.jsonl"
+        legacy.write_text(
+            json.dumps({"chunk_id": 0, "filename": "c.txt", "source_type": "txt", "doc_path": "/docs/c.txt"}) + "\n"
+            + json.dumps({"chunk_id": 0, "filename": "c.txt", "source_type": "txt", "doc_path": "/old/c.txt"}) + "\n"
+        )
+        imported = self.store.migrate_jsonl(legacy, {(0, "/docs/c.txt"): "c0", (0, "/old/c.txt"): "o0"})
+        self.assertEqual(imported, 2)
+        self.assertFalse(legacy.exists())
+        self.assertEqual(self.store.ids_for_files(["/docs/c.txt"]), ["c0"])
+        self.assertEqual(self.store.ids_for_files(["/old/c.txt"]), ["o0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
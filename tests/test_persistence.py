@@ -0,0 +1,147 @@
+# tests/test_persistence.py
+
+import unittest
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_ai_agent.retriever import persistence
+from langchain_ai_agent.retriever.persistence import IncrementalIndex
+
+
+class TestIncrementalIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path("tests/tmp_incremental_index")
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.embeddings = DeterministicFakeEmbedding(size=8)
+        self.index = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _add(self, index, text):
+        return index.add([text], [self.embeddings.embed_query(text)], [{"text_len": len(text)}])
+
+    def test_small_writes_go_to_log_only(self):
+        self._add(self.index, "first experience")
+        self.assertFalse(self.index.has_checkpoint())
+        self.assertEqual(self.index.wal.count, 1)
+
+    def test_replay_restores_unchecked_writes(self):
+        self._add(self.index, "first experience")
+        self._add(self.index, "second experience")
+
+        reopened = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        store = reopened.load()
+        self.assertEqual(store.index.ntotal, 2)
+
+    def test_checkpoint_triggered_by_log_size(self):
+        for i in range(3):
+            self._add(self.index, f"experience {i}")
+        self.assertTrue(self.index.has_checkpoint())
+        self.assertEqual(self.index.wal.count, 0)
+
+        self._add(self.index, "after checkpoint")
+        reopened = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        self.assertEqual(reopened.load().index.ntotal, 4)
+
+    def test_replay_skips_records_already_checkpointed(self):
+        self._add(self.index, "only once")
+        log = self.index.wal.path.read_text()
+        self.index.checkpoint()
+        # Simulate a crash between checkpoint and log truncation.
+        self.index.wal.path.write_text(log)
+
+        reopened = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        self.assertEqual(reopened.load().index.ntotal, 1)
+
+    def test_torn_final_record_is_ignored(self):
+        self._add(self.index, "complete record")
+        with open(self.index.wal.path, "a") as f:
+            f.write('{"id": "partial')
+
+        reopened = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        self.assertEqual(reopened.load().index.ntotal, 1)
+
+    def test_crash_between_checkpoint_renames_is_completed_on_load(self):
+        for i in range(3):
+            self._add(self.index, f"experience {i}")
+        self._add(self.index, "after checkpoint")
+        real_replace = persistence.os.replace
+        renames = []
+
+        def crash_after_first(src, dst):
+            if renames:
+                raise OSError("simulated crash")
+            renames.append(dst)
+            real_replace(src, dst)
+
+        with patch.object(persistence.os, "replace", side_effect=crash_after_first):
+            with self.assertRaises(OSError):
+                self.index.checkpoint()
+
+        reopened = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        self.assertEqual(reopened.load().index.ntotal, 4)
+        self.assertFalse((self.test_dir / ".checkpoint").exists())
+
+    def test_mismatched_checkpoint_fails_loudly(self):
+        for i in range(3):
+            self._add(self.index, f"experience {i}")
+        first = (self.test_dir / "chunks.bin").read_bytes()
+        for i in range(3, 6):
+            self._add(self.index, f"experience {i}")
+        (self.test_dir / "chunks.bin").write_bytes(first)
+
+        reopened = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        with self.assertRaises(RuntimeError):
+            reopened.load()
+
+    def test_search_restricted_to_ids(self):
+        texts = [f"experience {i}" for i in range(6)]
+        vectors = self.embeddings.embed_documents(texts)
+        ids = self.index.add(texts, vectors, [{"i": i} for i in range(6)])
+        allowed = ids[3:5]
+
+        for subset_max in (4096, 0):  # exact subset scan, then FAISS ID selector
+            with patch.object(persistence, "EXACT_SUBSET_MAX", subset_max):
+                results = self.index.search(vectors[0], k=3, ids=allowed)
+            self.assertEqual({doc.page_content for doc, _ in results}, {"experience 3", "experience 4"})
+
+    def test_search_ids_survive_delete(self):
+        texts = ["keep me", "drop me", "keep me too"]
+        ids = self.index.add(texts, self.embeddings.embed_documents(texts), [{}, {}, {}])
+        self.index.delete([ids[1]])
+        results = self.index.search(self.embeddings.embed_query("keep me too"), k=1, ids=[ids[2]])
+        self.assertEqual(results[0][0].page_content, "keep me too")
+
+    def test_checkpoint_has_no_pickle(self):
+        self._add(self.index, "first experience")
+        self.index.checkpoint()
+        self.assertTrue((self.test_dir / "chunks.bin").exists())
+        self.assertFalse((self.test_dir / "index.pkl").exists())
+
+    def test_read_only_load_serves_from_checkpoint(self):
+        texts = [f"experience {i}" for i in range(5)]
+        ids = self.index.add(texts, self.embeddings.embed_documents(texts), [{"i": i} for i in range(5)])
+        self.index.checkpoint()
+
+        reader = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        store = reader.load_read_only()
+        self.assertTrue(reader.read_only)
+        doc = store.similarity_search_by_vector(self.embeddings.embed_query("experience 2"), k=1)[0]
+        self.assertEqual((doc.page_content, doc.metadata), ("experience 2", {"i": 2}))
+        results = reader.search(self.embeddings.embed_query("experience 0"), k=2, ids=ids[3:])
+        self.assertEqual({d.page_content for d, _ in results}, {"experience 3", "experience 4"})
+        with self.assertRaises(RuntimeError):
+            self._add(reader, "not allowed")
+
+    def test_read_only_load_falls_back_with_pending_log(self):
+        self._add(self.index, "logged only")
+        reader = IncrementalIndex(self.test_dir, self.embeddings, checkpoint_every=3)
+        self.assertEqual(reader.load_read_only().index.ntotal, 1)
+        self.assertFalse(reader.read_only)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+# tests/test_pre_classifier.py
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from langchain_ai_agent.agents.pre_classifier import CentroidClassifier, read_labelled_history
+
+
+class TestCentroidClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = CentroidClassifier(
+            labels=["meeting_note", "contract"], threshold=0.9, min_examples=2, scale=50.0
+        )
+
+    def test_falls_back_until_every_label_has_examples(self):
+        self.classifier.add([[1.0, 0.0], [0.9, 0.1]], ["meeting_note", "meeting_note"])
+        self.assertFalse(self.classifier.ready)
+        self.assertIsNone(self.classifier.classify([1.0, 0.0]))
+
+    def test_routes_confident_inputs_and_defers_ambiguous_ones(self):
+        self.classifier.fit(
+            [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.1, 0.9]],
+            ["meeting_note", "meeting_note", "contract", "contract"]
+        )
+        label, confidence = self.classifier.classify([0.95, 0.05])
+        self.assertEqual(label, "meeting_note")
+        self.assertGreaterEqual(confidence, 0.9)
+        self.assertIsNone(self.classifier.classify([0.7, 0.7]))
+        stats = self.classifier.stats()
+        self.assertEqual((stats["local"], stats["fallback"]), (1, 1))
+
+    def test_history_keeps_only_successful_llm_labels(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / "memory_log.jsonl"
+            records = [
+                {"input_text": "standup notes", "task": "meeting_note", "output": {"summary": "..."}, "meta": {}},
+                {"input_text": "broken", "task": "contract", "output": {"error": "Tool execution failed"}},
+                {"input_text": "auto", "task": "contract", "output": {}, "meta": {"routed_by": "pre_classifier"}},
+                {"input_text": "bad label", "task": "poem", "output": {}},
+            ]
+            log.write_text("\n".join(json.dumps(r) for r in records) + "\nnot json\n")
+            self.assertEqual(read_labelled_history(log), (["standup notes"], ["meeting_note"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
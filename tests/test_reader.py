@@ -0,0 +1,63 @@
+# tests/test_reader.py
+
+import os
+import unittest
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from langchain_ai_agent.ingestion import reader
+from langchain_ai_agent.ingestion.reader import DocumentIngestor
+
+
+def _crash_on_doc_0(filepath: str):
+    # Runs in a spawned worker: kill the process like a segfaulting parser would.
+    if filepath.endswith("doc_0.txt"):
+        os._exit(1)
+    return [{"filename": Path(filepath).name}]
+
+
+class TestStreamingIngestion(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path("tests/tmp_reader_dir")
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+        for i in range(4):
+            (self.test_dir / f"doc_{i}.txt").write_text(f"Document number {i}. " * 60)
+        (self.test_dir / "notes.xyz").write_text("unsupported")
+        self.ingestor = DocumentIngestor()
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_batches_are_bounded(self):
+        batches = list(self.ingestor.iter_chunk_batches(self.test_dir, batch_size=3))
+        self.assertGreater(len(batches), 1)
+        self.assertTrue(all(0 < len(batch) <= 3 for batch in batches))
+
+    def test_streaming_matches_process_directory(self):
+        streamed = [c for batch in self.ingestor.iter_chunk_batches(self.test_dir) for c in batch]
+        collected = self.ingestor.process_directory(self.test_dir)
+        key = lambda c: (c["filename"], c["chunk_id"])
+        self.assertEqual(sorted(streamed, key=key), sorted(collected, key=key))
+
+    def test_crashing_worker_skips_only_its_file(self):
+        self.ingestor.max_workers = 2
+        with patch.object(reader, "_process_file_in_worker", _crash_on_doc_0):
+            streamed = [c for batch in self.ingestor.iter_chunk_batches(self.test_dir) for c in batch]
+        self.assertEqual(sorted({c["filename"] for c in streamed}), ["doc_1.txt", "doc_2.txt", "doc_3.txt"])
+
+    def test_shipped_config_is_loaded_under_either_extension(self):
+        self.assertEqual(self.ingestor.config["batch_size"], 256)
+        self.assertIn("max_workers", self.ingestor.config)
+        (self.test_dir / "custom.yml").write_text("batch_size: 7\n")
+        self.assertEqual(DocumentIngestor(config_path=str(self.test_dir / "custom.yaml")).batch_size, 7)
+        with self.assertLogs(reader.logger, level="WARNING"):
+            self.assertEqual(DocumentIngestor(config_path=str(self.test_dir / "missing.yml")).config, {})
+
+    def test_missing_directory_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            self.ingestor.iter_chunk_batches(Path("tests/does_not_exist"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# tests/test_registry.py
+
+import unittest
+import shutil
+import threading
+from pathlib import Path
+from langchain_ai_agent.retriever.registry import NamespaceRegistry
+
+
+class TestNamespaceRegistry(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path("tests/tmp_registry_ns")
+        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.registry = NamespaceRegistry()
+        self.calls = 0
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _factory(self):
+        self.calls += 1
+        return object()
+
+    def test_warm_lookup_reuses_object(self):
+        first = self.registry.get_or_create(str(self.test_dir), "embedder", self._factory)
+        second = self.registry.get_or_create(str(self.test_dir), "embedder", self._factory)
+        self.assertIs(first, second)
+        self.assertEqual(self.calls, 1)
+
+    def test_invalidate_rebuilds_and_bumps_version(self):
+        first = self.registry.get_or_create(str(self.test_dir), "embedder", self._factory)
+        self.registry.invalidate(str(self.test_dir))
+        second = self.registry.get_or_create(str(self.test_dir), "embedder", self._factory)
+        self.assertIsNot(first, second)
+        self.assertEqual(self.registry.version(str(self.test_dir)), 1)
+
+    def test_on_disk_change_triggers_reload(self):
+        self.registry.get_or_create(str(self.test_dir), "embedder", self._factory)
+        (self.test_dir / "index.faiss").write_bytes(b"new")
+        self.registry.get_or_create(str(self.test_dir), "embedder", self._factory)
+        self.assertEqual(self.calls, 2)
+
+    def test_slow_build_does_not_block_other_namespaces(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_factory():
+            started.set()
+            release.wait(5)
+            return self._factory()
+
+        results = []
+        callers = [
+            threading.Thread(target=lambda: results.append(
+                self.registry.get_or_create(str(self.test_dir), "embedder", slow_factory)
+            ))
+            for _ in range(2)
+        ]
+        callers[0].start()
+        self.assertTrue(started.wait(5))
+        callers[1].start()
+
+        other = self.registry.get_or_create(str(self.test_dir / "other"), "embedder", self._factory)
+        self.assertIsNotNone(other)
+        self.assertEqual(self.calls, 1)
+
+        release.set()
+        for caller in callers:
+            caller.join(5)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(self.calls, 2)
+
+    def test_invalidate_during_build_rebuilds(self):
+        def factory():
+            if self.calls == 0:
+                self.registry.invalidate(str(self.test_dir))
+            return self._factory()
+
+        built = self.registry.get_or_create(str(self.test_dir), "embedder", factory)
+        self.assertEqual(self.calls, 2)
+        self.assertIs(self.registry.get_or_create(str(self.test_dir), "embedder", factory), built)
+
+    def test_write_lock_is_shared_per_namespace(self):
+        lock = self.registry.write_lock(str(self.test_dir))
+        self.assertIs(self.registry.write_lock(f"{self.test_dir}/"), lock)
+        self.assertIsNot(self.registry.write_lock(str(self.test_dir / "other")), lock)
+
+
+if __name__ == "__main__":
+    unittest.main()
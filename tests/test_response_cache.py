@@ -0,0 +1,62 @@
+# tests/test_response_cache.py
+
+import time
+import unittest
+from langchain_ai_agent.agents.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(max_entries=2, ttl_seconds=60, similarity_threshold=0.95)
+        self.scope = ("query", "faiss_index/default", 0, "{}")
+
+    def test_exact_hit_ignores_case_and_spacing(self):
+        self.cache.put(self.scope, "What is the refund policy?", "14 days")
+        self.assertEqual(self.cache.get(self.scope, "  what is the REFUND policy? "), "14 days")
+        self.assertEqual(self.cache.stats()["exact_hits"], 1)
+
+    def test_semantic_hit_above_threshold_only(self):
+        self.cache.put(self.scope, "refund policy?", "14 days", embedding=[1.0, 0.0])
+        self.assertEqual(self.cache.get(self.scope, "how do refunds work", embedding=[0.99, 0.05]), "14 days")
+        self.assertIsNone(self.cache.get(self.scope, "shipping times", embedding=[0.0, 1.0]))
+        stats = self.cache.stats()
+        self.assertEqual((stats["semantic_hits"], stats["misses"]), (1, 1))
+
+    def test_near_duplicates_with_other_numbers_miss(self):
+        self.cache.put(self.scope, "What is the status of invoice 1042?", "paid", embedding=[1.0, 0.0])
+        self.assertIsNone(self.cache.get(self.scope, "What is the status of invoice 1043?", embedding=[1.0, 0.0]))
+        self.assertIsNone(self.cache.get(self.scope, "Status of invoice 1042 for ACME?", embedding=[1.0, 0.0]))
+        self.assertEqual(self.cache.get(self.scope, "status of invoice 1042", embedding=[0.99, 0.05]), "paid")
+
+        self.cache.put(self.scope, "Revenue in Q2?", "1.2M", embedding=[0.0, 1.0])
+        self.assertIsNone(self.cache.get(self.scope, "Revenue in Q3?", embedding=[0.0, 1.0]))
+        self.assertEqual(self.cache.stats()["semantic_hits"], 1)
+
+    def test_scopes_are_isolated_and_invalidated(self):
+        self.cache.put(self.scope, "q", "old answer")
+        self.assertIsNone(self.cache.get(("query", "faiss_index/default", 1, "{}"), "q"))
+        self.assertEqual(self.cache.invalidate("query", "faiss_index/default"), 1)
+        self.assertIsNone(self.cache.get(self.scope, "q"))
+
+    def test_lru_eviction_and_ttl(self):
+        self.cache.put(self.scope, "a", 1)
+        self.cache.put(self.scope, "b", 2)
+        self.cache.get(self.scope, "a")
+        self.cache.put(self.scope, "c", 3)
+        self.assertIsNone(self.cache.get(self.scope, "b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+        short = ResponseCache(ttl_seconds=0.01)
+        short.put(self.scope, "a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(short.get(self.scope, "a"))
+        self.assertEqual(short.stats()["expirations"], 1)
+
+    def test_returns_copies(self):
+        self.cache.put(self.scope, "doc", {"agent_trace": {}})
+        self.cache.get(self.scope, "doc")["agent_trace"]["similar_cases"] = []
+        self.assertEqual(self.cache.get(self.scope, "doc"), {"agent_trace": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
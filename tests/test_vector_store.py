@@ -3,6 +3,9 @@
 import unittest
 from pathlib import Path
 import shutil
+from unittest.mock import patch
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_ai_agent.retriever.index_factory import IndexConfig
 from langchain_ai_agent.retriever.vector_store import DocumentEmbedder
 from dotenv import load_dotenv
 
@@ -60,6 +63,28 @@ class TestDocumentEmbedder(unittest.TestCase):
         self.assertGreater(len(results), 0)
         self.assertIn("LangChain", results[0].page_content)
 
+    def test_query_with_filters_only_returns_matches(self):
+        other = {**self.sample_chunks[0], "chunk_id": 0, "filename": "doc2.pdf",
+                 "source_type": "pdf", "doc_path": "/fake/path/doc2.pdf"}
+        self.embedder.build_or_update_index(self.sample_chunks + [other])
+        results = self.embedder.query("LangChain", k=3, filters={"source_type": "pdf"})
+        self.assertEqual([doc.metadata["filename"] for doc in results], ["doc2.pdf"])
+
+        results = self.embedder.query("LangChain", k=3, filters={"filename": ["doc1.txt"]})
+        self.assertEqual(len(results), 2)
+
+    def test_query_with_unknown_filter_field_raises(self):
+        self.embedder.build_or_update_index(self.sample_chunks)
+        with self.assertRaises(ValueError):
+            self.embedder.query("LangChain", filters={"text": "LangChain"})
+
+    def test_hybrid_query_ranks_exact_identifier_first(self):
+        invoice = {**self.sample_chunks[0], "chunk_id": 2, "text": "Invoice INV-2023-0042 is overdue by 30 days."}
+        self.embedder.build_or_update_index(self.sample_chunks + [invoice])
+        results = self.embedder.hybrid_query("INV-2023-0042", k=2)
+        self.assertEqual(results[0].metadata["chunk_id"], 2)
+        self.assertLessEqual(len(results), 2)
+
     def test_build_index_empty_input(self):
         with self.assertRaises(ValueError):
             self.embedder.build_or_update_index([])
@@ -69,5 +94,79 @@ class TestDocumentEmbedder(unittest.TestCase):
             self.embedder.build_or_update_index([{"text": "Missing metadata"}])
 
 
+class TestFilteredSearch(unittest.TestCase):
+    def setUp(self):
+        self.test_index_path = Path("tests/test_faiss_filtered")
+        with patch("langchain_ai_agent.retriever.vector_store.get_embeddings",
+                   return_value=DeterministicFakeEmbedding(size=8)):
+            self.embedder = DocumentEmbedder(persist_dir=str(self.test_index_path))
+        self.embedder.build_or_update_index([
+            {
+                "chunk_id": i,
+                "text": f"chunk number {i}",
+                "filename": "rare.pdf" if i == 0 else f"doc{i % 2}.txt",
+                "source_type": "pdf" if i == 0 else "txt",
+                "doc_path": f"/fake/path/doc{i}"
+            }
+            for i in range(40)
+        ])
+
+    def tearDown(self):
+        if self.test_index_path.exists():
+            shutil.rmtree(self.test_index_path)
+
+    def test_broad_filter_is_applied_after_search(self):
+        with patch.object(self.embedder._index, "search", wraps=self.embedder._index.search) as search:
+            results = self.embedder.query("chunk number 3", k=5, filters={"filename": "doc1.txt"})
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(doc.metadata["filename"] == "doc1.txt" for doc in results))
+        self.assertIsNone(search.call_args_list[0].kwargs.get("ids"))
+
+    def test_selective_filter_uses_id_selector(self):
+        with patch.object(self.embedder._index, "search", wraps=self.embedder._index.search) as search:
+            results = self.embedder.query("chunk number 3", k=5, filters={"source_type": "pdf"})
+        self.assertEqual([doc.metadata["filename"] for doc in results], ["rare.pdf"])
+        self.assertEqual(len(search.call_args.kwargs["ids"]), 1)
+
+    def test_same_basename_in_another_folder_is_indexed(self):
+        twin = {
+            "chunk_id": 1, "text": "chunk in another folder", "filename": "doc1.txt",
+            "source_type": "txt", "doc_path": "/other/path/doc1.txt"
+        }
+        self.assertEqual(self.embedder.build_or_update_index([twin]), 1)
+        self.assertEqual(self.embedder.build_or_update_index([twin]), 0)
+
+    def test_post_filter_matches_exact_filtered_search(self):
+        vector = self.embedder._embedding_function.embed_query("chunk number 7")
+        filters = {"filename": "doc0.txt"}
+        exact = self.embedder._index.search(vector, 4, ids=self.embedder._metadata.filter_ids(filters))
+        self.assertEqual(
+            [doc.id for doc, _ in self.embedder._filtered_search(vector, 4, filters)],
+            [doc.id for doc, _ in exact]
+        )
+
+    def test_query_skips_deleted_rows_without_compacting(self):
+        path = Path("tests/test_faiss_hnsw")
+        path.mkdir(parents=True, exist_ok=True)
+        self.addCleanup(shutil.rmtree, path, True)
+        IndexConfig(index_type="hnsw", hnsw_m=8).save(path)
+        with patch("langchain_ai_agent.retriever.vector_store.get_embeddings",
+                   return_value=DeterministicFakeEmbedding(size=8)):
+            embedder = DocumentEmbedder(persist_dir=str(path))
+        embedder.build_or_update_index([
+            {"chunk_id": 0, "text": f"chunk number {i}", "filename": f"doc{i}.txt",
+             "source_type": "txt", "doc_path": f"/fake/path/doc{i}"}
+            for i in range(10)
+        ])
+        embedder.flush()
+        embedder.delete_files(["/fake/path/doc3"])
+
+        with patch.object(embedder._index, "compact") as compact:
+            results = embedder.query("chunk number 3", k=10)
+        compact.assert_not_called()
+        self.assertNotIn("chunk number 3", [doc.page_content for doc in results])
+        self.assertEqual(len(results), 9)
+
+
 if __name__ == "__main__":
     unittest.main()